@@ -0,0 +1,105 @@
+"""
+Compare scaling frames in NumPy against piping native frames to ffmpeg's scale filter
+
+Usage: python benchmarks/bench_ffmpeg_scaling.py [--source 3840x2160] [--output 1920x1080] [--frames 50]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+from mss.screenshot import ScreenShot
+
+# Make the client modules importable the same way the app imports them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from screen_capture import ScreenCapture
+from frame_sources import SyntheticSource
+
+
+def parse_size(value):
+    """Parse a WIDTHxHEIGHT argument"""
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def make_capture(source_size, output_size, ffmpeg_scaling, scale_mode):
+    """Create a ScreenCapture that believes the monitor is source_size"""
+    return ScreenCapture(
+        resolution=output_size,
+        scale_mode=scale_mode,
+        ffmpeg_scaling=ffmpeg_scaling,
+        frame_source=SyntheticSource("noise", *source_size)
+    )
+
+
+def make_frames(source_size, count):
+    """Generate a few distinct noisy frames to cycle through"""
+    rng = np.random.default_rng(0)
+    width, height = source_size
+    return [
+        ScreenShot.from_size(bytearray(rng.integers(0, 256, width * height * 4, dtype=np.uint8).tobytes()), width, height)
+        for _ in range(count)
+    ]
+
+
+def run(capture, ffmpeg_path, frames, frame_count):
+    """Encode frame_count frames and return (wall seconds, python cpu seconds, ffmpeg cpu seconds)"""
+    capture.output_file = os.path.join(tempfile.mkdtemp(), "bench.mp4")
+    cmd = capture._build_ffmpeg_command(ffmpeg_path)
+
+    children_before = os.times()
+    wall_start = time.perf_counter()
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    python_cpu = 0.0
+    for i in range(frame_count):
+        cpu_start = time.thread_time()
+        buffer = capture._frame_to_buffer(frames[i % len(frames)])
+        python_cpu += time.thread_time() - cpu_start
+        process.stdin.write(buffer)
+
+    process.stdin.close()
+    process.wait()
+    wall = time.perf_counter() - wall_start
+    children_after = os.times()
+
+    ffmpeg_cpu = (children_after.children_user - children_before.children_user) + \
+        (children_after.children_system - children_before.children_system)
+    shutil.rmtree(os.path.dirname(capture.output_file), ignore_errors=True)
+    return wall, python_cpu, ffmpeg_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--source", type=parse_size, default=(3840, 2160), help="Monitor size")
+    parser.add_argument("--output", type=parse_size, default=(1920, 1080), help="Recording resolution")
+    parser.add_argument("--frames", type=int, default=50, help="Frames to encode per run")
+    parser.add_argument("--scale-mode", default="nearest", choices=["nearest", "box2x", "area"])
+    args = parser.parse_args()
+
+    ffmpeg_path = shutil.which("ffmpeg")
+    if not ffmpeg_path:
+        print("FFmpeg not found! Please install FFmpeg and make sure it's in your PATH.")
+        return 1
+
+    frames = make_frames(args.source, 4)
+    print(f"{args.frames} frames, {args.source[0]}x{args.source[1]} -> {args.output[0]}x{args.output[1]}, mode={args.scale_mode}")
+    print(f"{'path':<8} {'wall s':>8} {'fps':>8} {'python ms/frame':>16} {'ffmpeg ms/frame':>16}")
+
+    for label, ffmpeg_scaling in (("numpy", False), ("ffmpeg", True)):
+        capture = make_capture(args.source, args.output, ffmpeg_scaling, args.scale_mode)
+        wall, python_cpu, ffmpeg_cpu = run(capture, ffmpeg_path, frames, args.frames)
+        print(
+            f"{label:<8} {wall:>8.2f} {args.frames / wall:>8.1f} "
+            f"{python_cpu * 1000 / args.frames:>16.2f} {ffmpeg_cpu * 1000 / args.frames:>16.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Measure frame throughput from the capture process to a reader process through the shared memory ring
+
+Each run publishes --frames BGRA frames as fast as possible while a spawned
+process reads them in order, once through FrameRing and once as pickled bytes
+through a bounded multiprocessing.Queue for comparison. The ring never waits
+for its reader, so frames it couldn't keep up with show up as skipped; the
+queue blocks the writer instead.
+
+Usage: python benchmarks/bench_frame_ring.py [--sizes 1280x720,1920x1080,3840x2160] [--frames 300] [--slots 4]
+"""
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+
+import numpy as np
+
+# Make the client modules importable the same way the app imports them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from frame_ring import FrameRing, FrameRingReader
+
+
+def parse_sizes(value):
+    """Parse a comma separated list of WIDTHxHEIGHT arguments"""
+    return [tuple(int(part) for part in size.lower().split("x")) for size in value.split(",")]
+
+
+def read_ring(name, count, ready, results):
+    """Reader process: follow the ring until count frames were written or skipped"""
+    reader = FrameRingReader(name)
+    ready.set()
+
+    frames = 0
+    while frames + reader.overruns < count:
+        if reader.next(timeout=5.0) is None:
+            break
+        frames += 1
+    results.put((time.perf_counter(), frames, reader.overruns))
+    reader.close()
+
+
+def read_queue(frames_queue, count, ready, results):
+    """Reader process: unpickle count frames from a queue"""
+    ready.set()
+    for _ in range(count):
+        frames_queue.get()
+    results.put((time.perf_counter(), count, 0))
+
+
+def run(context, target, size, frame_count, slots):
+    """Publish frame_count frames and return (publish seconds, read seconds, frames read, frames skipped)"""
+    width, height = size
+    frames = [np.full((height, width, 4), value, dtype=np.uint8) for value in range(4)]
+    ready = context.Event()
+    results = context.Queue()
+
+    if target == "ring":
+        ring = FrameRing.for_size(slots, width, height)
+        reader = context.Process(target=read_ring, args=(ring.name, frame_count, ready, results))
+        publish = lambda i: ring.write(frames[i % len(frames)], i)
+    else:
+        ring = None
+        frames_queue = context.Queue(maxsize=slots)
+        reader = context.Process(target=read_queue, args=(frames_queue, frame_count, ready, results))
+        publish = lambda i: frames_queue.put(frames[i % len(frames)].tobytes())
+
+    reader.start()
+    ready.wait()
+
+    start = time.perf_counter()
+    for i in range(frame_count):
+        publish(i)
+    published = time.perf_counter()
+    end, read, skipped = results.get()
+    reader.join()
+
+    if ring:
+        ring.close()
+    return published - start, end - start, read, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=parse_sizes, default=[(1280, 720), (1920, 1080), (3840, 2160)])
+    parser.add_argument("--frames", type=int, default=300, help="Frames to publish per run")
+    parser.add_argument("--slots", type=int, default=4, help="Ring slots (and queue size)")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{args.frames} frames per run, {args.slots} slots")
+    print(f"{'size':<11} {'transport':<10} {'write fps':>10} {'read fps':>9} {'read GB/s':>10} {'read':>6} {'skipped':>8}")
+
+    for size in args.sizes:
+        frame_bytes = size[0] * size[1] * 4
+        for target in ("ring", "queue"):
+            write_seconds, read_seconds, read, skipped = run(context, target, size, args.frames, args.slots)
+            print(
+                f"{size[0]}x{size[1]:<6} {target:<10} {args.frames / write_seconds:>10.1f} {read / read_seconds:>9.1f} "
+                f"{read * frame_bytes / read_seconds / 1e9:>10.2f} {read:>6} {skipped:>8}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
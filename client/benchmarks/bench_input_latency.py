@@ -0,0 +1,118 @@
+"""
+Measure input event handling latency while recording, with frames converted in-process or in the encoder process
+
+A simulated listener thread passes a scroll event to InputLogger every
+--interval ms, with its drainer running, while ScreenCapture records a
+synthetic monitor of noise whose frames have to be scaled. Latency is the time from
+when the event was due until its handler returned, so it includes waiting for
+the GIL.
+
+Usage: python benchmarks/bench_input_latency.py [--source 3840x2160] [--output 1920x1080] [--seconds 10] [--interval 2]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+
+import numpy as np
+
+# Make the client modules importable the same way the app imports them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from screen_capture import ScreenCapture
+from frame_sources import SyntheticSource
+from input_logger import InputLogger
+
+
+def parse_size(value):
+    """Parse a WIDTHxHEIGHT argument"""
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def listen(input_logger, stop, interval, latencies):
+    """Handle an event every interval seconds and record how late each handler finished"""
+    due = time.perf_counter()
+
+    while not stop.is_set():
+        due += interval
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        input_logger.on_mouse_scroll(100, 100, 0, 1)
+        latencies.append(time.perf_counter() - due)
+
+
+def run(args, source, encoder_process):
+    """Record for args.seconds while handling events; return (latencies in seconds, frame pool stats)"""
+    output_dir = tempfile.mkdtemp()
+    capture = ScreenCapture(
+        resolution=args.output,
+        fps=args.fps,
+        scale_mode=args.scale_mode,
+        encoder=args.encoder,
+        encoder_process=encoder_process,
+        frame_source=source
+    )
+    capture.output_dir = output_dir
+
+    # Log events without hooking the real mouse, with the drainer start() would run
+    input_logger = InputLogger()
+    input_logger.running = True
+    drainer = threading.Thread(target=input_logger._drain_worker)
+    drainer.start()
+
+    latencies = []
+    stop = threading.Event()
+    listener = threading.Thread(target=listen, args=(input_logger, stop, args.interval / 1000, latencies))
+
+    capture.start()
+    listener.start()
+    time.sleep(args.seconds)
+    stop.set()
+    listener.join()
+    capture.stop()
+    input_logger._drain_stop.set()
+    drainer.join()
+    input_logger.running = False
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    return np.array(latencies), capture.frame_pool.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--source", type=parse_size, default=(3840, 2160), help="Monitor size")
+    parser.add_argument("--output", type=parse_size, default=(1920, 1080), help="Recording resolution")
+    parser.add_argument("--fps", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=10, help="Recording length per run")
+    parser.add_argument("--interval", type=float, default=2, help="Milliseconds between input events")
+    parser.add_argument("--scale-mode", default="area", choices=["nearest", "box2x", "area"])
+    parser.add_argument("--encoder", default="libx264")
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        print("FFmpeg not found! Please install FFmpeg and make sure it's in your PATH.")
+        return 1
+
+    source = SyntheticSource("noise", *args.source, rate=args.fps)
+    print(f"{args.seconds:g} s at {args.fps} fps, {args.source[0]}x{args.source[1]} -> {args.output[0]}x{args.output[1]}, "
+          f"mode={args.scale_mode}, an event every {args.interval:g} ms")
+    print(f"{'encoding':<10} {'events':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'dropped':>8}")
+
+    for label, encoder_process in (("thread", False), ("process", True)):
+        latencies, pool_stats = run(args, source, encoder_process)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        print(
+            f"{label:<10} {len(latencies):>7} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f} "
+            f"{latencies.max() * 1000:>8.2f} {pool_stats['dropped']:>8}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Benchmark the capture -> convert -> encode pipeline with synthetic screen content
+
+Each case records a synthetic monitor (static, scrolling text or full-motion
+noise, see SyntheticSource) at one resolution through ScreenCapture and the
+real ffmpeg, headless, in a fresh process so peak memory is per case. Reported
+per case: frames encoded per second of recording, CPU ms per encoded frame in Python and in
+ffmpeg, dropped frames and peak RSS of both.
+
+Save results with --json and compare a later run against them with --baseline;
+the run fails if fps drops or CPU per frame rises by more than --tolerance.
+
+Usage: python benchmarks/bench_pipeline.py [--sources static,scrolling,noise] [--sizes 1280x720,1920x1080]
+       [--fps 30] [--seconds 5] [--json results.json] [--baseline results.json] [--tolerance 0.15]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+# Make the client modules importable the same way the app imports them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from frame_sources import SyntheticSource
+
+
+def parse_sizes(value):
+    """Parse a comma separated list of WIDTHxHEIGHT arguments"""
+    return [tuple(int(part) for part in size.lower().split("x")) for size in value.split(",")]
+
+
+def run_case(source_name, size, fps, seconds, options, results):
+    """Record one case in this (fresh) process and put its measurements on results"""
+    from screen_capture import ScreenCapture
+    from frame_timestamps import read_frame_timestamps
+
+    width, height = size
+    source = SyntheticSource(source_name, width, height, rate=fps)
+    output_dir = tempfile.mkdtemp()
+
+    capture = ScreenCapture(fps=fps, frame_source=source, **options)
+    capture.output_dir = output_dir
+
+    cpu_before = os.times()
+    capture.start()
+    time.sleep(seconds)
+
+    # Unlike stop(), wait for ffmpeg to encode its backlog however long that takes,
+    # so its CPU time is counted rather than lost to a kill
+    capture.running = False
+    capture.capture_thread.join()
+    capture.encoder_thread.join()
+    cpu_after = os.times()
+
+    timestamps = read_frame_timestamps(capture.timestamps_file)
+    frames = len(timestamps)
+    span = (timestamps[-1] - timestamps[0]) / 1_000_000_000 if frames > 1 else 0
+    python_cpu = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    ffmpeg_cpu = (cpu_after.children_user - cpu_before.children_user) + \
+        (cpu_after.children_system - cpu_before.children_system)
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    # ru_maxrss is in KiB on Linux
+    results.put({
+        "source": source_name,
+        "size": f"{width}x{height}",
+        "fps": (frames - 1) / span if span else 0.0,
+        "frames": frames,
+        "python_ms_per_frame": python_cpu * 1000 / max(frames, 1),
+        "ffmpeg_ms_per_frame": ffmpeg_cpu * 1000 / max(frames, 1),
+        "dropped": capture.frame_pool.stats()["dropped"] + capture.scheduler.stats()["dropped"],
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "ffmpeg_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    })
+
+
+def regressions(results, baseline, tolerance):
+    """Describe cases that got slower than the baseline by more than tolerance"""
+    previous = {(case["source"], case["size"]): case for case in baseline}
+    found = []
+    for case in results:
+        before = previous.get((case["source"], case["size"]))
+        if not before:
+            continue
+        if case["fps"] < before["fps"] * (1 - tolerance):
+            found.append(f"{case['source']} {case['size']}: {before['fps']:.1f} -> {case['fps']:.1f} fps")
+        for key in ("python_ms_per_frame", "ffmpeg_ms_per_frame"):
+            if case[key] > before[key] * (1 + tolerance):
+                found.append(f"{case['source']} {case['size']}: {key} {before[key]:.2f} -> {case[key]:.2f}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sources", default=",".join(SyntheticSource.PATTERNS), help="Comma separated: " + ", ".join(SyntheticSource.PATTERNS))
+    parser.add_argument("--sizes", type=parse_sizes, default=[(1280, 720), (1920, 1080)])
+    parser.add_argument("--fps", type=int, default=30, help="Capture rate to ask for")
+    parser.add_argument("--seconds", type=float, default=5, help="Recording length per case")
+    parser.add_argument("--encoder", default="libx264")
+    parser.add_argument("--skip-unchanged", action="store_true", help="Don't pipe unchanged frames")
+    parser.add_argument("--encoder-process", action="store_true", help="Convert frames in the encoder process")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown before failing")
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        print("FFmpeg not found! Please install FFmpeg and make sure it's in your PATH.")
+        return 1
+
+    options = {
+        "encoder": args.encoder,
+        "skip_unchanged": args.skip_unchanged,
+        "encoder_process": args.encoder_process
+    }
+    context = multiprocessing.get_context("spawn")
+    results_queue = context.Queue()
+
+    print(f"{args.seconds:g} s per case at {args.fps} fps, encoder={args.encoder}")
+    print(f"{'source':<10} {'size':<10} {'fps':>7} {'python ms/f':>12} {'ffmpeg ms/f':>12} {'dropped':>8} {'rss MB':>8} {'ffmpeg MB':>10}")
+
+    results = []
+    for size in args.sizes:
+        for source_name in args.sources.split(","):
+            case = context.Process(target=run_case, args=(source_name, size, args.fps, args.seconds, options, results_queue))
+            case.start()
+            case.join()
+            if case.exitcode != 0:
+                print(f"{source_name:<10} {size[0]}x{size[1]:<6} failed with exit code {case.exitcode}")
+                continue
+            result = results_queue.get()
+            results.append(result)
+            print(
+                f"{result['source']:<10} {result['size']:<10} {result['fps']:>7.1f} {result['python_ms_per_frame']:>12.2f} "
+                f"{result['ffmpeg_ms_per_frame']:>12.2f} {result['dropped']:>8} {result['peak_rss_mb']:>8.0f} "
+                f"{result['ffmpeg_peak_rss_mb']:>10.0f}"
+            )
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for regression in found:
+            print(f"REGRESSION {regression}")
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
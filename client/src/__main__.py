@@ -2,6 +2,7 @@ import sys
 import os
 import traceback
 import tempfile
+import multiprocessing
 from loguru import logger
 
 # Add parent directory to path
@@ -32,6 +33,8 @@ logger.add(os.path.join(log_dir, "recorder_{time}.log"), rotation="10 MB")
 
 # Import and run the app
 if __name__ == "__main__":
+    # The encoder process is spawned from the frozen executable
+    multiprocessing.freeze_support()
     try:
         from src.app import RecorderApp
         app = RecorderApp()
@@ -1,6 +1,7 @@
 import os
 import sys
 import time
+import shutil
 import threading
 import asyncio
 import pystray
@@ -11,9 +12,11 @@ from loguru import logger
 # Import timing module first to ensure it's initialized
 import timing
 from screen_capture import ScreenCapture
+from multi_capture import MultiScreenCapture
 from input_logger import InputLogger
 from timeline_muxer import TimelineMuxer
 from uploader import Uploader
+from recovery import recover_recordings
 
 # Configure logging
 log_dir = os.path.join(os.environ.get('LOCALAPPDATA', tempfile.gettempdir()), 'GAce', 'logs')
@@ -21,20 +24,48 @@ os.makedirs(log_dir, exist_ok=True)
 logger.add(os.path.join(log_dir, "recorder_{time}.log"), rotation="10 MB")
 
 class RecorderApp:
-    def __init__(self):
+    def __init__(self, segment_duration=None, monitors=1, encoder_process=False, event_keyframes=False, frame_source=None, draw_cursor=False):
         self.is_recording = False
         self.recorder_thread = None
         self.loop = None
         
         # Create components
-        self.screen_capture = ScreenCapture()
+        # With a segment_duration, every finished segment is packaged and uploaded while recording continues
+        # Fragmented MP4 keeps recordings playable if the app is killed while recording
+        # monitors is a monitor index, a list of them or "all", each recorded by its own pipeline
+        # encoder_process moves frame conversion out of the process handling input events
+        # event_keyframes puts keyframes at clicks and typing so the viewer seeks to them quickly
+        # frame_source replaces the screen, e.g. with "synthetic:noise" to load test headless
+        # The pointer position is recorded as a track for the viewer; draw_cursor also draws it into the video
+        options = {
+            "segment_duration": segment_duration,
+            "fragmented": True,
+            "encoder_process": encoder_process,
+            "event_keyframes": event_keyframes,
+            "frame_source": frame_source,
+            "cursor_track": True,
+            "draw_cursor": draw_cursor
+        }
+        if monitors == 1:
+            self.screen_capture = ScreenCapture(**options)
+        else:
+            self.screen_capture = MultiScreenCapture(monitors, **options)
+        self.screen_capture.on_segment = self.on_segment_finished
+        self.segment_duration = segment_duration
         self.input_logger = InputLogger()
-        self.timeline_muxer = TimelineMuxer()
+        if event_keyframes:
+            self.input_logger.on_significant_event = self.screen_capture.request_keyframe
+        self.timeline_muxer = TimelineMuxer(frame_source=self.screen_capture.frame_source)
         self.uploader = Uploader()
         
         # Initialize tray icon
         self.setup_tray()
         
+        # Package and upload whatever a crash left behind last time, without delaying start-up
+        recovery_thread = threading.Thread(target=self.recover_interrupted_recordings)
+        recovery_thread.daemon = True
+        recovery_thread.start()
+        
     def setup_tray(self):
         """Set up the system tray icon and menu"""
         # Create a simple icon
@@ -91,7 +122,10 @@ class RecorderApp:
             
             # Start capture processes
             self.screen_capture.start()
+            self.timeline_muxer.set_monitors(self.screen_capture.monitor_outputs())
             self.input_logger.start()
+            # Lets a recording interrupted by a crash be recovered with its input events
+            self.screen_capture.annotate_marker(events=self.input_logger.output_file)
             self.timeline_muxer.start()
             
             # Run the event loop
@@ -125,6 +159,11 @@ class RecorderApp:
         video_file = self.screen_capture.stop()
         events_file = self.input_logger.stop()
         
+        # Segments, including the last one, have already been packaged and uploaded
+        if self.segment_duration:
+            self.timeline_muxer.stop()
+            return
+        
         # Ensure TimelineMuxer uses the same resolution as ScreenCapture
         resolution = self.screen_capture.resolution
         logger.info(f"Using resolution from ScreenCapture: {resolution[0]}x{resolution[1]}")
@@ -133,6 +172,7 @@ class RecorderApp:
         # Set files in timeline muxer
         self.timeline_muxer.set_video_file(video_file)
         self.timeline_muxer.set_events_file(events_file)
+        self.timeline_muxer.set_frame_timestamps_file(self.screen_capture.timestamps_file)
         
         # Finalize recording
         recording_path = self.timeline_muxer.finalize()
@@ -140,6 +180,26 @@ class RecorderApp:
         # Upload the recording
         self.uploader.upload_recording(recording_path)
     
+    def recover_interrupted_recordings(self):
+        """Package and upload recordings that never stopped cleanly"""
+        try:
+            ffmpeg_path = shutil.which("ffmpeg")
+            if not ffmpeg_path:
+                logger.warning("FFmpeg not found, skipping recovery of interrupted recordings")
+                return
+            
+            for package_path in recover_recordings(self.screen_capture.output_dir, ffmpeg_path, self.timeline_muxer):
+                self.uploader.upload_recording(package_path)
+        except Exception as e:
+            logger.exception(f"Error recovering interrupted recordings: {e}")
+    
+    def on_segment_finished(self, segment):
+        """Package and upload a finished segment of the current recording"""
+        events = self.input_logger.events_between(segment["start_ns"], segment["end_ns"])
+        package_path = self.timeline_muxer.finalize_segment(segment, events)
+        if package_path:
+            self.uploader.upload_recording(package_path)
+    
     def exit_app(self, *args):
         """Exit the application"""
         logger.info("Exiting application")
@@ -0,0 +1,112 @@
+"""
+Capture of a screen rectangle or of a window that moves around
+
+Rectangles are dicts with "left", "top", "width" and "height" in virtual desktop
+coordinates, like mss monitors. When following a window, the rectangle keeps its
+size from the start of the recording and moves with the window, and every move
+is kept in a track so input events can be translated into video coordinates.
+"""
+import sys
+import time
+from bisect import bisect_right
+from loguru import logger
+
+
+def parse_region(region):
+    """Turn a region dict or (left, top, width, height) tuple into a region dict"""
+    if isinstance(region, dict):
+        left, top, width, height = (region[key] for key in ("left", "top", "width", "height"))
+    else:
+        left, top, width, height = region
+    return {"left": int(left), "top": int(top), "width": int(width), "height": int(height)}
+
+
+def clamp_region(region, bounds):
+    """Fit a region inside bounds, with an even size as yuv420p encoding needs"""
+    width = min(region["width"], bounds["width"]) // 2 * 2
+    height = min(region["height"], bounds["height"]) // 2 * 2
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Capture region {region} is empty")
+
+    left = min(max(region["left"], bounds["left"]), bounds["left"] + bounds["width"] - width)
+    top = min(max(region["top"], bounds["top"]), bounds["top"] + bounds["height"] - height)
+    return {"left": left, "top": top, "width": width, "height": height}
+
+
+def window_bounds(title):
+    """Screen rectangle of the top-level window with this exact title, or None
+
+    Only implemented for Windows; None as well while the window is minimized.
+    """
+    if sys.platform != "win32":
+        return None
+
+    import ctypes
+    from ctypes import wintypes
+    user32 = ctypes.windll.user32
+    hwnd = user32.FindWindowW(None, title)
+    if not hwnd or user32.IsIconic(hwnd):
+        return None
+
+    rect = wintypes.RECT()
+    if not user32.GetWindowRect(hwnd, ctypes.byref(rect)):
+        return None
+    return {"left": rect.left, "top": rect.top, "width": rect.right - rect.left, "height": rect.bottom - rect.top}
+
+
+def translate_events(events, track):
+    """Translate event positions into capture region coordinates in place
+
+    track lists [t_ns, left, top] for every position of the region, oldest first.
+    """
+    if not track:
+        return events
+
+    times = [entry[0] for entry in track]
+    for event in events:
+        index = max(bisect_right(times, event["t"]) - 1, 0)
+        left, top = track[index][1], track[index][2]
+        for x_key, y_key in (("x", "y"), ("start_x", "start_y"), ("end_x", "end_y")):
+            if event.get(x_key) is not None and event.get(y_key) is not None:
+                event[x_key] -= left
+                event[y_key] -= top
+    return events
+
+
+class RegionFollower:
+    """Moves the capture region along with a window, checking its position every interval seconds"""
+
+    def __init__(self, locate, region, bounds, interval=0.2, clock=time.monotonic):
+        self.locate = locate  # Returns the window's rectangle, or None if it can't be found
+        self.region = dict(region)
+        self.bounds = bounds
+        self.interval = interval
+        self.clock = clock
+        self.track = []
+        self._checked = None
+
+    def reset(self):
+        """Start a new track at the current position"""
+        self.track = [[0, self.region["left"], self.region["top"]]]
+        self._checked = None
+
+    def update(self, t_ns):
+        """Region to grab for a frame at t_ns; returns (region, moved)"""
+        now = self.clock()
+        if self._checked is not None and now - self._checked < self.interval:
+            return self.region, False
+        self._checked = now
+
+        bounds = self.locate()
+        if not bounds:
+            # Minimized or closed; keep grabbing where the window was last
+            return self.region, False
+
+        region = clamp_region({**self.region, "left": bounds["left"], "top": bounds["top"]}, self.bounds)
+        if (region["left"], region["top"]) == (self.region["left"], self.region["top"]):
+            return self.region, False
+
+        self.region = region
+        self.track.append([t_ns, region["left"], region["top"]])
+        logger.debug(f"Capture region moved to {region['left']},{region['top']}")
+        return self.region, True
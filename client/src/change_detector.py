@@ -0,0 +1,101 @@
+"""
+Tile-based change detection between consecutive BGRA frames
+"""
+import numpy as np
+
+
+class ChangeDetector:
+    def __init__(self, tile_size=64, sample_step=1):
+        if tile_size % sample_step:
+            raise ValueError(f"Tile size {tile_size} must be a multiple of the sample step {sample_step}")
+
+        self.tile_size = tile_size
+        self.sample_step = sample_step  # Compare every Nth row and column (1 compares every pixel)
+        self.reference = None  # Copy of the last frame reported as changed
+        self._diff = None
+        self._grid_shape = (0, 0)
+
+    def reset(self):
+        """Forget the reference frame so the next frame counts as fully changed"""
+        self.reference = None
+
+    @property
+    def grid_shape(self):
+        """Number of tile rows and columns for the current frame size"""
+        return self._grid_shape
+
+    def _prepare(self, shape):
+        """Allocate the reference and scratch buffers for a new frame size"""
+        height, width = shape[:2]
+        self.reference = np.empty((height, width, 4), dtype=np.uint8)
+
+        step = self.sample_step
+        sampled_height = len(range(0, height, step))
+        sampled_width = len(range(0, width, step))
+        self._diff = np.empty((sampled_height, sampled_width), dtype=bool)
+        self._grid_shape = (len(range(0, height, self.tile_size)), len(range(0, width, self.tile_size)))
+
+    def update(self, frame_array):
+        """Compare a frame with the reference and return a boolean mask of changed tiles
+
+        The reference is updated in place for the tiles that changed.
+        """
+        if self.reference is None or self.reference.shape != frame_array.shape:
+            self._prepare(frame_array.shape)
+            self.reference[...] = frame_array
+            return np.ones(self.grid_shape, dtype=bool)
+
+        return self._compare(frame_array, 0, 0)
+
+    def update_region(self, region_array, row, col):
+        """Compare a region whose top-left corner is tile (row, col) with the reference
+
+        Returns a mask over the whole tile grid in which only the region's tiles can be set.
+        """
+        if self.reference is None:
+            raise ValueError("A full frame must be passed to update() before regions")
+        return self._compare(region_array, row, col)
+
+    def _compare(self, region_array, row, col):
+        """Diff a tile-aligned region against the reference and refresh its changed tiles"""
+        size = self.tile_size
+        step = self.sample_step
+        top, left = row * size, col * size
+        height, width = region_array.shape[:2]
+
+        reference = self.reference[top:top+height, left:left+width]
+        diff = self._diff[top//step:(top+height+step-1)//step, left//step:(left+width+step-1)//step]
+
+        # Compare whole BGRA pixels at once
+        current = region_array.view(np.uint32)[::step, ::step, 0]
+        previous = reference.view(np.uint32)[::step, ::step, 0]
+        np.not_equal(current, previous, out=diff)
+
+        dirty = np.zeros(self.grid_shape, dtype=bool)
+
+        # Static screens are the common case, so skip the per-tile reduction
+        if not diff.any():
+            return dirty
+
+        local = np.logical_or.reduceat(diff, np.arange(0, height, size) // step, axis=0)
+        local = np.logical_or.reduceat(local, np.arange(0, width, size) // step, axis=1)
+        dirty[row:row+local.shape[0], col:col+local.shape[1]] = local
+
+        dirty_count = np.count_nonzero(local)
+        if dirty_count > local.size // 2:
+            # Cheaper to refresh the whole region than many small tiles
+            reference[...] = region_array
+        elif dirty_count:
+            for tile_row, tile_col in zip(*np.nonzero(local)):
+                y, x = self.tile_bounds(tile_row, tile_col)
+                reference[y, x] = region_array[y, x]
+        return dirty
+
+    def changed(self, frame_array):
+        """Check if any tile of the frame differs from the reference"""
+        return bool(self.update(frame_array).any())
+
+    def tile_bounds(self, row, col):
+        """Row and column slices covering a tile"""
+        size = self.tile_size
+        return slice(row * size, (row + 1) * size), slice(col * size, (col + 1) * size)
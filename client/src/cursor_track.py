@@ -0,0 +1,156 @@
+"""
+Where the mouse pointer was during a recording, sampled with the frames
+
+Screen grabs don't include the pointer and InputLogger only logs moves while
+dragging, so the capture pipeline samples the pointer position at frame times
+instead, at most every interval seconds and only when it moved. The track is
+kept in compact arrays and exported delta-encoded; the pointer can also be
+drawn into the frames before they are encoded.
+"""
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+_local = threading.local()
+
+# Classic arrow pointer with its hotspot at the top-left: "#" outline, "." fill
+CURSOR_SHAPE = (
+    "#",
+    "##",
+    "#.#",
+    "#..#",
+    "#...#",
+    "#....#",
+    "#.....#",
+    "#......#",
+    "#.......#",
+    "#........#",
+    "#.........#",
+    "#......#####",
+    "#...#..#",
+    "#..##..#",
+    "#.#  #..#",
+    "##   #..#",
+    "#     #..#",
+    "      #..#",
+    "       ##",
+)
+
+
+def _cursor_masks():
+    """Boolean outline and fill masks of CURSOR_SHAPE"""
+    width = max(len(row) for row in CURSOR_SHAPE)
+    rows = [row.ljust(width) for row in CURSOR_SHAPE]
+    outline = np.array([[char == "#" for char in row] for row in rows])
+    fill = np.array([[char == "." for char in row] for row in rows])
+    return outline, fill
+
+
+CURSOR_OUTLINE, CURSOR_FILL = _cursor_masks()
+
+
+def cursor_position():
+    """Pointer position in virtual desktop coordinates, or None if it can't be read"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            point = wintypes.POINT()
+            if not ctypes.windll.user32.GetCursorPos(ctypes.byref(point)):
+                return None
+            return point.x, point.y
+
+        # pynput controllers hold a display connection, which can't be shared between threads
+        if not hasattr(_local, "controller"):
+            from pynput import mouse
+            _local.controller = mouse.Controller()
+        x, y = _local.controller.position
+        return int(x), int(y)
+    except Exception:
+        return None
+
+
+def composite_cursor(frame, x, y):
+    """Draw the pointer into a BGRA frame array in place with its hotspot at (x, y)"""
+    height, width = frame.shape[:2]
+    shape_height, shape_width = CURSOR_OUTLINE.shape
+
+    # Clip the pointer to the frame; it may be partly or entirely outside of it
+    left, top = max(x, 0), max(y, 0)
+    right, bottom = min(x + shape_width, width), min(y + shape_height, height)
+    if left >= right or top >= bottom:
+        return False
+
+    area = frame[top:bottom, left:right]
+    masks = (slice(top - y, bottom - y), slice(left - x, right - x))
+    area[CURSOR_OUTLINE[masks]] = (0, 0, 0, 255)
+    area[CURSOR_FILL[masks]] = (255, 255, 255, 255)
+    return True
+
+
+def decode_cursor_track(track):
+    """Turn an exported track back into [t_ms, x, y] positions"""
+    positions = []
+    t = x = y = 0
+    for dt, dx, dy in zip(track["t"], track["x"], track["y"]):
+        t, x, y = t + dt, x + dx, y + dy
+        positions.append([t, x, y])
+    return positions
+
+
+class CursorTrack:
+    def __init__(self, interval=0.05):
+        self.interval_ns = int(interval * 1_000_000_000)  # Shortest time between two samples
+        self.reset()
+
+    def reset(self):
+        """Forget every sample, for a new recording"""
+        self.t = array('q')  # Sample times in ns on the input event clock
+        self.x = array('i')
+        self.y = array('i')
+
+    @property
+    def samples(self):
+        """Number of positions recorded"""
+        return len(self.t)
+
+    @property
+    def last(self):
+        """Most recent (t_ns, x, y), or None"""
+        if not self.t:
+            return None
+        return self.t[-1], self.x[-1], self.y[-1]
+
+    def sample(self, t_ns, x, y):
+        """Record the pointer at t_ns if it moved and the last sample is old enough; returns whether it was"""
+        if self.t:
+            if t_ns - self.t[-1] < self.interval_ns:
+                return False
+            if (x, y) == (self.x[-1], self.y[-1]):
+                return False
+
+        self.t.append(t_ns)
+        self.x.append(x)
+        self.y.append(y)
+        return True
+
+    def export(self, start_ns=0, end_ns=None):
+        """Delta-encode the samples from start_ns up to end_ns, timed in ms from start_ns
+
+        The first entry of each list is absolute and the rest are differences to the
+        entry before. The position at start_ns is included even if it was sampled earlier.
+        """
+        count = len(self.t)  # Samples appended while exporting are left out
+        first = max(bisect_right(self.t, start_ns, 0, count) - 1, 0)
+        last = count if end_ns is None else bisect_left(self.t, end_ns, 0, count)
+
+        track = {"interval_ms": self.interval_ns // 1_000_000, "t": [], "x": [], "y": []}
+        previous = (0, 0, 0)
+        for index in range(first, last):
+            current = (max(self.t[index] - start_ns, 0) // 1_000_000, self.x[index], self.y[index])
+            for key, value, before in zip(("t", "x", "y"), current, previous):
+                track[key].append(value - before)
+            previous = current
+        return track
@@ -0,0 +1,126 @@
+"""
+Adaptive encoder level control based on how well ffmpeg keeps up with capture
+"""
+import time
+from loguru import logger
+
+# Resolution factors tried once the fastest preset can't keep up either
+SCALE_STEPS = (1.0, 0.75, 0.5)
+
+
+def encoder_levels(preset_count, scales=SCALE_STEPS):
+    """Encoder levels from best quality to cheapest as (preset step, resolution scale) pairs"""
+    levels = [(speed, scales[0]) for speed in range(preset_count)]
+    levels += [(preset_count - 1, scale) for scale in scales[1:]]
+    return levels
+
+
+def scaled_resolution(resolution, scale):
+    """Resolution reduced by a scale factor, rounded down to even sizes for yuv420p"""
+    width, height = resolution
+    return (max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2))
+
+
+class EncoderController:
+    def __init__(self, levels, window=5.0, high_load=0.8, low_load=0.3, high_backlog=0.4, recover_windows=6, clock=time.monotonic):
+        self.levels = levels
+        self.window = window  # Seconds of measurements behind each decision
+        self.high_load = high_load  # Share of wall time spent blocked on the pipe that means ffmpeg is too slow
+        self.low_load = low_load  # Share of wall time below which a better level is likely to keep up
+        self.high_backlog = high_backlog  # Average share of pool slots waiting that means ffmpeg is too slow
+        self.recover_windows = recover_windows  # Calm windows in a row before stepping back up
+        self.clock = clock
+        self.level = 0
+        self.decisions = []
+        self._calm = 0
+        self._dropped = None
+        self._reset_window()
+
+    @property
+    def setting(self):
+        """Current (preset step, resolution scale)"""
+        return self.levels[self.level]
+
+    def _reset_window(self):
+        self._window_start = self.clock()
+        self._frames = 0
+        self._write_ns = 0
+        self._backlog = 0.0
+        self._window_dropped = self._dropped
+
+    def record(self, write_ns, backlog, dropped):
+        """Record one encoded frame and return True if the encoder level changed
+
+        write_ns is how long writing the frame to ffmpeg blocked, backlog the share of
+        frame pool slots still waiting for the encoder and dropped the pool's running
+        count of frames dropped because every slot was taken.
+        """
+        if self._dropped is None:
+            self._window_dropped = dropped
+        self._dropped = dropped
+        self._frames += 1
+        self._write_ns += write_ns
+        self._backlog += backlog
+
+        elapsed = self.clock() - self._window_start
+        if elapsed < self.window:
+            return False
+
+        metrics = {
+            "frames": self._frames,
+            "write_load": round(self._write_ns / (elapsed * 1_000_000_000), 3),
+            "backlog": round(self._backlog / self._frames, 3),
+            "drops": dropped - self._window_dropped
+        }
+        self._reset_window()
+
+        if metrics["drops"] > 0:
+            trigger = "drops"
+        elif metrics["write_load"] > self.high_load:
+            trigger = "write_load"
+        elif metrics["backlog"] > self.high_backlog:
+            trigger = "backlog"
+        else:
+            trigger = None
+
+        if trigger:
+            self._calm = 0
+            if self.level + 1 < len(self.levels):
+                return self._change(self.level + 1, trigger, metrics)
+            return False
+
+        if metrics["write_load"] < self.low_load:
+            self._calm += 1
+            if self._calm >= self.recover_windows and self.level > 0:
+                self._calm = 0
+                return self._change(self.level - 1, "headroom", metrics)
+        else:
+            self._calm = 0
+        return False
+
+    def _change(self, level, trigger, metrics):
+        speed, scale = self.levels[level]
+        decision = {
+            "t": time.time(),
+            "from": self.level,
+            "to": level,
+            "preset_step": speed,
+            "scale": scale,
+            "trigger": trigger,
+            **metrics
+        }
+        self.decisions.append(decision)
+        self.level = level
+        logger.info(f"Encoder level {decision['from']} -> {level} ({trigger}): {metrics}")
+        return True
+
+    def stats(self):
+        """Get the current level and every level change with the metrics behind it"""
+        speed, scale = self.setting
+        return {
+            "level": self.level,
+            "preset_step": speed,
+            "scale": scale,
+            "changes": len(self.decisions),
+            "decisions": self.decisions
+        }
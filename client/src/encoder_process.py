@@ -0,0 +1,253 @@
+"""
+Frame conversion and ffmpeg feeding in a separate process
+
+Captured frames are copied into shared memory slots and only the slot index goes
+through a queue, so the child never unpickles pixel data and scaling, Matroska
+framing and pipe writes don't hold the GIL of the process running the input
+listeners and the uploader.
+"""
+import time
+import threading
+import subprocess
+import multiprocessing
+from multiprocessing import shared_memory
+from queue import Queue, Empty
+import numpy as np
+from loguru import logger
+from frame_pool import FrameSlot
+from frame_scaler import FrameScaler
+from mkv_writer import MatroskaFrameWriter
+
+
+class SharedFrameSlot(FrameSlot):
+    """A frame slot whose buffer lives in shared memory the encoder process can read"""
+
+    def __init__(self, index, capacity):
+        super().__init__(index)
+        self.shm = shared_memory.SharedMemory(create=True, size=capacity)
+
+    def fill(self, frame, timestamp_ns):
+        """Copy a captured frame into shared memory"""
+        frame_array = np.asarray(frame)
+        if frame_array.nbytes > self.shm.size:
+            raise ValueError(f"Frame of {frame_array.nbytes} bytes does not fit a {self.shm.size} byte slot")
+
+        self.raw = self.shm.buf[:frame_array.nbytes]
+        np.copyto(np.frombuffer(self.raw, dtype=np.uint8).reshape(frame_array.shape), frame_array)
+        self.height, self.width = frame_array.shape[:2]
+        self.timestamp_ns = timestamp_ns
+        self.uses += 1
+
+    def close(self):
+        """Free the shared memory block"""
+        if isinstance(self.raw, memoryview):
+            self.raw.release()
+        self.raw = bytearray()
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except Exception as e:
+            logger.warning(f"Could not free shared frame slot {self.index}: {e}")
+
+
+class _Encoder:
+    """One ffmpeg process fed by the encoder process"""
+
+    def __init__(self, cmd, input_size, scale_mode, vfr):
+        self.input_size = tuple(input_size)
+        self.scaler = FrameScaler(self.input_size, mode=scale_mode)
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.mkv_writer = MatroskaFrameWriter(self.process.stdin, *self.input_size) if vfr else None
+
+    def write(self, buffer, width, height, timestamp_ns):
+        """Convert a BGRA frame to the piped size and write it to ffmpeg"""
+        frame = np.frombuffer(buffer, dtype=np.uint8, count=width * height * 4).reshape(height, width, 4)
+        if (width, height) != self.input_size:
+            frame = self.scaler.scale(frame)
+        data = memoryview(frame).cast("B")
+
+        if self.mkv_writer:
+            self.mkv_writer.write(data, timestamp_ns)
+        else:
+            self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+
+def _serve(commands, replies, slot_names):
+    """Encoder process main loop"""
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    encoders = {}
+
+    def finish(encoder_id, encoder):
+        replies.put(("closed", encoder_id, encoder.process.wait()))
+
+    while True:
+        command = commands.get()
+        kind, encoder_id = command[0], command[1] if len(command) > 1 else None
+
+        if kind == "stop":
+            break
+
+        try:
+            if kind == "open":
+                _, _, cmd, input_size, scale_mode, vfr = command
+                try:
+                    encoders[encoder_id] = _Encoder(cmd, input_size, scale_mode, vfr)
+                except Exception:
+                    # Nothing to wait for, the segment ends without a file
+                    replies.put(("closed", encoder_id, 1))
+                    raise
+
+            elif kind == "frame":
+                _, _, slot_index, width, height, timestamp_ns = command
+                write_start = time.perf_counter_ns()
+                try:
+                    encoders[encoder_id].write(slots[slot_index].buf, width, height, timestamp_ns)
+                except Exception as e:
+                    # The encoder thread waits for a reply to every frame, failed or not
+                    replies.put(("written", encoder_id, (None, str(e))))
+                else:
+                    replies.put(("written", encoder_id, (time.perf_counter_ns() - write_start, None)))
+
+            elif kind == "close":
+                encoder = encoders.pop(encoder_id)
+                encoder.process.stdin.close()
+                threading.Thread(target=finish, args=(encoder_id, encoder), daemon=True).start()
+
+            elif kind == "kill":
+                encoders.pop(encoder_id).process.kill()
+
+        except Exception as e:
+            replies.put(("error", encoder_id, str(e)))
+
+    for encoder in encoders.values():
+        encoder.process.kill()
+    for slot in slots:
+        slot.close()
+
+
+class RemoteEncoder:
+    """Stands in for the ffmpeg Popen object of a pipeline fed by the encoder process"""
+
+    def __init__(self, owner, encoder_id):
+        self.owner = owner
+        self.encoder_id = encoder_id
+        self.returncode = None
+        self.closed = False
+        self._done = threading.Event()
+
+    @property
+    def stdin(self):
+        # Closing "stdin" finishes the remote ffmpeg like closing a real pipe would
+        return self
+
+    def flush(self):
+        pass
+
+    def write_frame(self, slot, timestamp_ns):
+        """Have the encoder process pipe a slot's frame; returns how long the write took in ns"""
+        return self.owner.write_frame(self.encoder_id, slot, timestamp_ns)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.owner.send(("close", self.encoder_id))
+
+    def wait(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise subprocess.TimeoutExpired(f"encoder {self.encoder_id}", timeout)
+        return self.returncode
+
+    def kill(self):
+        self.closed = True
+        self.owner.send(("kill", self.encoder_id))
+        self._finished(-9)
+
+    def _finished(self, returncode):
+        self.returncode = returncode
+        self._done.set()
+
+
+class EncoderProcess:
+    def __init__(self, slots):
+        # Spawn rather than fork so the child doesn't inherit the parent's threads and listeners
+        context = multiprocessing.get_context("spawn")
+        self._commands = context.Queue()
+        self._replies = context.Queue()
+        self._written = Queue()  # Replies to frame writes, consumed by the encoder thread
+        self._encoders = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.process = context.Process(
+            target=_serve,
+            args=(self._commands, self._replies, [slot.shm.name for slot in slots]),
+            daemon=True
+        )
+        self.process.start()
+
+        self._reply_thread = threading.Thread(target=self._dispatch_replies)
+        self._reply_thread.daemon = True
+        self._reply_thread.start()
+
+    def send(self, command):
+        self._commands.put(command)
+
+    def open(self, cmd, input_size, scale_mode="nearest", vfr=False):
+        """Start an ffmpeg process in the encoder process and return its stand-in"""
+        with self._lock:
+            encoder_id = self._next_id
+            self._next_id += 1
+            encoder = RemoteEncoder(self, encoder_id)
+            self._encoders[encoder_id] = encoder
+
+        self.send(("open", encoder_id, cmd, tuple(input_size), scale_mode, vfr))
+        return encoder
+
+    def write_frame(self, encoder_id, slot, timestamp_ns):
+        """Pipe a slot's frame and wait until the encoder process is done with the slot"""
+        self.send(("frame", encoder_id, slot.index, slot.width, slot.height, timestamp_ns))
+        while True:
+            try:
+                write_ns, error = self._written.get(timeout=1.0)
+                break
+            except Empty:
+                if not self.process.is_alive():
+                    raise RuntimeError(f"Encoder process exited with code {self.process.exitcode}")
+
+        if error:
+            raise RuntimeError(f"Encoder process: {error}")
+        return write_ns
+
+    def _dispatch_replies(self):
+        """Route replies from the encoder process to whoever waits for them"""
+        while True:
+            try:
+                kind, encoder_id, value = self._replies.get()
+            except (EOFError, OSError):
+                break
+            if kind == "stopped":
+                break
+
+            if kind == "written":
+                self._written.put(value)
+            elif kind == "error":
+                logger.error(f"Encoder process error for encoder {encoder_id}: {value}")
+            elif kind == "closed":
+                encoder = self._encoders.pop(encoder_id, None)
+                if encoder:
+                    encoder._finished(value)
+
+    def stop(self):
+        """Shut the encoder process down"""
+        self.send(("stop",))
+        self.process.join(timeout=5.0)
+        if self.process.is_alive():
+            self.process.kill()
+        self._replies.put(("stopped", None, None))
+        self._reply_thread.join(timeout=1.0)
+
+        # ffmpeg processes still running were killed with the encoder process
+        for encoder in list(self._encoders.values()):
+            encoder._finished(-9)
+        self._encoders.clear()
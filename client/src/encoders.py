@@ -0,0 +1,130 @@
+"""
+H.264 encoder profiles and cached detection of which ones this ffmpeg can use
+"""
+import subprocess
+from functools import lru_cache
+from loguru import logger
+
+# Encoder arguments tuned for screen content at roughly libx264 -crf 28 quality.
+# "presets" runs from the default speed/quality trade-off to the fastest one.
+ENCODER_PROFILES = {
+    "h264_nvenc": {
+        "hardware": True,
+        "preset_option": "-preset",
+        "presets": ["p4", "p3", "p2", "p1"],
+        "args": ["-rc", "vbr", "-cq", "28", "-b:v", "0"],
+        "pix_fmt": "yuv420p"
+    },
+    "h264_qsv": {
+        "hardware": True,
+        "preset_option": "-preset",
+        "presets": ["medium", "fast", "faster", "veryfast"],
+        "args": ["-global_quality", "28"],
+        "pix_fmt": "nv12"
+    },
+    "h264_amf": {
+        "hardware": True,
+        "preset_option": "-quality",
+        "presets": ["balanced", "speed"],
+        "args": ["-rc", "cqp", "-qp_i", "28", "-qp_p", "28"],
+        "pix_fmt": "yuv420p"
+    },
+    "libx264": {
+        "hardware": False,
+        "preset_option": "-preset",
+        "presets": ["medium", "faster", "veryfast", "superfast", "ultrafast"],
+        "args": ["-crf", "28"], # 28 for good enough quality, 38 for worst quality but smallest file
+        "pix_fmt": "yuv420p"
+    }
+}
+
+# Best first; libx264 is the CPU fallback that every supported ffmpeg build has
+ENCODER_PRIORITY = ["h264_nvenc", "h264_qsv", "h264_amf", "libx264"]
+FALLBACK_ENCODER = "libx264"
+
+
+def list_encoders(ffmpeg_path):
+    """Get the raw `ffmpeg -encoders` listing, or an empty string on failure"""
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, "-hide_banner", "-encoders"],
+            capture_output=True, text=True, check=True
+        )
+        return result.stdout
+    except Exception as e:
+        logger.warning(f"Could not list ffmpeg encoders: {e}")
+        return ""
+
+
+def parse_encoder_names(listing):
+    """Extract encoder names from an `ffmpeg -encoders` listing"""
+    names = set()
+    in_table = False
+    for line in listing.splitlines():
+        # The flag legend ends with a dashed line, encoders follow
+        if line.strip().startswith("---"):
+            in_table = True
+            continue
+        parts = line.split()
+        # Encoder lines look like " V....D libx264   libx264 H.264 / AVC ..."
+        if in_table and len(parts) >= 2:
+            names.add(parts[1])
+    return frozenset(names)
+
+
+@lru_cache(maxsize=None)
+def probe_encoders(ffmpeg_path):
+    """Encoders compiled into this ffmpeg (probed once per ffmpeg binary)"""
+    return parse_encoder_names(list_encoders(ffmpeg_path))
+
+
+@lru_cache(maxsize=None)
+def encoder_works(ffmpeg_path, name):
+    """Check that an encoder can actually open, e.g. that the GPU behind it exists"""
+    try:
+        result = subprocess.run(
+            [
+                ffmpeg_path, "-hide_banner", "-loglevel", "error",
+                "-f", "lavfi", "-i", "color=black:size=256x256:rate=10",
+                "-frames:v", "1",
+                *encoder_args(name),
+                "-f", "null", "-"
+            ],
+            capture_output=True, text=True, timeout=15
+        )
+        return result.returncode == 0
+    except Exception as e:
+        logger.warning(f"Could not test encoder {name}: {e}")
+        return False
+
+
+def select_encoder(ffmpeg_path, preferred="auto"):
+    """Pick the best usable encoder, falling back to libx264"""
+    available = probe_encoders(ffmpeg_path)
+
+    if preferred != "auto":
+        if preferred in ENCODER_PROFILES and preferred in available:
+            return preferred
+        logger.warning(f"Encoder {preferred} is not available, selecting automatically")
+
+    for name in ENCODER_PRIORITY:
+        if name not in available:
+            continue
+        # Hardware encoders are often compiled in without the hardware to back them
+        if ENCODER_PROFILES[name]["hardware"] and not encoder_works(ffmpeg_path, name):
+            continue
+        return name
+
+    return FALLBACK_ENCODER
+
+
+def preset_count(name):
+    """Number of speed presets an encoder profile can step through"""
+    return len(ENCODER_PROFILES[name]["presets"])
+
+
+def encoder_args(name, speed=0):
+    """ffmpeg output arguments for an encoder profile at a speed step (0 is the default preset)"""
+    profile = ENCODER_PROFILES[name]
+    preset = profile["presets"][min(speed, len(profile["presets"]) - 1)]
+    return ["-c:v", name, profile["preset_option"], preset, *profile["args"], "-pix_fmt", profile["pix_fmt"]]
@@ -0,0 +1,108 @@
+"""
+Append-only journal of input events written while recording
+
+One JSON object per line: a meta line like the one at the top of the old
+events.json, one line per event in the events.json schema, and a final sealed
+line written when logging stops cleanly. Lines are flushed to the OS at least
+every flush_interval seconds, so a crash loses at most that much, and a
+truncated last line is simply skipped when reading. Readers go through the
+file a batch at a time instead of loading it whole.
+
+Events are in the order InputLogger drained them, which is only roughly time
+order: each drained batch is sorted, but an event can land in the batch after
+one with later events.
+"""
+import os
+import json
+import time
+from itertools import islice
+from loguru import logger
+
+JOURNAL_SUFFIX = ".jsonl"
+
+
+class EventJournal:
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.count = 0
+        self.sealed = False
+        self._dirty = False  # Lines written since the last flush
+        self._file = open(path, 'w', encoding='utf-8')
+        self._last_flush = time.monotonic()
+        self._write_line({"meta": {"timestamp": time.time(), "type": "input_events"}})
+        self.flush()
+
+    def _write_line(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def write(self, events):
+        """Append (t_ns, kind, fields) events, flushing if the last flush is flush_interval old
+
+        Meant to be called regularly even with no events, so that lines written
+        earlier still get flushed in time when input goes quiet.
+        """
+        for timestamp_ns, event_type, fields in events:
+            self._write_line({"t": timestamp_ns, "kind": event_type, **fields})
+        self.count += len(events)
+        self._dirty = self._dirty or bool(events)
+
+        if self._dirty and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Hand everything written so far to the OS, where it survives the process crashing"""
+        self._file.flush()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def seal(self):
+        """Mark the journal complete and close it"""
+        if self.sealed:
+            return
+        self._write_line({"sealed": {"events": self.count, "timestamp": time.time()}})
+        self._file.close()
+        self.sealed = True
+
+
+def iter_journal(path):
+    """Events of a journal one at a time, up to the first incomplete line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Only the last line can be cut off by a crash
+                logger.warning(f"Journal {path} ends with an incomplete line {number}")
+                return
+            if "kind" in record:
+                yield record
+
+
+def journal_sealed(path):
+    """Check if logging stopped cleanly, i.e. the journal's last line seals it"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(f.tell() - 4096, 0))
+        lines = f.read().splitlines()
+    try:
+        return bool(lines) and "sealed" in json.loads(lines[-1])
+    except ValueError:
+        return False
+
+
+def iter_event_batches(path, batch_size=10_000):
+    """Lists of at most batch_size events from a journal, or from an events.json written by older versions"""
+    if not path.endswith(JOURNAL_SUFFIX):
+        with open(path, 'r') as f:
+            events = json.load(f).get("events", [])
+        for start in range(0, len(events), batch_size):
+            yield events[start:start + batch_size]
+        return
+
+    events = iter_journal(path)
+    while True:
+        batch = list(islice(events, batch_size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,109 @@
+"""
+Fixed pool of reusable frame buffers shared by the capture and encoder threads
+"""
+import time
+import threading
+from queue import Queue, Empty
+import numpy as np
+
+
+class FrameSlot:
+    """A preallocated BGRA frame buffer that can stand in for an mss screenshot"""
+
+    def __init__(self, index):
+        self.index = index
+        self.raw = bytearray()
+        self.width = 0
+        self.height = 0
+        self.timestamp_ns = 0
+        self.uses = 0
+
+    @property
+    def __array_interface__(self):
+        """Numpy array interface over the raw BGRA buffer (same layout as mss)"""
+        return {
+            "version": 3,
+            "shape": (self.height, self.width, 4),
+            "typestr": "|u1",
+            "data": self.raw,
+        }
+
+    def fill(self, frame, timestamp_ns):
+        """Copy a captured frame (mss screenshot or BGRA array) into this slot's buffer"""
+        frame_array = np.asarray(frame)
+        if len(self.raw) != frame_array.nbytes:
+            # Only happens on the first use or when the capture size changes
+            self.raw = bytearray(frame_array.nbytes)
+
+        np.copyto(np.frombuffer(self.raw, dtype=np.uint8).reshape(frame_array.shape), frame_array)
+        self.height, self.width = frame_array.shape[:2]
+        self.timestamp_ns = timestamp_ns
+        self.uses += 1
+
+
+class FramePool:
+    def __init__(self, depth=2, late_after_ns=None, slot_factory=FrameSlot):
+        if depth < 1:
+            raise ValueError(f"Frame pool depth must be at least 1, got {depth}")
+
+        self.depth = depth
+        self.late_after_ns = late_after_ns
+        self.slots = [slot_factory(i) for i in range(depth)]
+        self._free = Queue()
+        self._ready = Queue()
+        for slot in self.slots:
+            self._free.put(slot)
+
+        self.lock = threading.Lock()
+        self.dropped = 0  # Frames skipped because every slot was in use
+        self.reused = 0   # Frames written into a slot that already held a frame
+        self.late = 0     # Frames that waited longer than late_after_ns to be encoded
+
+    def acquire(self, block=False, timeout=None):
+        """Take a free slot for the capture thread, or None if the pool is exhausted"""
+        try:
+            slot = self._free.get(block=block, timeout=timeout)
+        except Empty:
+            with self.lock:
+                self.dropped += 1
+            return None
+
+        if slot.uses:
+            with self.lock:
+                self.reused += 1
+        return slot
+
+    def put(self, slot):
+        """Hand a filled slot over to the encoder"""
+        self._ready.put(slot)
+
+    def get(self, timeout=None):
+        """Wait for the next filled slot; raises queue.Empty on timeout"""
+        slot = self._ready.get(timeout=timeout)
+
+        if self.late_after_ns is not None and time.perf_counter_ns() - slot.timestamp_ns > self.late_after_ns:
+            with self.lock:
+                self.late += 1
+        return slot
+
+    def release(self, slot):
+        """Return a slot to the pool once the encoder is done with it"""
+        self._free.put(slot)
+
+    def empty(self):
+        """Check if there are no filled slots waiting to be encoded"""
+        return self._ready.empty()
+
+    def occupancy(self):
+        """Share of the slots filled and waiting for the encoder"""
+        return self._ready.qsize() / self.depth
+
+    def stats(self):
+        """Get the pool counters"""
+        with self.lock:
+            return {
+                "depth": self.depth,
+                "dropped": self.dropped,
+                "reused": self.reused,
+                "late": self.late
+            }
@@ -0,0 +1,181 @@
+"""
+Shared memory ring of captured frames that other processes read without pickling
+
+The capture process publishes every frame into the next of a fixed number of
+slots, each stamped with a sequence number and the capture timestamp. Readers
+attach by name and either follow the frames in order or just take the latest
+one. The writer never waits for readers, so a reader that falls more than the
+ring size behind skips ahead and counts the frames it missed.
+
+Each slot is guarded like a seqlock: its sequence number is cleared while the
+writer copies a frame in, and a reader only keeps a copy if the number was the
+same before and after copying.
+"""
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from loguru import logger
+
+# Newest sequence number, slot count and slot capacity in bytes
+HEADER = np.dtype([("head", "<i8"), ("slots", "<i8"), ("capacity", "<i8")])
+
+# Per-slot metadata; seq is -1 while the slot is empty or being written
+SLOT = np.dtype([("seq", "<i8"), ("timestamp_ns", "<i8"), ("width", "<i4"), ("height", "<i4")])
+
+ALIGNMENT = 64
+
+
+def _layout(slots):
+    """Offsets of the slot metadata and the first slot's pixels"""
+    meta_offset = HEADER.itemsize
+    data_offset = meta_offset + SLOT.itemsize * slots
+    return meta_offset, -(-data_offset // ALIGNMENT) * ALIGNMENT
+
+
+class _RingView:
+    """Numpy views over a ring's shared memory block"""
+
+    def _attach(self, shm):
+        self.shm = shm
+        self._header = np.ndarray((), dtype=HEADER, buffer=shm.buf)
+        slots, capacity = int(self._header["slots"]), int(self._header["capacity"])
+        meta_offset, data_offset = _layout(slots)
+        self._meta = np.ndarray((slots,), dtype=SLOT, buffer=shm.buf, offset=meta_offset)
+        self._data = np.ndarray((slots, capacity), dtype=np.uint8, buffer=shm.buf, offset=data_offset)
+        self._seq = self._meta["seq"]
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def slots(self):
+        return len(self._seq)
+
+    @property
+    def capacity(self):
+        return self._data.shape[1]
+
+    @property
+    def head(self):
+        """Sequence number of the newest frame, -1 before the first one"""
+        return int(self._header["head"])
+
+    def _detach(self):
+        # Views keep the buffer exported, which would make closing it fail
+        del self._header, self._meta, self._data, self._seq
+        self.shm.close()
+
+
+class FrameRing(_RingView):
+    """Writer side of the ring, owned by the capture process"""
+
+    def __init__(self, slots, capacity):
+        if slots < 1:
+            raise ValueError(f"Frame ring needs at least 1 slot, got {slots}")
+
+        _, data_offset = _layout(slots)
+        shm = shared_memory.SharedMemory(create=True, size=data_offset + slots * capacity)
+        header = np.ndarray((), dtype=HEADER, buffer=shm.buf)
+        header["head"], header["slots"], header["capacity"] = -1, slots, capacity
+        del header
+
+        self._attach(shm)
+        self._seq[:] = -1
+        self.written = 0
+
+    @classmethod
+    def for_size(cls, slots, width, height):
+        """Ring with slots for BGRA frames of the given size"""
+        return cls(slots, width * height * 4)
+
+    def write(self, frame, timestamp_ns):
+        """Publish a frame (mss screenshot or BGRA array) and return its sequence number"""
+        frame_array = np.asarray(frame)
+        if frame_array.nbytes > self.capacity:
+            raise ValueError(f"Frame of {frame_array.nbytes} bytes does not fit a {self.capacity} byte slot")
+
+        seq = self.head + 1
+        index = seq % self.slots
+        self._seq[index] = -1  # Readers of the previous frame in this slot must discard their copy
+        self._data[index, :frame_array.nbytes].reshape(frame_array.shape)[...] = frame_array
+        self._meta[index] = (-1, timestamp_ns, frame_array.shape[1], frame_array.shape[0])
+        self._seq[index] = seq
+        self._header["head"] = seq
+        self.written += 1
+        return seq
+
+    def close(self):
+        """Free the shared memory; attached readers keep their mapping until they close"""
+        try:
+            self._detach()
+            self.shm.unlink()
+        except Exception as e:
+            logger.warning(f"Could not free frame ring {self.shm.name}: {e}")
+
+
+class FrameRingReader(_RingView):
+    """Reader side of the ring, attached by name from any process"""
+
+    def __init__(self, name):
+        self._attach(shared_memory.SharedMemory(name=name))
+        self.next_seq = max(self.head, 0)  # Start with the newest frame
+        self.overruns = 0  # Frames overwritten before this reader got to them
+
+    def read(self, seq):
+        """Copy of frame seq as (timestamp_ns, BGRA array), or None if it isn't in the ring"""
+        index = seq % self.slots
+        if self._seq[index] != seq:
+            return None
+
+        _, timestamp_ns, width, height = self._meta[index].item()
+        frame = self._data[index, :width * height * 4].reshape(height, width, 4).copy()
+
+        # The writer reused the slot while we were copying
+        if self._seq[index] != seq:
+            return None
+        return timestamp_ns, frame
+
+    def latest(self):
+        """Newest frame as (seq, timestamp_ns, BGRA array), or None if there is none yet"""
+        for _ in range(self.slots):
+            seq = self.head
+            if seq < 0:
+                return None
+            frame = self.read(seq)
+            if frame:
+                return (seq, *frame)
+        return None
+
+    def next(self, timeout=None, poll_interval=0.001):
+        """Next frame in order as (seq, timestamp_ns, BGRA array), or None on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            head = self.head
+            if head >= self.next_seq:
+                # Skip frames that were overwritten already
+                oldest = head - self.slots + 1
+                if self.next_seq < oldest:
+                    self.overruns += oldest - self.next_seq
+                    self.next_seq = oldest
+
+                seq = self.next_seq
+                frame = self.read(seq)
+                if frame:
+                    self.next_seq = seq + 1
+                    return (seq, *frame)
+
+                # Overwritten while copying; count it and move on
+                self.overruns += 1
+                self.next_seq = seq + 1
+                continue
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def close(self):
+        try:
+            self._detach()
+        except Exception as e:
+            logger.warning(f"Could not detach from frame ring {self.shm.name}: {e}")
@@ -0,0 +1,120 @@
+"""
+Letterboxing BGRA frame scaler with precomputed index maps and reusable buffers
+"""
+import numpy as np
+
+SCALE_MODES = ("nearest", "box2x", "area")
+
+
+def _letterbox(source_size, target_size):
+    """Get the scaled size and centering offsets that preserve the aspect ratio"""
+    src_width, src_height = source_size
+    width, height = target_size
+
+    h_scale = height / src_height
+    w_scale = width / src_width
+
+    if h_scale < w_scale:
+        new_height = height
+        new_width = int(src_width * h_scale)
+    else:
+        new_width = width
+        new_height = int(src_height * w_scale)
+
+    x_offset = (width - new_width) // 2
+    y_offset = (height - new_height) // 2
+    return new_width, new_height, x_offset, y_offset
+
+
+def _nearest_indices(new_size, src_size):
+    """Source index for each output pixel along one axis"""
+    # Integer arithmetic avoids float rounding landing on the previous pixel
+    return np.arange(new_size, dtype=np.intp) * src_size // new_size
+
+
+class FrameScaler:
+    def __init__(self, target_size, mode="nearest"):
+        if mode not in SCALE_MODES:
+            raise ValueError(f"Unknown scale mode: {mode}")
+
+        self.target_size = tuple(target_size)
+        self.mode = mode
+        self.source_size = None
+
+        # Output frame, allocated once so the letterbox border stays black
+        width, height = self.target_size
+        self.output = np.zeros((height, width, 4), dtype=np.uint8)
+        self._view = None
+
+    def _prepare(self, source_size):
+        """Compute index maps and scratch buffers for a new source size"""
+        self.source_size = source_size
+        src_width, src_height = source_size
+
+        new_width, new_height, x_offset, y_offset = _letterbox(source_size, self.target_size)
+        self.output.fill(0)
+        self._view = self.output[y_offset:y_offset+new_height, x_offset:x_offset+new_width]
+
+        if self.mode == "box2x" and src_width >= 2 * new_width and src_height >= 2 * new_height:
+            # Average 2x2 blocks first, then pick nearest pixels from the half-size frame
+            half_width, half_height = src_width // 2, src_height // 2
+            self._accum = np.empty((half_height, half_width, 4), dtype=np.uint16)
+            self._half = np.empty((half_height, half_width, 4), dtype=np.uint8)
+            src_width, src_height = half_width, half_height
+            self._scale = self._scale_box2x
+        elif self.mode == "area":
+            self._y_starts, y_counts = self._area_bins(new_height, src_height)
+            self._x_starts, x_counts = self._area_bins(new_width, src_width)
+            self._counts = (y_counts[:, None] * x_counts[None, :])[:, :, None]
+            self._row_sums = np.empty((new_height, src_width, 4), dtype=np.uint32)
+            self._sums = np.empty((new_height, new_width, 4), dtype=np.uint32)
+            self._scale = self._scale_area
+            return
+        else:
+            # box2x falls back to nearest when the frame isn't being halved
+            self._scale = self._scale_nearest
+
+        self._indices_y = _nearest_indices(new_height, src_height)
+        self._indices_x = _nearest_indices(new_width, src_width)
+        self._rows = np.empty((new_height, src_width, 4), dtype=np.uint8)
+
+    @staticmethod
+    def _area_bins(new_size, src_size):
+        """Start index and pixel count of the source span averaged into each output pixel"""
+        starts = _nearest_indices(new_size, src_size)
+        ends = np.append(starts[1:], src_size)
+        # Upscaled pixels share a start; reduceat then returns the single source pixel
+        counts = np.maximum(ends - starts, 1).astype(np.uint32)
+        return starts, counts
+
+    def scale(self, frame_array):
+        """Scale a BGRA frame into the output buffer and return the buffer"""
+        source_size = (frame_array.shape[1], frame_array.shape[0])
+        if source_size != self.source_size:
+            self._prepare(source_size)
+
+        self._scale(frame_array)
+        return self.output
+
+    def _scale_nearest(self, frame_array):
+        np.take(frame_array, self._indices_y, axis=0, out=self._rows, mode="clip")
+        np.take(self._rows, self._indices_x, axis=1, out=self._view, mode="clip")
+
+    def _scale_box2x(self, frame_array):
+        half_height, half_width = self._half.shape[:2]
+        even_rows = frame_array[0:half_height*2:2]
+        odd_rows = frame_array[1:half_height*2:2]
+
+        np.add(even_rows[:, 0:half_width*2:2], even_rows[:, 1:half_width*2:2], out=self._accum, dtype=np.uint16)
+        np.add(self._accum, odd_rows[:, 0:half_width*2:2], out=self._accum)
+        np.add(self._accum, odd_rows[:, 1:half_width*2:2], out=self._accum)
+        np.right_shift(self._accum, 2, out=self._accum)
+        np.copyto(self._half, self._accum, casting="unsafe")
+
+        self._scale_nearest(self._half)
+
+    def _scale_area(self, frame_array):
+        np.add.reduceat(frame_array, self._y_starts, axis=0, dtype=np.uint32, out=self._row_sums)
+        np.add.reduceat(self._row_sums, self._x_starts, axis=1, out=self._sums)
+        np.floor_divide(self._sums, self._counts, out=self._sums)
+        np.copyto(self._view, self._sums, casting="unsafe")
@@ -0,0 +1,73 @@
+"""
+Deadline-based frame pacing for the capture loop
+"""
+import math
+import time
+
+SCHEDULE_POLICIES = ("drop", "catch_up")
+
+
+class FrameScheduler:
+    def __init__(self, interval, policy="drop", max_backlog=10, clock=time.perf_counter_ns, sleep=time.sleep):
+        if policy not in SCHEDULE_POLICIES:
+            raise ValueError(f"Unknown schedule policy: {policy}")
+
+        self.interval_ns = int(interval * 1_000_000_000)
+        self.policy = policy
+        self.max_backlog = max_backlog  # Frames catch_up may fall behind before dropping them
+        self.clock = clock
+        self.sleep = sleep
+        self.start()
+
+    def start(self):
+        """Anchor the schedule at the current time"""
+        self._start_ns = self.clock()
+        self._index = 0
+        self.frames = 0
+        self.dropped = 0  # Deadlines skipped because capture fell a whole interval behind
+        self.late = 0     # Frames that started more than half an interval after their deadline
+        self.max_lateness_ns = 0
+        self._lateness_mean = 0.0
+        self._lateness_m2 = 0.0
+
+    def wait(self):
+        """Sleep until the next frame deadline and return that deadline in perf_counter_ns"""
+        deadline = self._start_ns + self._index * self.interval_ns
+        now = self.clock()
+        if now < deadline:
+            self.sleep((deadline - now) / 1_000_000_000)
+            now = self.clock()
+
+        # Deadlines are absolute, so time spent grabbing never pushes the schedule back
+        missed = (now - deadline) // self.interval_ns
+        if missed > 0 and (self.policy == "drop" or missed > self.max_backlog):
+            self.dropped += missed
+            self._index += missed
+            deadline += missed * self.interval_ns
+
+        self._record(now - deadline)
+        self._index += 1
+        return deadline
+
+    def _record(self, lateness_ns):
+        """Track lateness statistics (Welford's running variance for jitter)"""
+        self.frames += 1
+        if lateness_ns > self.interval_ns // 2:
+            self.late += 1
+        self.max_lateness_ns = max(self.max_lateness_ns, lateness_ns)
+
+        delta = lateness_ns - self._lateness_mean
+        self._lateness_mean += delta / self.frames
+        self._lateness_m2 += delta * (lateness_ns - self._lateness_mean)
+
+    def stats(self):
+        """Get frame pacing statistics in milliseconds"""
+        jitter = math.sqrt(self._lateness_m2 / self.frames) if self.frames else 0.0
+        return {
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "late": self.late,
+            "mean_lateness_ms": round(self._lateness_mean / 1_000_000, 3),
+            "max_lateness_ms": round(self.max_lateness_ns / 1_000_000, 3),
+            "jitter_ms": round(jitter / 1_000_000, 3)
+        }
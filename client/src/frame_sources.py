@@ -0,0 +1,451 @@
+"""
+Where captured frames come from: the screen through mss or X11 shared memory, a replayed video file or synthetic content
+
+A frame source lists the monitors once when it is created, in mss's layout
+(index 0 the whole virtual desktop, then every physical monitor) and can be
+shared by every pipeline of a recording. Each capture thread opens its own
+grabber from it, a context manager whose grab(region) returns a BGRA frame
+(an mss screenshot or a numpy array). A grabbed frame is only valid until the
+next grab from the same grabber; the pipeline copies it into a frame slot.
+
+Sources are selected at runtime by name, with an optional argument after a
+colon ("synthetic:noise", "replay:recording.mp4"), or by the GACE_FRAME_SOURCE
+environment variable so the whole app can run headless for load tests.
+"""
+import os
+import re
+import math
+import sys
+import time
+import shutil
+import ctypes
+import ctypes.util
+import subprocess
+from abc import ABC, abstractmethod
+import mss
+import numpy as np
+from loguru import logger
+from cursor_track import cursor_position
+
+# Environment variable selecting the frame source when none is passed in
+FRAME_SOURCE_ENV = "GACE_FRAME_SOURCE"
+
+
+def _single_monitor(width, height):
+    """mss style monitor list of a desktop with one monitor of the given size"""
+    monitor = {"left": 0, "top": 0, "width": width, "height": height}
+    return [dict(monitor), dict(monitor)]
+
+
+def _crop(frame, region, monitors):
+    """Cut a desktop region out of a frame covering the whole virtual desktop"""
+    left = region["left"] - monitors[0]["left"]
+    top = region["top"] - monitors[0]["top"]
+    view = frame[top:top + region["height"], left:left + region["width"]]
+    return view if view.flags.c_contiguous else np.ascontiguousarray(view)
+
+
+class FrameSource(ABC):
+    """A source of screen frames; subclasses set monitors and implement grab()"""
+
+    name = None
+
+    def __init__(self, monitors):
+        self.monitors = monitors
+
+    def open(self):
+        """Grabber for the calling thread, to be used as a context manager"""
+        return _Grabber(self)
+
+    @abstractmethod
+    def grab(self, region, state):
+        """Frame of a desktop region; state is a dict the grabber keeps between grabs"""
+
+    def close_grabber(self, state):
+        """Free whatever grab() kept in a grabber's state"""
+
+    def cursor_position(self):
+        """Pointer position in desktop coordinates, or None if there is no pointer"""
+        return cursor_position()
+
+
+class _Grabber:
+    """Per-thread handle on a FrameSource with the same interface as an mss instance"""
+
+    def __init__(self, source):
+        self.source = source
+        self.state = {}
+
+    def grab(self, region):
+        return self.source.grab(region, self.state)
+
+    def close(self):
+        self.source.close_grabber(self.state)
+        self.state = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class MssSource(FrameSource):
+    """The screen through mss, on every platform"""
+
+    name = "mss"
+
+    def __init__(self):
+        with mss.mss() as sct:
+            super().__init__(sct.monitors)
+
+    def open(self):
+        # mss keeps per-thread handles, so every capture thread gets its own instance,
+        # used directly rather than through grab()
+        return mss.mss()
+
+    def grab(self, region, state):
+        if "sct" not in state:
+            state["sct"] = mss.mss()
+        return state["sct"].grab(region)
+
+    def close_grabber(self, state):
+        if "sct" in state:
+            state["sct"].close()
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int)
+    ]
+
+
+class _XImage(ctypes.Structure):
+    # Only the leading fields are read; the structure continues with function pointers
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int)
+    ]
+
+
+class XShmSource(MssSource):
+    """The X11 screen read through the MIT shared memory extension
+
+    The X server writes each grab straight into memory shared with this process,
+    where mss has it sent through the X socket and copied on the way. Monitors are
+    still listed through mss.
+    """
+
+    name = "xshm"
+
+    IPC_PRIVATE = 0
+    IPC_CREAT = 0o1000
+    IPC_RMID = 0
+    Z_PIXMAP = 2
+    ALL_PLANES = ctypes.c_ulong(~0 & (2 ** (8 * ctypes.sizeof(ctypes.c_ulong)) - 1))
+
+    def __init__(self):
+        if not sys.platform.startswith("linux") or not os.environ.get("DISPLAY"):
+            raise RuntimeError("The xshm frame source needs an X11 display")
+        self.xlib = self._load("X11")
+        self.xext = self._load("Xext")
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self._declare()
+        super().__init__()
+
+    @staticmethod
+    def _load(name):
+        path = ctypes.util.find_library(name)
+        if not path:
+            raise RuntimeError(f"lib{name} not found, needed by the xshm frame source")
+        return ctypes.CDLL(path)
+
+    def _declare(self):
+        """Argument and result types of the Xlib, XShm and System V calls used"""
+        xlib, xext, libc = self.xlib, self.xext, self.libc
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultVisual.restype = ctypes.c_void_p
+        xlib.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XFree.argtypes = [ctypes.c_void_p]
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmCreateImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p,
+            ctypes.POINTER(_XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint
+        ]
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage), ctypes.c_int, ctypes.c_int, ctypes.c_ulong
+        ]
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    def open(self):
+        return _Grabber(self)
+
+    def _attach(self, state):
+        """Open a display connection and one shared segment big enough for the whole desktop"""
+        display = self.xlib.XOpenDisplay(None)
+        if not display:
+            raise RuntimeError("Can't open the X11 display")
+        if not self.xext.XShmQueryExtension(display):
+            self.xlib.XCloseDisplay(display)
+            raise RuntimeError("The X server has no MIT-SHM extension")
+
+        desktop = self.monitors[0]
+        info = _XShmSegmentInfo()
+        info.shmid = self.libc.shmget(self.IPC_PRIVATE, desktop["width"] * desktop["height"] * 4, self.IPC_CREAT | 0o600)
+        if info.shmid < 0:
+            self.xlib.XCloseDisplay(display)
+            raise OSError(ctypes.get_errno(), "shmget failed")
+        info.shmaddr = self.libc.shmat(info.shmid, None, 0)
+        info.readOnly = 0
+        self.xext.XShmAttach(display, ctypes.byref(info))
+        self.xlib.XSync(display, 0)
+        # Marked for removal now so the segment goes away with the last process detaching from it
+        self.libc.shmctl(info.shmid, self.IPC_RMID, None)
+
+        screen = self.xlib.XDefaultScreen(display)
+        state.update(
+            display=display,
+            root=self.xlib.XDefaultRootWindow(display),
+            visual=self.xlib.XDefaultVisual(display, screen),
+            depth=self.xlib.XDefaultDepth(display, screen),
+            info=info,
+            images={}  # (width, height) -> XImage header over the shared segment
+        )
+        logger.info(f"Attached {desktop['width']}x{desktop['height']} X11 shared memory segment")
+
+    def grab(self, region, state):
+        if not state:
+            self._attach(state)
+
+        size = (region["width"], region["height"])
+        image = state["images"].get(size)
+        if image is None:
+            image = self.xext.XShmCreateImage(
+                state["display"], state["visual"], state["depth"], self.Z_PIXMAP, None,
+                ctypes.byref(state["info"]), size[0], size[1]
+            )
+            if not image or image.contents.bits_per_pixel != 32:
+                raise RuntimeError(f"The xshm frame source needs a 32 bit visual, got depth {state['depth']}")
+            image.contents.data = state["info"].shmaddr
+            state["images"][size] = image
+
+        if not self.xext.XShmGetImage(state["display"], state["root"], image, region["left"], region["top"], self.ALL_PLANES):
+            raise RuntimeError(f"XShmGetImage failed for {region}")
+
+        stride = image.contents.bytes_per_line
+        buffer = (ctypes.c_ubyte * (stride * size[1])).from_address(state["info"].shmaddr)
+        frame = np.frombuffer(buffer, dtype=np.uint8).reshape(size[1], stride // 4, 4)
+        return frame if stride == size[0] * 4 else np.ascontiguousarray(frame[:, :size[0]])
+
+    def close_grabber(self, state):
+        if not state:
+            return
+        display, info = state["display"], state["info"]
+        for image in state["images"].values():
+            # The data belongs to the shared segment, only free the header
+            image.contents.data = None
+            self.xlib.XFree(image)
+        self.xext.XShmDetach(display, ctypes.byref(info))
+        self.xlib.XCloseDisplay(display)
+        self.libc.shmdt(info.shmaddr)
+
+
+class SyntheticSource(FrameSource):
+    """Generated screen content changing rate times per second, for headless load tests
+
+    Patterns: "static" (one frame, like an idle desktop), "scrolling" (lines of
+    text-like glyphs scrolling up) and "noise" (random pixels, the worst case for
+    the encoder). Frames are generated on the first grab, and every grabber starts
+    at the first frame.
+    """
+
+    name = "synthetic"
+    PATTERNS = ("static", "scrolling", "noise")
+
+    LINE_HEIGHT = 18
+    SCROLL_SPEED = 6  # Rows per frame
+    NOISE_FRAMES = 8
+
+    def __init__(self, pattern="scrolling", width=1920, height=1080, rate=30, clock=time.perf_counter):
+        if pattern not in self.PATTERNS:
+            raise ValueError(f"Unknown synthetic pattern {pattern}, expected one of {', '.join(self.PATTERNS)}")
+        super().__init__(_single_monitor(width, height))
+        self.pattern = pattern
+        self.width = width
+        self.height = height
+        self.rate = rate
+        self.clock = clock
+        self.frames = None  # Full frames, or for scrolling one page three screens high
+
+    def _generate(self):
+        rng = np.random.default_rng(0)
+        if self.pattern == "scrolling":
+            return [self._text_page(rng, self.width, self.height * 3)]
+        count = self.NOISE_FRAMES if self.pattern == "noise" else 1
+        return [rng.integers(0, 256, (self.height, self.width, 4), dtype=np.uint8) for _ in range(count)]
+
+    def _text_page(self, rng, width, height):
+        """Words of dark glyph blocks with gaps in between on a light background"""
+        page = np.full((height, width, 4), 245, dtype=np.uint8)
+        for top in range(4, height - self.LINE_HEIGHT, self.LINE_HEIGHT):
+            x = 10
+            while x < width - 20:
+                glyph_width = int(rng.integers(5, 10))
+                if rng.random() > 0.15:
+                    page[top:top + 12, x:x + glyph_width, :3] = rng.integers(0, 80)
+                x += glyph_width + 2
+        return page
+
+    def frame(self, index):
+        """Full frame number index"""
+        if self.frames is None:
+            self.frames = self._generate()
+        if self.pattern == "scrolling":
+            # Row slices of a C-contiguous page are contiguous, so no copy is made here
+            page = self.frames[0]
+            offset = index * self.SCROLL_SPEED % (page.shape[0] - self.height)
+            return page[offset:offset + self.height]
+        return self.frames[index % len(self.frames)]
+
+    def grab(self, region, state):
+        start = state.setdefault("start", self.clock())
+        frame = self.frame(int((self.clock() - start) * self.rate))
+        return _crop(frame, region, self.monitors)
+
+    def cursor_position(self):
+        # Circles around the middle of the screen every four seconds
+        angle = self.clock() * math.pi / 2
+        radius = min(self.width, self.height) // 3
+        return self.width // 2 + int(radius * math.cos(angle)), self.height // 2 + int(radius * math.sin(angle))
+
+
+class ReplaySource(FrameSource):
+    """A video file decoded by ffmpeg and played back as the screen, rate frames per second
+
+    The file's frames are shown one after another at rate regardless of their own
+    timing, skipping frames when grabs come less often, and looping at the end.
+    Every grabber starts its own decoder at the beginning of the file.
+    """
+
+    name = "replay"
+
+    def __init__(self, path, width=None, height=None, rate=30, loop=True, clock=time.perf_counter):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Video to replay not found: {path}")
+        self.ffmpeg_path = shutil.which("ffmpeg")
+        if not self.ffmpeg_path:
+            raise RuntimeError("FFmpeg not found! Please install FFmpeg and make sure it's in your PATH.")
+        self.path = path
+        if not (width and height):
+            width, height = self._probe_size()
+        super().__init__(_single_monitor(width, height))
+        self.width = width
+        self.height = height
+        self.rate = rate
+        self.loop = loop
+        self.clock = clock
+        logger.info(f"Replaying {path} at {width}x{height}, {rate} fps")
+
+    def _probe_size(self):
+        """Size of the first video stream, read from ffmpeg's description of the input"""
+        result = subprocess.run([self.ffmpeg_path, "-hide_banner", "-i", self.path], capture_output=True, text=True)
+        match = re.search(r"Stream #.*Video:.*?\b(\d{2,5})x(\d{2,5})\b", result.stderr)
+        if not match:
+            raise ValueError(f"No video stream found in {self.path}")
+        return int(match.group(1)), int(match.group(2))
+
+    def _start_decoder(self):
+        command = [self.ffmpeg_path, "-v", "error"]
+        if self.loop:
+            command += ["-stream_loop", "-1"]
+        command += [
+            "-i", self.path,
+            "-vf", f"scale={self.width}:{self.height}",
+            "-f", "rawvideo", "-pix_fmt", "bgra", "-"
+        ]
+        return subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE)
+
+    def grab(self, region, state):
+        if not state:
+            state.update(decoder=self._start_decoder(), start=self.clock(), index=-1,
+                         frame=np.zeros((self.height, self.width, 4), dtype=np.uint8))
+
+        # Decode up to the frame due now; past the end of the file the last frame stays on screen
+        target = int((self.clock() - state["start"]) * self.rate)
+        frame_bytes = self.width * self.height * 4
+        while state["index"] < target:
+            data = state["decoder"].stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            state["frame"] = np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 4)
+            state["index"] += 1
+        return _crop(state["frame"], region, self.monitors)
+
+    def cursor_position(self):
+        # Recorded videos have no separate pointer
+        return None
+
+    def close_grabber(self, state):
+        if not state:
+            return
+        decoder = state["decoder"]
+        decoder.kill()
+        decoder.stdout.close()
+        decoder.wait()
+
+
+FRAME_SOURCES = {
+    MssSource.name: MssSource,
+    XShmSource.name: XShmSource,
+    SyntheticSource.name: SyntheticSource,
+    ReplaySource.name: ReplaySource
+}
+
+
+def open_frame_source(source=None, **options):
+    """Create a frame source from a name like "synthetic:noise" or "replay:path.mp4"
+
+    Anything but a name is taken to be a frame source already and returned as is, so
+    pipelines can share one; None picks the source named by GACE_FRAME_SOURCE, or mss.
+    The text after the colon is the first argument of the source class, options are
+    passed on as keyword arguments.
+    """
+    if source is not None and not isinstance(source, str):
+        return source
+
+    spec = source or os.environ.get(FRAME_SOURCE_ENV) or MssSource.name
+    name, _, argument = spec.partition(":")
+    if name not in FRAME_SOURCES:
+        raise ValueError(f"Unknown frame source {name}, expected one of {', '.join(FRAME_SOURCES)}")
+
+    frame_source = FRAME_SOURCES[name](argument, **options) if argument else FRAME_SOURCES[name](**options)
+    if name != MssSource.name:
+        logger.info(f"Using frame source {spec}")
+    return frame_source
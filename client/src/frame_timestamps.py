@@ -0,0 +1,59 @@
+"""
+Binary sidecar holding the capture timestamp of every frame piped to the encoder
+
+Layout: the 8-byte header b"GFTS" + uint32 version, then one little-endian int64 per
+frame with its capture time in nanoseconds relative to timing.START_TIME_NS.
+"""
+import sys
+import struct
+from array import array
+from bisect import bisect_right
+
+MAGIC = b"GFTS"
+VERSION = 1
+HEADER = struct.Struct("<4sI")
+
+
+class FrameTimestampWriter:
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION))
+        self._record = struct.Struct("<q")
+
+    def append(self, timestamp_ns):
+        """Record the timestamp of the next frame"""
+        self._file.write(self._record.pack(timestamp_ns))
+        self.count += 1
+
+    def flush(self):
+        """Push recorded timestamps to disk so they survive the process being killed"""
+        self._file.flush()
+
+    def close(self):
+        """Flush and close the sidecar file"""
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_frame_timestamps(path):
+    """Load a sidecar file into an array of int64 nanosecond timestamps"""
+    with open(path, 'rb') as f:
+        magic, version = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a frame timestamp file: {path}")
+        data = f.read()
+
+    # A crash can leave a partially written record at the end
+    timestamps = array('q')
+    timestamps.frombytes(data[:len(data) - len(data) % timestamps.itemsize])
+
+    if sys.byteorder == "big":
+        timestamps.byteswap()  # Stored little-endian
+    return timestamps
+
+
+def frame_index_at(timestamps, timestamp_ns):
+    """Index of the frame on screen at timestamp_ns (the last frame captured at or before it)"""
+    return max(bisect_right(timestamps, timestamp_ns) - 1, 0)
@@ -1,22 +1,38 @@
 import os
 import time
-import json
 import threading
 import tempfile
+from collections import deque
 from pynput import mouse, keyboard
 from loguru import logger
 from timing import get_timestamp_ns
+from event_store import EventStore
+from event_journal import EventJournal, JOURNAL_SUFFIX
+
+# Events worth seeking to in the video; key presses only when they start a burst of typing
+SIGNIFICANT_EVENTS = {"mouse_down", "drag_end"}
+KEY_BURST_GAP_NS = 1_000_000_000
+
+# Seconds between moves of events from the listeners' buffers into the event store
+DRAIN_INTERVAL = 0.05
 
 class InputLogger:
     def __init__(self):
         self.running = False
-        self.events = []
+        self._events = EventStore()
         self.mouse_listener = None
         self.keyboard_listener = None
         self.output_dir = os.path.join(os.environ.get('APPDATA', tempfile.gettempdir()), 'GAce')
         os.makedirs(self.output_dir, exist_ok=True)
         self.output_file = None
-        self.lock = threading.Lock()
+        self.journal = None
+        self.lock = threading.Lock()  # Guards the event store and journal; never taken on the listener threads
+        
+        # Listener callbacks only append (t_ns, kind, fields) to their own buffer, which can't block;
+        # a drainer thread moves them into the event store. Blocked low-level hooks lag all input on Windows.
+        self._pending = {"mouse": deque(), "keyboard": deque()}
+        self._drainer = None
+        self._drain_stop = threading.Event()
         self.drag_state = {
             'left': False,
             'right': False,
@@ -25,6 +41,11 @@ class InputLogger:
             'start_y': 0,
             'start_time': 0
         }
+        
+        # Called with (t_ns, kind) for clicks, drag ends and the first key of a burst,
+        # e.g. ScreenCapture.request_keyframe; runs on the listener threads
+        self.on_significant_event = None
+        self._last_key_ns = None
     
     def start(self):
         """Start recording input events"""
@@ -32,12 +53,21 @@ class InputLogger:
             return
         
         self.running = True
-        self.output_file = os.path.join(self.output_dir, f"events_{int(time.time())}.json")
+        self.output_file = os.path.join(self.output_dir, f"events_{int(time.time())}{JOURNAL_SUFFIX}")
         logger.info(f"Starting input logging to {self.output_file}")
         
-        # Clear events
+        # Clear events; drained events are also appended to the journal as they come in, so they're
+        # on disk if the app crashes
         with self.lock:
-            self.events = []
+            self._events = EventStore()
+            self.journal = EventJournal(self.output_file)
+        for pending in self._pending.values():
+            pending.clear()
+        
+        self._drain_stop.clear()
+        self._drainer = threading.Thread(target=self._drain_worker)
+        self._drainer.daemon = True
+        self._drainer.start()
         
         # Start listeners
         self.mouse_listener = mouse.Listener(
@@ -54,7 +84,7 @@ class InputLogger:
         self.keyboard_listener.start()
     
     def stop(self):
-        """Stop recording input events and save to file"""
+        """Stop recording input events and seal the journal they were written to"""
         if not self.running:
             return
         
@@ -70,20 +100,59 @@ class InputLogger:
             self.keyboard_listener.stop()
             self.keyboard_listener = None
         
-        # Save events to file
+        if self._drainer:
+            self._drain_stop.set()
+            self._drainer.join()
+            self._drainer = None
+        
+        # The drainer wrote every event on its way out
         with self.lock:
-            with open(self.output_file, 'w') as f:
-                json.dump({
-                    "meta": {
-                        "timestamp": time.time(),
-                        "type": "input_events"
-                    },
-                    "events": self.events
-                }, f, indent=2)
-        
-        logger.info(f"Input logging stopped, events saved to {self.output_file}")
+            self.journal.seal()
+            events = self._events
+        
+        logger.info(f"Input logging stopped, {len(events)} events ({events.nbytes // 1024} KiB) saved to {self.output_file}")
         return self.output_file
     
+    @property
+    def events(self):
+        """Events of the current recording in a compact EventStore, including those not drained yet"""
+        self._drain()
+        return self._events
+    
+    @events.setter
+    def events(self, events):
+        # Lists of event dicts are converted, e.g. events loaded back from a file
+        with self.lock:
+            self._events = events if isinstance(events, EventStore) else EventStore.from_events(events)
+    
+    def events_between(self, start_ns, end_ns=None):
+        """Get copies of the events recorded from start_ns up to end_ns (open-ended if None)"""
+        self._drain()
+        with self.lock:
+            return self._events.between(start_ns, end_ns)
+    
+    def _drain(self):
+        """Move buffered events into the event store and journal, in time order within each batch"""
+        with self.lock:
+            batch = []
+            for pending in self._pending.values():
+                # Only popped from here, under the lock; the listener may keep appending meanwhile
+                for _ in range(len(pending)):
+                    batch.append(pending.popleft())
+            # Merge the listeners' buffers. An event stamped just before a drain can still be
+            # appended after it, so batches aren't in time order with each other.
+            batch.sort(key=lambda event: event[0])
+            for timestamp_ns, event_type, fields in batch:
+                self._events.append(timestamp_ns, event_type, fields)
+            if self.journal and not self.journal.sealed:
+                self.journal.write(batch)
+    
+    def _drain_worker(self):
+        """Drain the listener buffers every DRAIN_INTERVAL until logging stops"""
+        while not self._drain_stop.wait(DRAIN_INTERVAL):
+            self._drain()
+        self._drain()
+
     def _add_event(self, event_type, **kwargs):
         """Add an event to the events list"""
         if not self.running:
@@ -91,14 +160,21 @@ class InputLogger:
         
         # Use timing module to get timestamp relative to global start time
         timestamp_ns = get_timestamp_ns()
-        event = {
-            "t": timestamp_ns,
-            "kind": event_type,
-            **kwargs
-        }
         
-        with self.lock:
-            self.events.append(event)
+        # deque.append is atomic, so the listener thread never waits here
+        listener = "keyboard" if event_type.startswith("key_") else "mouse"
+        self._pending[listener].append((timestamp_ns, event_type, kwargs))
+        
+        if self.on_significant_event and self._is_significant(event_type, timestamp_ns):
+            self.on_significant_event(timestamp_ns, event_type)
+    
+    def _is_significant(self, event_type, timestamp_ns):
+        """Check if an event starts something worth seeking to"""
+        if event_type == "key_down":
+            burst_start = self._last_key_ns is None or timestamp_ns - self._last_key_ns >= KEY_BURST_GAP_NS
+            self._last_key_ns = timestamp_ns
+            return burst_start
+        return event_type in SIGNIFICANT_EVENTS
     
     def on_mouse_move(self, x, y):
         """Handle mouse move event"""
@@ -0,0 +1,116 @@
+"""
+Minimal Matroska muxer for piping timestamped raw BGRA frames to ffmpeg
+
+Only what ffmpeg's demuxer needs is written: one V_UNCOMPRESSED track and one
+cluster per frame, so every frame carries its own capture timestamp.
+"""
+import struct
+
+# Element IDs (already include their length marker bits)
+EBML = 0x1A45DFA3
+EBML_VERSION = 0x4286
+EBML_READ_VERSION = 0x42F7
+EBML_MAX_ID_LENGTH = 0x42F2
+EBML_MAX_SIZE_LENGTH = 0x42F3
+DOC_TYPE = 0x4282
+DOC_TYPE_VERSION = 0x4287
+DOC_TYPE_READ_VERSION = 0x4285
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMESTAMP_SCALE = 0x2AD7B1
+MUXING_APP = 0x4D80
+WRITING_APP = 0x5741
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_NUMBER = 0xD7
+TRACK_UID = 0x73C5
+TRACK_TYPE = 0x83
+CODEC_ID = 0x86
+VIDEO = 0xE0
+PIXEL_WIDTH = 0xB0
+PIXEL_HEIGHT = 0xBA
+COLOUR_SPACE = 0x2EB524
+CLUSTER = 0x1F43B675
+TIMESTAMP = 0xE7
+SIMPLE_BLOCK = 0xA3
+
+UNKNOWN_SIZE = b"\x01\xff\xff\xff\xff\xff\xff\xff"
+
+# Timestamps are written in microseconds
+TIMESTAMP_SCALE_NS = 1000
+
+
+def _id(element_id):
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+
+
+def _size(size):
+    """Encode an element size as an 8-byte EBML variable-length integer"""
+    return (size | (1 << 56)).to_bytes(8, "big")
+
+
+def _element(element_id, payload):
+    return _id(element_id) + _size(len(payload)) + payload
+
+
+def _uint(element_id, value):
+    return _element(element_id, value.to_bytes(max(1, (value.bit_length() + 7) // 8), "big"))
+
+
+def _string(element_id, value):
+    return _element(element_id, value.encode("ascii"))
+
+
+def stream_header(width, height):
+    """EBML header, open-ended segment, segment info and the video track"""
+    header = _element(EBML, b"".join([
+        _uint(EBML_VERSION, 1),
+        _uint(EBML_READ_VERSION, 1),
+        _uint(EBML_MAX_ID_LENGTH, 4),
+        _uint(EBML_MAX_SIZE_LENGTH, 8),
+        _string(DOC_TYPE, "matroska"),
+        _uint(DOC_TYPE_VERSION, 4),
+        _uint(DOC_TYPE_READ_VERSION, 2),
+    ]))
+
+    info = _element(INFO, b"".join([
+        _uint(TIMESTAMP_SCALE, TIMESTAMP_SCALE_NS),
+        _string(MUXING_APP, "GAce"),
+        _string(WRITING_APP, "GAce"),
+    ]))
+
+    tracks = _element(TRACKS, _element(TRACK_ENTRY, b"".join([
+        _uint(TRACK_NUMBER, 1),
+        _uint(TRACK_UID, 1),
+        _uint(TRACK_TYPE, 1),  # Video
+        _string(CODEC_ID, "V_UNCOMPRESSED"),
+        _element(VIDEO, b"".join([
+            _uint(PIXEL_WIDTH, width),
+            _uint(PIXEL_HEIGHT, height),
+            _element(COLOUR_SPACE, b"BGRA"),
+        ])),
+    ])))
+
+    return header + _id(SEGMENT) + UNKNOWN_SIZE + info + tracks
+
+
+def frame_header(frame_size, timestamp_ns):
+    """Cluster and SimpleBlock headers that precede a frame's pixel data"""
+    # Track 1, timestamp relative to the cluster, keyframe flag
+    block_header = b"\x81" + struct.pack(">hB", 0, 0x80)
+    block = _id(SIMPLE_BLOCK) + _size(len(block_header) + frame_size) + block_header
+
+    cluster_timestamp = _uint(TIMESTAMP, max(0, timestamp_ns) // TIMESTAMP_SCALE_NS)
+    return _id(CLUSTER) + _size(len(cluster_timestamp) + len(block) + frame_size) + cluster_timestamp + block
+
+
+class MatroskaFrameWriter:
+    def __init__(self, stream, width, height):
+        self.stream = stream
+        self.frame_size = width * height * 4
+        self.stream.write(stream_header(width, height))
+
+    def write(self, buffer, timestamp_ns):
+        """Write one BGRA frame with its presentation timestamp"""
+        self.stream.write(frame_header(self.frame_size, timestamp_ns))
+        self.stream.write(buffer)
@@ -0,0 +1,34 @@
+"""
+Monitor selection and lookup of the monitor an input event happened on
+"""
+
+
+def select_monitors(monitor_count, selection=1):
+    """Resolve a monitor selection into indices into mss's monitor list
+
+    selection is one index (0 is the whole virtual desktop, 1 the primary monitor),
+    a list of indices or "all" for every physical monitor. monitor_count is the
+    number of physical monitors, i.e. len(sct.monitors) - 1.
+    """
+    if selection == "all":
+        return list(range(1, monitor_count + 1))
+
+    indices = [selection] if isinstance(selection, int) else list(selection)
+    for index in indices:
+        if not 0 <= index <= monitor_count:
+            raise ValueError(f"No monitor {index}, there are {monitor_count}")
+    return list(dict.fromkeys(indices))  # Drop duplicates, keep the order
+
+
+def monitor_at(monitors, x, y):
+    """Index of the first recorded monitor containing the point, or None
+
+    monitors are dicts with "monitor", "left", "top", "width" and "height" as in
+    ScreenCapture.monitor_outputs().
+    """
+    # The virtual desktop contains every point, so only fall back to it
+    for monitor in sorted(monitors, key=lambda monitor: monitor["monitor"] == 0):
+        if (monitor["left"] <= x < monitor["left"] + monitor["width"]
+                and monitor["top"] <= y < monitor["top"] + monitor["height"]):
+            return monitor["monitor"]
+    return None
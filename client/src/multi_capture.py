@@ -0,0 +1,89 @@
+"""
+Record several monitors at once, each with its own capture and encoder pipeline
+"""
+import threading
+from loguru import logger
+from timing import set_start_time
+from screen_capture import ScreenCapture
+from monitors import select_monitors
+from frame_sources import open_frame_source
+
+
+class MultiScreenCapture:
+    def __init__(self, monitors="all", frame_source=None, **options):
+        # One source for every pipeline, so monitors are only detected once
+        self.frame_source = open_frame_source(frame_source)
+
+        # Resolve the selection against the monitors connected right now
+        self.monitors = select_monitors(len(self.frame_source.monitors) - 1, monitors)
+        logger.info(f"Recording monitors {self.monitors}")
+
+        # Pipelines run in parallel; the first one is the main video of the recording
+        self.captures = [
+            ScreenCapture(monitor=monitor, frame_source=self.frame_source, **options) for monitor in self.monitors
+        ]
+        self.primary = self.captures[0]
+
+    @property
+    def running(self):
+        return any(capture.running for capture in self.captures)
+
+    @property
+    def resolution(self):
+        return self.primary.resolution
+
+    @property
+    def output_dir(self):
+        return self.primary.output_dir
+
+    @property
+    def output_file(self):
+        return self.primary.output_file
+
+    @property
+    def timestamps_file(self):
+        return self.primary.timestamps_file
+
+    @property
+    def on_segment(self):
+        return self.primary.on_segment
+
+    @on_segment.setter
+    def on_segment(self, callback):
+        for capture in self.captures:
+            capture.on_segment = callback
+
+    def start(self):
+        """Start every pipeline on one shared clock"""
+        if self.running:
+            return
+
+        set_start_time()
+        for capture in self.captures:
+            capture.start(reset_clock=False)
+
+    def stop(self):
+        """Stop every pipeline and return the main video file"""
+        if not self.running:
+            return
+
+        # Stop the pipelines in parallel so they all end at the same moment
+        stoppers = [threading.Thread(target=capture.stop) for capture in self.captures]
+        for stopper in stoppers:
+            stopper.start()
+        for stopper in stoppers:
+            stopper.join()
+        return self.primary.output_file
+
+    def request_keyframe(self, t_ns=None, kind=None):
+        """Ask every pipeline for a keyframe at an input event"""
+        for capture in self.captures:
+            capture.request_keyframe(t_ns, kind)
+
+    def annotate_marker(self, **info):
+        """Add details to the main pipeline's in-progress marker; recovery only uses its video"""
+        self.primary.annotate_marker(**info)
+
+    def monitor_outputs(self):
+        """Describe what was recorded for each monitor, main video first"""
+        return [output for capture in self.captures for output in capture.monitor_outputs()]
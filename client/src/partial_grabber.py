@@ -0,0 +1,112 @@
+"""
+Grab only the screen tiles that are likely to change and composite them into a full frame
+"""
+import numpy as np
+
+
+def _grow(mask):
+    """Extend a tile mask by one tile in every direction"""
+    grown = mask.copy()
+    grown[1:] |= mask[:-1]
+    grown[:-1] |= mask[1:]
+    spread = grown.copy()
+    grown[:, 1:] |= spread[:, :-1]
+    grown[:, :-1] |= spread[:, 1:]
+    return grown
+
+
+def tile_rectangles(mask):
+    """Cover the set tiles of a mask with (row, col, rows, cols) rectangles
+
+    Runs of tiles in each row are merged with identical runs in the rows below,
+    which keeps the number of grabs low for the block-shaped areas typing and
+    window updates produce.
+    """
+    rectangles = []
+    open_runs = {}  # (col, cols) -> index into rectangles for runs continuing downwards
+
+    for row in range(mask.shape[0]):
+        padded = np.concatenate(([False], mask[row], [False]))
+        edges = np.flatnonzero(padded[1:] != padded[:-1])
+
+        runs = {}
+        for col, end in zip(edges[::2], edges[1::2]):
+            run = (int(col), int(end - col))
+            if run in open_runs:
+                index = open_runs[run]
+                r, c, rows, cols = rectangles[index]
+                rectangles[index] = (r, c, rows + 1, cols)
+            else:
+                index = len(rectangles)
+                rectangles.append((row, run[0], 1, run[1]))
+            runs[run] = index
+        open_runs = runs
+
+    return rectangles
+
+
+class PartialGrabber:
+    def __init__(self, detector, full_grab_every=10, warm_frames=5):
+        self.detector = detector
+        self.full_grab_every = full_grab_every  # Frames between full grabs that catch changes anywhere
+        self.warm_frames = warm_frames  # Frames a tile keeps being re-grabbed after it last changed
+        self._since_full = None
+        self._idle = None  # Frames since each tile last changed
+        self.grabbed_pixels = 0
+        self.full_pixels = 0
+
+    def reset(self):
+        """Start over with a full grab"""
+        self._since_full = None
+        self._idle = None
+        self.grabbed_pixels = 0
+        self.full_pixels = 0
+
+    @property
+    def frame(self):
+        """The composited full frame"""
+        return self.detector.reference
+
+    def grab(self, sct, region):
+        """Refresh the composited frame and return the mask of tiles that changed"""
+        self.full_pixels += region["width"] * region["height"]
+
+        if self._since_full is None or self._since_full >= self.full_grab_every:
+            dirty = self.detector.update(np.asarray(sct.grab(region)))
+            self.grabbed_pixels += region["width"] * region["height"]
+            self._since_full = 0
+        else:
+            dirty = np.zeros(self.detector.grid_shape, dtype=bool)
+            candidates = _grow(self._idle < self.warm_frames)
+            size = self.detector.tile_size
+
+            for row, col, rows, cols in tile_rectangles(candidates):
+                top, left = row * size, col * size
+                width = min(cols * size, region["width"] - left)
+                height = min(rows * size, region["height"] - top)
+                shot = sct.grab({
+                    "left": region["left"] + left,
+                    "top": region["top"] + top,
+                    "width": width,
+                    "height": height
+                })
+                dirty |= self.detector.update_region(np.asarray(shot), row, col)
+                self.grabbed_pixels += width * height
+
+            self._since_full += 1
+
+        if self._idle is None or self._idle.shape != dirty.shape:
+            # The first frame is all new, which says nothing about where changes happen
+            self._idle = np.full(dirty.shape, self.warm_frames, dtype=np.int32)
+            return dirty
+
+        np.minimum(self._idle + 1, self.warm_frames, out=self._idle)
+        self._idle[dirty] = 0
+        return dirty
+
+    def stats(self):
+        """Get the share of screen pixels that had to be grabbed"""
+        return {
+            "grabbed_pixels": self.grabbed_pixels,
+            "grabbed_fraction": self.grabbed_pixels / self.full_pixels if self.full_pixels else 0.0
+        }
@@ -0,0 +1,116 @@
+"""
+Recover recordings left behind when the client was killed mid-recording
+
+ScreenCapture keeps a recording_<ts>.inprogress marker next to its video while it
+records. A marker that is still there at the next start-up belongs to a recording
+that never stopped cleanly; whatever ffmpeg got onto disk is remuxed into a
+regular MP4 and packaged, along with the input events journaled up to the crash.
+"""
+import os
+import glob
+import json
+import subprocess
+from loguru import logger
+
+MARKER_SUFFIX = ".inprogress"
+
+
+def write_marker(path, info):
+    """Atomically write a recording's in-progress marker"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(info, f)
+    os.replace(temp_path, path)
+
+
+def find_interrupted_recordings(output_dir):
+    """Markers of recordings that never stopped cleanly, oldest first"""
+    return sorted(glob.glob(os.path.join(glob.escape(output_dir), f"recording_*{MARKER_SUFFIX}")))
+
+
+def interrupted_videos(info):
+    """Video files of an interrupted recording that were not already handed over"""
+    if os.path.exists(info["video"]):
+        return [info["video"]]
+
+    # Segmented or adaptive recordings write numbered parts instead
+    base = os.path.splitext(info["video"])[0]
+    handed_over = set(info.get("handed_over", []))
+    return [
+        path for path in sorted(glob.glob(f"{glob.escape(base)}.part*.mp4"))
+        if path not in handed_over
+    ]
+
+
+def remux(ffmpeg_path, video_file, output_file):
+    """Rewrite the readable part of a video into a regular MP4, returning True on success"""
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, "-y", "-loglevel", "error", "-i", video_file, "-c", "copy", "-movflags", "+faststart", output_file],
+            capture_output=True, text=True, timeout=600
+        )
+    except Exception as e:
+        logger.error(f"Could not remux {video_file}: {e}")
+        return False
+
+    if result.returncode != 0 or not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+        logger.warning(f"No playable video in {video_file}: {result.stderr.strip()}")
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        return False
+    return True
+
+
+def count_frames(ffmpeg_path, video_file):
+    """Number of video frames actually in a file, 0 if it has none or can't be read"""
+    # Stream copy doesn't report frame=, but framecrc prints one line per packet without decoding
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, "-nostdin", "-loglevel", "error", "-i", video_file, "-map", "0:v:0", "-c", "copy", "-f", "framecrc", "-"],
+            capture_output=True, text=True, timeout=600
+        )
+    except Exception as e:
+        logger.error(f"Could not count the frames of {video_file}: {e}")
+        return 0
+
+    if result.returncode != 0:
+        logger.warning(f"Could not count the frames of {video_file}: {result.stderr.strip()}")
+        return 0
+    return sum(1 for line in result.stdout.splitlines() if line and not line.startswith("#"))
+
+
+def recover_recordings(output_dir, ffmpeg_path, muxer):
+    """Package every playable video of interrupted recordings and return the package paths"""
+    packages = []
+    for marker in find_interrupted_recordings(output_dir):
+        try:
+            with open(marker, 'r') as f:
+                info = json.load(f)
+
+            for video_file in interrupted_videos(info):
+                recovered_file = os.path.splitext(video_file)[0] + ".recovered.mp4"
+                if not remux(ffmpeg_path, video_file, recovered_file):
+                    continue
+
+                # The encoder may not have written a single fragment before the crash, leaving only the moov
+                frame_count = count_frames(ffmpeg_path, recovered_file)
+                if not frame_count:
+                    logger.warning(f"No frames recovered from {video_file}")
+                    os.remove(recovered_file)
+                    continue
+
+                # Frame timestamps and input events only line up with a video that covers the whole recording
+                whole = video_file == info["video"]
+                timestamps_file = info.get("frame_timestamps") if whole else None
+                events_file = info.get("events") if whole else None
+                package = muxer.finalize_recovered(recovered_file, info, timestamps_file, events_file, frame_count)
+                if package:
+                    logger.info(f"Recovered {video_file} into {package}")
+                    packages.append(package)
+        except Exception as e:
+            logger.exception(f"Error recovering recording from {marker}: {e}")
+
+        # Don't retry a recording on every start-up, its files stay on disk either way
+        os.remove(marker)
+
+    return packages
@@ -4,49 +4,256 @@ import asyncio
 import subprocess
 import tempfile
 import threading
-from queue import Queue
-import mss
+from array import array
+from functools import partial
+from queue import Empty
 import numpy as np
 from loguru import logger
 import shutil
-from timing import set_start_time
+from timing import set_start_time, get_start_time, get_timestamp_ns
+from frame_pool import FramePool
+from frame_scaler import FrameScaler
+from change_detector import ChangeDetector
+from partial_grabber import PartialGrabber
+from frame_scheduler import FrameScheduler
+from frame_timestamps import FrameTimestampWriter
+from mkv_writer import MatroskaFrameWriter
+from encoders import select_encoder, encoder_args, list_encoders, preset_count
+from encoder_controller import EncoderController, encoder_levels, scaled_resolution
+from recovery import MARKER_SUFFIX, write_marker
+from encoder_process import EncoderProcess, SharedFrameSlot
+from frame_ring import FrameRing
+from capture_region import parse_region, clamp_region, window_bounds, RegionFollower
+from frame_sources import open_frame_source
+from cursor_track import CursorTrack, composite_cursor
+
+# Seconds between forced keyframes, each starting a new fragment in fragmented MP4 output
+FRAGMENT_SECONDS = 2
+
+# Seconds between keyframes of the low resolution proxy video, so any frame decodes quickly
+PROXY_KEYFRAME_SECONDS = 0.5
+
+# Frames piped with an odd microsecond timestamp are encoded as keyframes; ffmpeg can't
+# be asked for a keyframe any other way while frames stream in through a pipe
+KEYFRAME_MARK_NS = 1000
+KEYFRAME_MARK_EXPR = "eq(mod(round(t*1000000),2),1)"
+
+# Swscale algorithm matching each FrameScaler mode when ffmpeg does the scaling
+FFMPEG_SCALE_FLAGS = {
+    "nearest": "neighbor",
+    "box2x": "area",
+    "area": "area"
+}
+
+def proxy_resolution(resolution, height):
+    """Size of the proxy video: height rows at the recording's aspect ratio, both even"""
+    width = round(resolution[0] * height / resolution[1] / 2) * 2
+    return width, height // 2 * 2
+
+def proxy_path(video_file):
+    """Proxy video next to a video file"""
+    return os.path.splitext(video_file)[0] + ".proxy.mp4"
+
+def ffmpeg_scale_filter(width, height, flags="neighbor"):
+    """Build an ffmpeg filter that letterboxes the input into width x height"""
+    return (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease:flags={flags},"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black"
+    )
 
 class ScreenCapture:
-    def __init__(self, resolution=None, fps=10):
+    def __init__(self, resolution=None, fps=10, zero_copy=True, queue_depth=2, scale_mode="nearest", ffmpeg_scaling=False, skip_unchanged=False, partial_grab=False, schedule_policy="drop", vfr=False, encoder="auto", adaptive=False, segment_duration=None, fragmented=False, monitor=1, encoder_process=False, frame_ring_slots=0, capture_region=None, follow_window=None, proxy_height=None, event_keyframes=False, keyframe_spacing=0.5, frame_source=None, cursor_track=False, cursor_interval=0.05, draw_cursor=False):
+        # Index into the frame source's monitor list: 1 is the primary monitor, 0 the whole virtual desktop
+        self.monitor = monitor
+        
+        # Screen, replayed file or synthetic content; a FrameSource instance or a name like "synthetic:noise"
+        self.frame_source = open_frame_source(frame_source)
+        
         # Detect system resolution automatically
-        with mss.mss() as sct:
-            monitor = sct.monitors[1]  # Primary monitor
-            system_width = monitor["width"]
-            system_height = monitor["height"]
-            logger.info(f"Detected system resolution: {system_width}x{system_height}")
+        monitor_info = self.frame_source.monitors[self.monitor]
+        system_width = monitor_info["width"]
+        system_height = monitor_info["height"]
+        self.region = {key: monitor_info[key] for key in ("left", "top", "width", "height")}
+        desktop = self.frame_source.monitors[0]
+        logger.info(f"Detected system resolution: {system_width}x{system_height} (monitor {self.monitor})")
+        
+        # Grab only a rectangle of the desktop, or one that moves along with a window; follow_window
+        # is a window title or a callable returning the window's rectangle
+        self.follower = None
+        self.cropped = bool(capture_region or follow_window)
+        if follow_window:
+            locate = follow_window if callable(follow_window) else partial(window_bounds, follow_window)
+            window = locate()
+            if not window:
+                raise ValueError(f"Window to follow not found: {follow_window}")
+            self.region = clamp_region(parse_region(window), desktop)
+            self.follower = RegionFollower(locate, self.region, desktop)
+        elif capture_region:
+            self.region = clamp_region(parse_region(capture_region), desktop)
+        if self.cropped:
+            logger.info(f"Capturing region {self.region['width']}x{self.region['height']} at {self.region['left']},{self.region['top']}")
         
         # Use detected resolution if none provided
-        self.resolution = resolution if resolution else (system_width, system_height)
+        self.capture_size = (self.region["width"], self.region["height"])
+        self.resolution = resolution if resolution else self.capture_size
+        self.encode_resolution = self.resolution  # Lowered by the encoder controller when ffmpeg can't keep up
         self.fps = fps
         self.running = False
         self.frame_interval = 1.0 / fps
-        self.frame_queue = Queue(maxsize=2)  # Small queue to minimize memory usage
+        self.scheduler = FrameScheduler(self.frame_interval, policy=schedule_policy)
+        # Small pool of reusable frame buffers to minimize memory usage
+        self.frame_pool = FramePool(depth=queue_depth, late_after_ns=int(self.frame_interval * 1_000_000_000))
         self.output_dir = os.path.join(os.environ.get('APPDATA', tempfile.gettempdir()), 'GAce')
         os.makedirs(self.output_dir, exist_ok=True)
         self.temp_dir = os.path.join(self.output_dir, 'temp')
         os.makedirs(self.temp_dir, exist_ok=True)
         self.output_file = None
+        self.timestamps_file = None  # Capture time of every encoded frame
         self.ffmpeg_process = None
         self.capture_thread = None
         self.encoder_thread = None
+        
+        # Write mss buffers straight to ffmpeg instead of copying through numpy
+        self.zero_copy = zero_copy
+        
+        # Letterboxing scaler for frames that don't match the output resolution
+        self.scale_mode = scale_mode
+        self.scaler = FrameScaler(self.resolution, mode=scale_mode)
+        
+        # Pipe frames at the native size and let ffmpeg's scale filter resize them
+        self.ffmpeg_scaling = ffmpeg_scaling
+        
+        # Don't pipe frames identical to the previous one; the last frame stays on
+        # screen until the next change's capture timestamp
+        self.skip_unchanged = skip_unchanged or partial_grab
+        self.change_detector = ChangeDetector() if self.skip_unchanged else None
+        self.skipped_frames = 0
+        
+        # Pipe frames with their capture timestamps so skipped and dropped
+        # frames leave gaps in time rather than shortening the video
+        self.vfr = vfr
+        if self.skip_unchanged and not vfr:
+            # Skipped frames leave gaps only timestamped frames can keep
+            logger.info("Skipping unchanged frames keeps video frames in line with their timestamps, piping them as Matroska")
+            self.vfr = True
+        
+        # Video encoder name, or "auto" to use the best available hardware encoder
+        self.encoder = encoder
+        self.encoder_name = None
+        
+        # Switch to faster presets or lower resolutions in new encoder segments
+        # when ffmpeg falls behind, and back when there is headroom again
+        self.adaptive = adaptive
+        self.controller = None
+        self.encoder_speed = 0
+        self.segment_files = []
+        self.mkv_writer = None
+        
+        # Roll over to a new MP4 file every segment_duration seconds and hand each
+        # finished one to on_segment(segment) while recording continues
+        self.segment_duration = segment_duration
+        self.on_segment = None
+        self._segment = None  # Segment ffmpeg is currently writing
+        self._finishers = []  # Threads waiting for earlier segments to be written out
+        
+        # Write fragmented MP4 that stays playable up to the last fragment if the client is
+        # killed; the marker file tells recovery.py which recordings never stopped cleanly
+        self.fragmented = fragmented
+        self.marker_file = None
+        self._marker = None
+        self._marker_lock = threading.Lock()
+        
+        # Re-grab only recently changed tiles between periodic full grabs
+        self.partial_grabber = PartialGrabber(self.change_detector) if partial_grab else None
+        
+        # Scale and pipe frames in a separate process reading them from shared memory,
+        # so encoding doesn't compete with the input listeners for the GIL
+        self.encoder_process = encoder_process
+        self._encoder_process = None
+        
+        # Encode a second, low resolution video with dense keyframes from the same frames in the
+        # same ffmpeg process, for scrubbing and thumbnails without decoding the full video
+        self.proxy_resolution = proxy_resolution(self.resolution, proxy_height) if proxy_height else None
+        self.proxy_file = None
+        
+        # Force a keyframe on the first frame after significant input events (see request_keyframe),
+        # at least keyframe_spacing seconds apart, so seeking to an event decodes few frames.
+        # Keyframes are marked through the piped timestamps, so frames are piped as Matroska.
+        self.event_keyframes = event_keyframes
+        self.keyframe_spacing_ns = int(keyframe_spacing * 1_000_000_000)
+        self.forced_keyframes = 0
+        self._keyframe_request_ns = None
+        self._last_keyframe_ns = None
+        self._keyframe_lock = threading.Lock()
+        if event_keyframes and not vfr:
+            logger.info("Keyframes at input events need timestamped frames, piping them as Matroska")
+            self.vfr = True
+        
+        # Publish captured frames in a shared memory ring that previews and thumbnailers in
+        # other processes can read with FrameRingReader(frame_ring.name) while recording
+        self.frame_ring_slots = frame_ring_slots
+        self.frame_ring = None
+        
+        # Screen grabs don't show the pointer: sample its position at frame times into a compact track
+        # the viewer draws it from (at most every cursor_interval seconds, only when it moved) and/or
+        # draw it into the frames before they are encoded. Positions are in capture region coordinates.
+        self.cursor_track = CursorTrack(cursor_interval) if cursor_track else None
+        self.draw_cursor = draw_cursor
+        self._drawn_cursor = None  # Pointer position in the last frame handed to the encoder
     
-    def start(self):
-        """Start the screen capture process"""
+    def start(self, reset_clock=True):
+        """Start the screen capture process
+        
+        Pipelines started together for several monitors share one clock, so only
+        the first of them should reset it.
+        """
         if self.running:
             return
         
         # Set global start time in the timing module first
-        set_start_time()
+        if reset_clock:
+            set_start_time()
         
         self.running = True
-        self.output_file = os.path.join(self.output_dir, f"recording_{int(time.time())}.mp4")
+        self.skipped_frames = 0
+        if self.change_detector:
+            self.change_detector.reset()
+        if self.partial_grabber:
+            self.partial_grabber.reset()
+        if self.follower:
+            self.follower.reset()
+        if self.cursor_track:
+            self.cursor_track.reset()
+        self._drawn_cursor = None
+        suffix = "" if self.monitor == 1 else f"_monitor{self.monitor}"
+        self.output_file = os.path.join(self.output_dir, f"recording_{int(time.time())}{suffix}.mp4")
+        self.timestamps_file = os.path.splitext(self.output_file)[0] + ".frames"
+        self.proxy_file = proxy_path(self.output_file) if self.proxy_resolution else None
         logger.info(f"Starting screen capture to {self.output_file}")
         
+        self.marker_file = os.path.splitext(self.output_file)[0] + MARKER_SUFFIX
+        self._marker = {
+            "video": self.output_file,
+            "frame_timestamps": self.timestamps_file,
+            "resolution": list(self.resolution),
+            "fps": self.fps,
+            "started": time.time(),
+            "handed_over": []  # Segments that were already packaged
+        }
+        write_marker(self.marker_file, self._marker)
+        
+        if self.encoder_process:
+            # Slots are sized for a full frame of the monitor and freed when the encoder worker ends
+            capacity = self.capture_size[0] * self.capture_size[1] * 4
+            self.frame_pool = FramePool(
+                depth=self.frame_pool.depth,
+                late_after_ns=self.frame_pool.late_after_ns,
+                slot_factory=partial(SharedFrameSlot, capacity=capacity)
+            )
+        
+        if self.frame_ring_slots:
+            self.frame_ring = FrameRing.for_size(self.frame_ring_slots, *self.capture_size)
+        
         # Start capture thread
         self.capture_thread = threading.Thread(target=self._capture_worker)
         self.capture_thread.daemon = True
@@ -83,48 +290,117 @@ class ScreenCapture:
                 except:
                     pass
         
+        logger.info(f"Frame pacing stats: {self.scheduler.stats()}")
+        logger.info(f"Frame pool stats: {self.frame_pool.stats()}, skipped unchanged frames: {self.skipped_frames}")
+        if self.partial_grabber:
+            logger.info(f"Partial grab stats: {self.partial_grabber.stats()}")
+        if self.controller:
+            logger.info(f"Encoder controller stats: {self.controller.stats()}")
+        if self.event_keyframes:
+            logger.info(f"Forced {self.forced_keyframes} keyframes at input events")
+        if self.cursor_track:
+            logger.info(f"Sampled the pointer position {self.cursor_track.samples} times")
+        if self.frame_ring:
+            logger.info(f"Published {self.frame_ring.written} frames to frame ring {self.frame_ring.name}")
+            self.frame_ring.close()
+            self.frame_ring = None
+        
+        # The recording stopped cleanly, there is nothing to recover
+        if self.marker_file and os.path.exists(self.marker_file):
+            os.remove(self.marker_file)
         logger.info(f"Screen capture stopped, video saved to {self.output_file}")
         return self.output_file
     
     def _capture_worker(self):
         """Worker thread to capture screen frames"""
         try:
-            with mss.mss() as sct:
-                # Get the monitor to capture
-                monitor = sct.monitors[1]  # Primary monitor
-                
-                # Capture the entire monitor
-                region = {
-                    "left": monitor["left"],
-                    "top": monitor["top"],
-                    "width": monitor["width"],
-                    "height": monitor["height"]
-                }
+            with self.frame_source.open() as sct:
+                # Capture the entire monitor, or the configured part of the desktop
+                region = dict(self.region)
                 
-                last_capture_time = 0
+                self.scheduler.start()
+                last_skipped = None  # Timestamp of the most recent unchanged frame that wasn't piped
                 
                 while self.running:
-                    current_time = time.perf_counter()
-                    time_since_last = current_time - last_capture_time
+                    # Sleep until the next absolute frame deadline
+                    self.scheduler.wait()
+                    if not self.running:
+                        break
+                    
+                    # Skip the grab entirely if the encoder holds every slot
+                    slot = self.frame_pool.acquire()
+                    if slot is None:
+                        continue
+                    
+                    timestamp_ns = time.perf_counter_ns()
+                    
+                    if self.follower:
+                        region, moved = self.follower.update(timestamp_ns - get_start_time())
+                        if moved and self.partial_grabber:
+                            # Tiles from the old position say nothing about the new one
+                            self.partial_grabber.reset()
                     
-                    if time_since_last >= self.frame_interval:
-                        timestamp_ns = time.perf_counter_ns()
+                    if self.partial_grabber:
+                        changed = self.partial_grabber.grab(sct, region).any()
+                        frame = self.partial_grabber.frame
+                    else:
                         frame = sct.grab(region)
-                        
-                        # Put frame in queue for encoder
-                        if not self.frame_queue.full():
-                            self.frame_queue.put((timestamp_ns, frame), block=False)
-                        
-                        last_capture_time = current_time
+                        changed = not self.change_detector or self.change_detector.changed(np.asarray(frame))
                     
-                    # Small sleep to prevent CPU hogging
-                    sleep_time = max(0.001, self.frame_interval - (time.perf_counter() - current_time))
-                    time.sleep(sleep_time)
+                    cursor = self._sample_cursor(timestamp_ns, region)
+                    if self.draw_cursor and cursor != self._drawn_cursor:
+                        # The screen may be still, but the pointer in the video has to move
+                        changed = True
+                    
+                    if not changed:
+                        # Nothing changed, ffmpeg keeps showing the previous frame
+                        self.frame_pool.release(slot)
+                        self.skipped_frames += 1
+                        last_skipped = timestamp_ns
+                    else:
+                        slot.fill(frame, timestamp_ns)
+                        last_skipped = None
+                        if self.draw_cursor:
+                            self._composite_cursor(slot, cursor)
+                        if self.frame_ring:
+                            self.frame_ring.write(slot if self.draw_cursor else frame, timestamp_ns)
+                        
+                        # Hand the frame over to the encoder
+                        self.frame_pool.put(slot)
+                
+                # Pipe the final unchanged frame so the video lasts until capture stopped
+                if last_skipped:
+                    slot = self.frame_pool.acquire(block=True, timeout=1.0)
+                    if slot is not None:
+                        slot.fill(self.change_detector.reference, last_skipped)
+                        if self.draw_cursor:
+                            self._composite_cursor(slot, self._drawn_cursor)
+                        self.frame_pool.put(slot)
         
         except Exception as e:
             logger.exception(f"Error in capture worker: {e}")
             self.running = False
     
+    def _sample_cursor(self, timestamp_ns, region):
+        """Pointer position in region coordinates for a frame, recorded in the cursor track"""
+        if not (self.cursor_track or self.draw_cursor):
+            return None
+        
+        position = self.frame_source.cursor_position()
+        if position is None:
+            return None
+        
+        cursor = (position[0] - region["left"], position[1] - region["top"])
+        if self.cursor_track:
+            self.cursor_track.sample(timestamp_ns - get_start_time(), *cursor)
+        return cursor
+    
+    def _composite_cursor(self, slot, cursor):
+        """Draw the pointer into a frame slot about to be encoded"""
+        self._drawn_cursor = cursor
+        if cursor:
+            composite_cursor(np.asarray(slot), *cursor)
+    
     def _encoder_worker(self):
         """Worker thread to encode frames to video"""
         try:
@@ -135,117 +411,393 @@ class ScreenCapture:
                 self.running = False
                 return
                 
-            # Start ffmpeg process
-            cmd = [
-                ffmpeg_path,  # Use the full path to ffmpeg
-                "-y",  # Overwrite output file
-                "-f", "rawvideo",
-                "-vcodec", "rawvideo",
-                "-pixel_format", "bgra",
-                "-video_size", f"{self.resolution[0]}x{self.resolution[1]}",
-                "-framerate", str(self.fps),
-                "-i", "-",  # Input from stdin
-                "-c:v", "libx264",
-                "-preset", "medium",
-                "-crf", "28", # 28 for good enough quality, 38 for worst quality but smallest file
-                "-pix_fmt", "yuv420p",
-                "-r", str(self.fps),
-                self.output_file
-            ]
+            self.encoder_name = select_encoder(ffmpeg_path, self.encoder)
+            self.encoder_speed = 0
+            self.forced_keyframes = 0
+            self._keyframe_request_ns = None
+            self.segment_files = []
+            if self.adaptive:
+                self.controller = EncoderController(encoder_levels(preset_count(self.encoder_name)))
             
-            logger.debug(f"Starting ffmpeg with command: {' '.join(cmd)}")
+            if self.encoder_process:
+                self._encoder_process = EncoderProcess(self.frame_pool.slots)
             
-            self.ffmpeg_process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
+            # Start ffmpeg process
+            self._segment = None
+            self._finishers = []
+            self._start_ffmpeg(ffmpeg_path)
             
-            while self.running or not self.frame_queue.empty():
+            frame_timestamps = FrameTimestampWriter(self.timestamps_file)
+            switch_pending = False  # The controller changed the encoder level
+            
+            while self.running or not self.frame_pool.empty() or self._capture_alive():
                 try:
-                    timestamp_ns, frame = self.frame_queue.get(timeout=1.0)
+                    slot = self.frame_pool.get(timeout=1.0)
+                except Empty:
+                    continue
+                
+                write_ns = 0
+                try:
+                    # Capture time on the same clock as input events
+                    timestamp_ns = slot.timestamp_ns - get_start_time()
                     
-                    # Convert mss screenshot to correct format for ffmpeg
-                    # MSS returns images in BGRA format, we need to resize and convert
-                    frame_array = np.array(frame)
+                    # Start the next segment with the first frame past the segment duration, or the
+                    # first frame after a level change; frames still queued then were captured earlier
+                    # and belong to the segment before
+                    if switch_pending or (self.segment_duration and timestamp_ns - self._segment["start_ns"] >= self.segment_duration * 1_000_000_000):
+                        self._next_segment(ffmpeg_path, timestamp_ns)
+                        switch_pending = False
                     
-                    # Resize if needed to match requested resolution
-                    if frame_array.shape[0] != self.resolution[1] or frame_array.shape[1] != self.resolution[0]:
-                        # Use simple resizing (nearest neighbor for speed)
-                        h_scale = self.resolution[1] / frame_array.shape[0]
-                        w_scale = self.resolution[0] / frame_array.shape[1]
-                        
-                        if h_scale < w_scale:
-                            new_height = self.resolution[1]
-                            new_width = int(frame_array.shape[1] * h_scale)
-                        else:
-                            new_width = self.resolution[0]
-                            new_height = int(frame_array.shape[0] * w_scale)
-                            
-                        # Center the image
-                        temp_frame = np.zeros((self.resolution[1], self.resolution[0], 4), dtype=np.uint8)
-                        
-                        # Simple resize using numpy (faster than cv2 for this use case)
-                        indices_x = np.floor(np.arange(new_width) / new_width * frame_array.shape[1]).astype(np.int32)
-                        indices_y = np.floor(np.arange(new_height) / new_height * frame_array.shape[0]).astype(np.int32)
-                        
-                        # Create the resized image
-                        resized = frame_array[np.ix_(indices_y, indices_x)]
-                        
-                        # Place it in the center
-                        x_offset = (self.resolution[0] - new_width) // 2
-                        y_offset = (self.resolution[1] - new_height) // 2
-                        
-                        temp_frame[y_offset:y_offset+new_height, x_offset:x_offset+new_width] = resized
-                        frame_array = temp_frame
+                    pipe_ns = self._keyframe_timestamp(timestamp_ns) if self.event_keyframes else timestamp_ns
                     
-                    # Write raw frame bytes to ffmpeg
-                    self.ffmpeg_process.stdin.write(frame_array.tobytes())
-                    self.ffmpeg_process.stdin.flush()
+                    # Write raw frame bytes to ffmpeg, timing how long the pipe blocks
+                    if self._encoder_process:
+                        write_ns = self.ffmpeg_process.write_frame(slot, pipe_ns)
+                    else:
+                        write_start = time.perf_counter_ns()
+                        if self.mkv_writer:
+                            self.mkv_writer.write(self._frame_to_buffer(slot), pipe_ns)
+                        else:
+                            self.ffmpeg_process.stdin.write(self._frame_to_buffer(slot))
+                        self.ffmpeg_process.stdin.flush()
+                        write_ns = time.perf_counter_ns() - write_start
                     
-                    # Log frame timestamp for debugging
-                    logger.debug(f"Encoded frame at {timestamp_ns}")
+                    frame_timestamps.append(timestamp_ns)
+                    if self.fragmented:
+                        frame_timestamps.flush()
+                    if self._segment:
+                        self._segment["frame_timestamps"].append(timestamp_ns)
+                    logger.debug(f"Encoded frame at {slot.timestamp_ns}")
                     
                 except Exception as e:
-                    if "queue.Empty" not in str(e.__class__):
-                        logger.error(f"Error in encoder: {e}")
+                    logger.error(f"Error in encoder: {e}")
+                finally:
+                    self.frame_pool.release(slot)
+                
+                # Continue in a new segment from the next frame when the controller changes the encoder level
+                if self.controller and self.controller.record(write_ns, self.frame_pool.occupancy(), self.frame_pool.stats()["dropped"]):
+                    switch_pending = True
+            
+            frame_timestamps.close()
+            logger.info(f"Wrote {frame_timestamps.count} frame timestamps to {self.timestamps_file}")
             
             # Finalize video
             if self.ffmpeg_process and self.ffmpeg_process.stdin:
                 self.ffmpeg_process.stdin.close()
-                self.ffmpeg_process.wait()
+                self._finish_segment(self.ffmpeg_process, self._segment)
+            for finisher in self._finishers:
+                finisher.join()
+            
+            if self.controller and not self.segment_duration:
+                self._join_segments(ffmpeg_path)
         
         except Exception as e:
             logger.exception(f"Error in encoder worker: {e}")
             self.running = False
+        finally:
+            self._stop_encoder_process()
+    
+    def _stop_encoder_process(self):
+        """Shut the encoder process down and free the shared frame slots"""
+        if not self._encoder_process:
+            return
+        
+        self._encoder_process.stop()
+        self._encoder_process = None
+        for slot in self.frame_pool.slots:
+            slot.close()
+    
+    def _start_ffmpeg(self, ffmpeg_path, start_ns=0):
+        """Start an ffmpeg process for the whole recording or its next segment"""
+        output_file = self.output_file
+        scale = 1.0
+        if self.controller:
+            self.encoder_speed, scale = self.controller.setting
+        
+        if self.controller or self.segment_duration:
+            output_file = f"{os.path.splitext(self.output_file)[0]}.part{len(self.segment_files):03d}.mp4"
+            self.segment_files.append(output_file)
+        
+        resolution = self.resolution if scale == 1.0 else scaled_resolution(self.resolution, scale)
+        if resolution != self.encode_resolution:
+            self.encode_resolution = resolution
+            self.scaler = FrameScaler(resolution, mode=self.scale_mode)
+        
+        cmd = self._build_ffmpeg_command(ffmpeg_path, output_file)
+        self._last_keyframe_ns = None  # Every ffmpeg process starts with a keyframe
+        
+        logger.info(f"Encoding with {self.encoder_name} at preset step {self.encoder_speed}, {self.encode_resolution[0]}x{self.encode_resolution[1]}")
+        logger.debug(f"Starting ffmpeg with command: {' '.join(cmd)}")
+        
+        if self._encoder_process:
+            # The encoder process scales frames and writes the Matroska stream itself
+            self.ffmpeg_process = self._encoder_process.open(cmd, self._input_size(), self.scale_mode, self.vfr)
+            self.mkv_writer = None
+        else:
+            self.ffmpeg_process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            self.mkv_writer = MatroskaFrameWriter(self.ffmpeg_process.stdin, *self._input_size()) if self.vfr else None
+        
+        if output_file != self.output_file:
+            self._segment = {
+                "index": len(self.segment_files) - 1,
+                "monitor": self.monitor,
+                "file": output_file,
+                "start_ns": start_ns,  # Video time 0 of the segment on the input event clock
+                "end_ns": None,  # Start of the next segment, None for the last one
+                "resolution": self.encode_resolution,
+                "proxy": proxy_path(output_file) if self.proxy_resolution else None,
+                "proxy_resolution": self.proxy_resolution,
+                "frame_timestamps": array('q')
+            }
+    
+    def _next_segment(self, ffmpeg_path, boundary_ns):
+        """Let the current ffmpeg finish its segment in the background and start the next one"""
+        self.ffmpeg_process.stdin.close()
+        self._segment["end_ns"] = boundary_ns
+        
+        finisher = threading.Thread(target=self._finish_segment, args=(self.ffmpeg_process, self._segment))
+        finisher.daemon = True
+        finisher.start()
+        self._finishers.append(finisher)
+        
+        self._start_ffmpeg(ffmpeg_path, boundary_ns)
+    
+    def _finish_segment(self, process, segment):
+        """Wait for ffmpeg to write out a segment, then hand it over when recording in segments"""
+        process.wait()
+        
+        # ffmpeg writes no file for a segment that ended before its first frame
+        if not self.segment_duration or not segment["frame_timestamps"] or not os.path.exists(segment["file"]):
+            return
+        
+        logger.info(f"Finished segment {segment['index']}: {segment['file']}")
+        if not self.on_segment:
+            return
+        
+        if self.cursor_track:
+            segment["cursor_track"] = self.cursor_track.export(segment["start_ns"], segment["end_ns"])
+        
+        try:
+            self.on_segment(segment)
+        except Exception as e:
+            logger.exception(f"Error handing over segment {segment['index']}: {e}")
+            return
+        
+        # Recovery after a crash leaves segments that were handed over alone
+        if self._marker is not None:
+            with self._marker_lock:
+                self._marker["handed_over"].append(segment["file"])
+                write_marker(self.marker_file, self._marker)
+    
+    def _join_segments(self, ffmpeg_path):
+        """Concatenate the adaptive encoder segments into the output file"""
+        self._join_files(ffmpeg_path, self.segment_files, self.output_file)
+        if self.proxy_file:
+            self._join_files(ffmpeg_path, [proxy_path(path) for path in self.segment_files], self.proxy_file)
+    
+    def _join_files(self, ffmpeg_path, files, output_file):
+        """Concatenate video files of the same recording into output_file"""
+        # ffmpeg writes no file for a segment that ended before its first frame
+        files = [path for path in files if os.path.exists(path)]
+        if not files:
+            return
+        if len(files) == 1:
+            os.replace(files[0], output_file)
+            return
+        
+        # Segments sit next to the list file, and the concat demuxer resolves relative paths from there
+        list_file = os.path.splitext(output_file)[0] + ".segments.txt"
+        with open(list_file, 'w') as f:
+            for path in files:
+                f.write(f"file '{os.path.basename(path)}'\n")
+        
+        # Stream copy; segments at a lower resolution get their own sample description
+        result = subprocess.run(
+            [ffmpeg_path, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_file, "-c", "copy", output_file],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            logger.error(f"Could not join {len(files)} encoder segments, keeping them as is: {result.stderr.strip()}")
+            return
+        
+        for path in [*files, list_file]:
+            os.remove(path)
+        logger.info(f"Joined {len(files)} encoder segments into {output_file}")
+    
+    def request_keyframe(self, t_ns=None, kind=None):
+        """Ask for a keyframe on the first frame captured at or after t_ns (now by default)
+        
+        Matches InputLogger.on_significant_event and is cheap enough to run on the
+        listener threads; kind is the input event that asked for it.
+        """
+        if not self.event_keyframes:
+            return
+        
+        t_ns = get_timestamp_ns() if t_ns is None else t_ns
+        with self._keyframe_lock:
+            # The oldest pending request wins, later ones are covered by the same keyframe
+            if self._keyframe_request_ns is None:
+                self._keyframe_request_ns = t_ns
+    
+    def _keyframe_timestamp(self, timestamp_ns):
+        """Timestamp to pipe a frame with: odd microseconds for a keyframe, even otherwise"""
+        even_ns = timestamp_ns // (2 * KEYFRAME_MARK_NS) * (2 * KEYFRAME_MARK_NS)
+        with self._keyframe_lock:
+            requested = self._keyframe_request_ns
+            if requested is None or requested > timestamp_ns:
+                return even_ns
+            
+            # Too close to the last keyframe; the request waits for a later frame
+            if self._last_keyframe_ns is not None and timestamp_ns - self._last_keyframe_ns < self.keyframe_spacing_ns:
+                return even_ns
+            
+            self._keyframe_request_ns = None
+        
+        self._last_keyframe_ns = timestamp_ns
+        self.forced_keyframes += 1
+        return even_ns + KEYFRAME_MARK_NS
+    
+    def annotate_marker(self, **info):
+        """Add details to the in-progress marker that recovery needs, e.g. events=<journal path>"""
+        if self._marker is None:
+            return
+        with self._marker_lock:
+            self._marker.update(info)
+            write_marker(self.marker_file, self._marker)
+    
+    def monitor_outputs(self):
+        """Describe what was recorded for each monitor (a single one for ScreenCapture)"""
+        output = {
+            "monitor": self.monitor,
+            **self.region,
+            "resolution": list(self.resolution),
+            "video": self.output_file,
+            "frame_timestamps": self.timestamps_file
+        }
+        if self.proxy_file:
+            output["proxy"] = self.proxy_file
+            output["proxy_resolution"] = list(self.proxy_resolution)
+        if self.cropped:
+            # Where the captured rectangle was over time, as [t_ns, left, top]
+            output["region_track"] = self.follower.track if self.follower else [[0, self.region["left"], self.region["top"]]]
+        if self.cursor_track:
+            # Keeps growing while recording; packaged with CursorTrack.export()
+            output["cursor_track"] = self.cursor_track
+        return [output]
+    
+    def _capture_alive(self):
+        """Check if the capture thread may still hand over frames"""
+        return self.capture_thread is not None and self.capture_thread.is_alive()
+    
+    def _input_size(self):
+        """Size of the frames piped to ffmpeg"""
+        return self.capture_size if self.ffmpeg_scaling else self.encode_resolution
+    
+    def _build_ffmpeg_command(self, ffmpeg_path, output_file=None):
+        """Build the ffmpeg command line that encodes piped BGRA frames"""
+        input_size = self._input_size()
+        
+        cmd = [
+            ffmpeg_path,  # Use the full path to ffmpeg
+            "-y",  # Overwrite output file
+        ]
+        
+        if self.vfr:
+            # Frames arrive in a Matroska stream carrying their capture timestamps
+            cmd += ["-f", "matroska"]
+        else:
+            cmd += [
+                "-f", "rawvideo",
+                "-vcodec", "rawvideo",
+                "-pixel_format", "bgra",
+                "-video_size", f"{input_size[0]}x{input_size[1]}",
+                "-framerate", str(self.fps),
+            ]
+        
+        cmd += ["-i", "-"]  # Input from stdin
+        
+        width, height = self.encode_resolution
+        if tuple(input_size) != (width, height):
+            cmd += ["-vf", ffmpeg_scale_filter(width, height, FFMPEG_SCALE_FLAGS[self.scale_mode])]
+        
+        if not self.encoder_name:
+            self.encoder_name = select_encoder(ffmpeg_path, self.encoder)
+        cmd += encoder_args(self.encoder_name, self.encoder_speed)
+        
+        # Options after the encoder apply to each output file
+        output_options = []
+        if self.event_keyframes:
+            # Encode in microseconds so marked timestamps stay odd
+            output_options += ["-enc_time_base", "1:1000000"]
+            if self.fragmented:
+                # Fragments start at least every FRAGMENT_SECONDS after any forced keyframe
+                periodic = f"if(isnan(prev_forced_t),1,gte(t,prev_forced_t+{FRAGMENT_SECONDS}))"
+                output_options += ["-force_key_frames", f"expr:max({periodic},{KEYFRAME_MARK_EXPR})"]
+            else:
+                output_options += ["-force_key_frames", f"expr:{KEYFRAME_MARK_EXPR}"]
+        elif self.fragmented:
+            output_options += ["-force_key_frames", f"expr:gte(t,n_forced*{FRAGMENT_SECONDS})"]
+        
+        if self.fragmented:
+            # Regular keyframes close a fragment each, and fragments go to disk as soon as they are complete
+            output_options += [
+                "-movflags", "+frag_keyframe+empty_moov+default_base_moof",
+                "-flush_packets", "1"
+            ]
+        
+        if self.vfr:
+            # Keep every frame at its capture time
+            output_options += ["-fps_mode", "vfr"]
+        else:
+            output_options += ["-r", str(self.fps)]
+        
+        output_file = output_file or self.output_file
+        cmd += output_options
+        cmd.append(output_file)
+        
+        if self.proxy_resolution:
+            # Second output from the same decoded input: small, fast to encode and quick to seek
+            cmd += ["-vf", ffmpeg_scale_filter(*self.proxy_resolution, "area")]
+            cmd += encoder_args("libx264", preset_count("libx264") - 1)
+            cmd += ["-g", str(max(1, round(self.fps * PROXY_KEYFRAME_SECONDS)))]
+            cmd += output_options
+            cmd.append(proxy_path(output_file))
+        return cmd
+    
+    def _frame_to_buffer(self, frame):
+        """Return a bytes-like view of the frame in the size ffmpeg expects"""
+        width, height = self._input_size()
+        
+        # MSS returns images in BGRA format, which is what ffmpeg expects,
+        # so a frame at the output resolution can be piped without copying
+        if frame.width == width and frame.height == height:
+            if self.zero_copy:
+                return memoryview(frame.raw)
+            return np.array(frame).tobytes()
+        
+        # Scale from an array view of the raw buffer (np.asarray does not copy)
+        output = self.scaler.scale(np.asarray(frame))
+        
+        if self.zero_copy:
+            return memoryview(output).cast("B")
+        return output.tobytes()
     
     def _has_nvidia(self):
         """Check if NVIDIA GPU is available"""
-        try:
-            ffmpeg_path = shutil.which("ffmpeg")
-            if not ffmpeg_path:
-                return False
-                
-            result = subprocess.run(
-                [ffmpeg_path, "-hide_banner", "-encoders"],
-                capture_output=True, text=True, check=True
-            )
-            return "h264_nvenc" in result.stdout
-        except:
-            return False
+        return self._ffmpeg_has_encoder("h264_nvenc")
     
     def _has_intel_qsv(self):
         """Check if Intel QuickSync is available"""
-        try:
-            ffmpeg_path = shutil.which("ffmpeg")
-            if not ffmpeg_path:
-                return False
-                
-            result = subprocess.run(
-                [ffmpeg_path, "-hide_banner", "-encoders"],
-                capture_output=True, text=True, check=True
-            )
-            return "h264_qsv" in result.stdout
-        except:
-            return False 
\ No newline at end of file
+        return self._ffmpeg_has_encoder("h264_qsv")
+    
+    def _ffmpeg_has_encoder(self, name):
+        """Check if ffmpeg lists an encoder (uncached, see encoders.probe_encoders)"""
+        ffmpeg_path = shutil.which("ffmpeg")
+        if not ffmpeg_path:
+            return False
+        return name in list_encoders(ffmpeg_path)
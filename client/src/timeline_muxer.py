@@ -5,10 +5,14 @@ import shutil
 import tempfile
 import zipfile
 from loguru import logger
-import mss  # Import mss to get screen resolution
+from frame_timestamps import FrameTimestampWriter, read_frame_timestamps, frame_index_at
+from monitors import monitor_at
+from capture_region import translate_events
+from frame_sources import open_frame_source
+from event_journal import iter_event_batches
 
 class TimelineMuxer:
-    def __init__(self):
+    def __init__(self, monitor=1, frame_source=None):
         self.running = False
         self.output_dir = os.path.join(os.environ.get('APPDATA', tempfile.gettempdir()), 'GAce')
         os.makedirs(self.output_dir, exist_ok=True)
@@ -16,13 +20,14 @@ class TimelineMuxer:
         self.recording_dir = None
         self.video_file = None
         self.events_file = None
+        self.frame_timestamps_file = None
+        self.monitors = []  # ScreenCapture.monitor_outputs() of the current recording
         
-        # Get actual screen resolution
-        with mss.mss() as sct:
-            monitor = sct.monitors[1]  # Primary monitor
-            self.screen_width = monitor["width"]
-            self.screen_height = monitor["height"]
-            logger.info(f"Detected screen resolution for metadata: {self.screen_width}x{self.screen_height}")
+        # Get actual screen resolution, from the recording's frame source when it is passed in
+        monitor = open_frame_source(frame_source).monitors[monitor]
+        self.screen_width = monitor["width"]
+        self.screen_height = monitor["height"]
+        logger.info(f"Detected screen resolution for metadata: {self.screen_width}x{self.screen_height}")
     
     def start(self):
         """Start a new recording session"""
@@ -54,6 +59,16 @@ class TimelineMuxer:
         self.events_file = events_path
         logger.info(f"Set events file: {events_path}")
     
+    def set_frame_timestamps_file(self, timestamps_path):
+        """Set the per-frame capture timestamp sidecar for the current recording"""
+        self.frame_timestamps_file = timestamps_path
+        logger.info(f"Set frame timestamps file: {timestamps_path}")
+    
+    def set_monitors(self, monitors):
+        """Set the monitors recorded, main video first, to package their videos and tag events"""
+        self.monitors = list(monitors)
+        logger.info(f"Set monitors: {[monitor['monitor'] for monitor in self.monitors]}")
+    
     def set_resolution(self, resolution):
         """Set the resolution for the recording metadata"""
         if isinstance(resolution, tuple) and len(resolution) == 2:
@@ -92,45 +107,268 @@ class TimelineMuxer:
             "fps": 10
         }
         
-        metadata_file = os.path.join(self.recording_dir, "metadata.json")
+        # Copy frame timestamps so the viewer can map event times to exact frames
+        frame_timestamps = self._load_frame_timestamps()
+        if frame_timestamps is not None:
+            shutil.copy2(self.frame_timestamps_file, os.path.join(self.recording_dir, "frame_times.bin"))
+            metadata["frame_timestamps"] = "frame_times.bin"
+            metadata["frame_count"] = len(frame_timestamps)
+        
+        # Videos of further monitors go next to the main one
+        if self.monitors:
+            metadata["monitors"] = self._package_monitors(self.recording_dir)
+        
+        # Low resolution proxy of the main video for scrubbing
+        proxy_file = None
+        if self.monitors and self.monitors[0].get("proxy"):
+            proxy_file = self._proxy(metadata, self.monitors[0]["proxy"], self.monitors[0]["proxy_resolution"])
+        
+        # Create normalized events file with aligned timestamps
+        events = self._normalize_events(frame_timestamps)
+        
+        zip_path = self._create_package(self.recording_dir, self.video_file, metadata, events, proxy_file)
+        logger.info(f"Created recording package: {zip_path}")
+        return zip_path
+    
+    def finalize_segment(self, segment, events):
+        """Package one finished segment of a segmented recording so it can be uploaded right away
+        
+        segment is the dict ScreenCapture hands to on_segment and events the input
+        events recorded between its start_ns and end_ns.
+        """
+        if not self.recording_id:
+            logger.error("Cannot finalize segment: No active recording")
+            return None
+        
+        if not os.path.exists(segment["file"]):
+            logger.error(f"Segment video file not found: {segment['file']}")
+            return None
+        
+        suffix = "" if segment.get("monitor", 1) == 1 else f"_monitor{segment['monitor']}"
+        segment_id = f"{self.recording_id}{suffix}_part{segment['index']:03d}"
+        segment_dir = os.path.join(self.output_dir, segment_id)
+        os.makedirs(segment_dir, exist_ok=True)
+        
+        # Everything in the package is timed from the start of the segment's video
+        start_ns = segment["start_ns"]
+        frame_timestamps = [t - start_ns for t in segment["frame_timestamps"]]
+        
+        timestamps_writer = FrameTimestampWriter(os.path.join(segment_dir, "frame_times.bin"))
+        for timestamp_ns in frame_timestamps:
+            timestamps_writer.append(timestamp_ns)
+        timestamps_writer.close()
+        
+        end_ns = segment["end_ns"] if segment["end_ns"] is not None else start_ns + (frame_timestamps[-1] if frame_timestamps else 0)
+        metadata = {
+            "id": segment_id,
+            "timestamp": time.time(),
+            "duration": (end_ns - start_ns) / 1_000_000_000,
+            "resolution": list(segment["resolution"]),
+            "fps": 10,
+            "frame_timestamps": "frame_times.bin",
+            "frame_count": len(frame_timestamps),
+            "segment": {
+                "recording_id": self.recording_id,
+                "index": segment["index"],
+                "start_ms": start_ns // 1_000_000,
+                "end_ms": end_ns // 1_000_000
+            }
+        }
+        
+        proxy_file = self._proxy(metadata, segment["proxy"], segment["proxy_resolution"]) if segment.get("proxy") else None
+        if segment.get("cursor_track"):
+            metadata["cursor_track"] = segment["cursor_track"]
+        
+        events = self._to_capture_region(self._tag_monitors(events))
+        events = [{**event, "t": event["t"] - start_ns} for event in events]
+        normalized = {
+            "meta": {
+                "fps": 10,
+                "resolution": list(segment["resolution"]),
+                "start_time": time.time()
+            },
+            "events": self._to_milliseconds(events, frame_timestamps)
+        }
+        
+        zip_path = self._create_package(segment_dir, segment["file"], metadata, normalized, proxy_file)
+        logger.info(f"Created segment package: {zip_path}")
+        return zip_path
+    
+    def finalize_recovered(self, video_file, info, frame_timestamps_file=None, events_file=None, frame_count=None):
+        """Package a video recovered from a recording that was interrupted by a crash
+        
+        info is the recording's in-progress marker. events_file is the input event
+        journal of the recording, whatever of it reached the disk; without one the
+        package has no events. frame_count is the number of frames in the recovered
+        video; frames the sidecar has timestamps for beyond it never reached the video.
+        """
+        # recording_<ts>.recovered.mp4 -> recording_<ts>_recovered
+        recording_id = os.path.splitext(os.path.basename(video_file))[0].replace(".", "_")
+        package_dir = os.path.join(self.output_dir, recording_id)
+        os.makedirs(package_dir, exist_ok=True)
+        
+        resolution = info.get("resolution", [self.screen_width, self.screen_height])
+        metadata = {
+            "id": recording_id,
+            "timestamp": info.get("started", time.time()),
+            "duration": 0.0,
+            "resolution": resolution,
+            "fps": info.get("fps", 10),
+            "recovered": True
+        }
+        
+        frame_timestamps = None
+        if frame_timestamps_file and os.path.exists(frame_timestamps_file):
+            try:
+                frame_timestamps = read_frame_timestamps(frame_timestamps_file)
+            except Exception as e:
+                logger.error(f"Error reading frame timestamps: {e}")
+        
+        if frame_timestamps and frame_count is not None and len(frame_timestamps) > frame_count:
+            logger.warning(f"Only {frame_count} of {len(frame_timestamps)} frames reached {video_file}")
+            frame_timestamps = frame_timestamps[:frame_count]
+        
+        if frame_timestamps:
+            writer = FrameTimestampWriter(os.path.join(package_dir, "frame_times.bin"))
+            for timestamp_ns in frame_timestamps:
+                writer.append(timestamp_ns)
+            writer.close()
+            metadata["duration"] = frame_timestamps[-1] / 1_000_000_000
+            metadata["frame_timestamps"] = "frame_times.bin"
+            metadata["frame_count"] = len(frame_timestamps)
+        
+        events = {"meta": {"fps": metadata["fps"], "resolution": resolution, "start_time": metadata["timestamp"]}, "events": []}
+        if events_file and os.path.exists(events_file):
+            events["events"] = self._read_events(events_file, lambda batch: self._to_milliseconds(batch, frame_timestamps))
+        
+        zip_path = self._create_package(package_dir, video_file, metadata, events)
+        logger.info(f"Created recovered recording package: {zip_path}")
+        return zip_path
+    
+    def _package_monitors(self, package_dir):
+        """Copy the videos of monitors after the first into package_dir and describe them all"""
+        described = []
+        for position, monitor in enumerate(self.monitors):
+            entry = {key: monitor[key] for key in ("monitor", "left", "top", "width", "height", "resolution")}
+            if monitor.get("region_track"):
+                # Only part of the desktop was captured, event positions are relative to it
+                entry["region_track"] = [[t_ns // 1_000_000, left, top] for t_ns, left, top in monitor["region_track"]]
+            if monitor.get("cursor_track"):
+                # Pointer positions in video coordinates, delta-encoded
+                entry["cursor_track"] = monitor["cursor_track"].export()
+            if position == 0:
+                entry["video"] = "video.mp4"
+                described.append(entry)
+                continue
+            
+            if not monitor["video"] or not os.path.exists(monitor["video"]):
+                logger.error(f"Video file not found for monitor {monitor['monitor']}: {monitor['video']}")
+                continue
+            
+            entry["video"] = f"video_monitor{monitor['monitor']}.mp4"
+            shutil.copy2(monitor["video"], os.path.join(package_dir, entry["video"]))
+            if monitor["frame_timestamps"] and os.path.exists(monitor["frame_timestamps"]):
+                entry["frame_timestamps"] = f"frame_times_monitor{monitor['monitor']}.bin"
+                shutil.copy2(monitor["frame_timestamps"], os.path.join(package_dir, entry["frame_timestamps"]))
+            described.append(entry)
+        return described
+    
+    def _tag_monitors(self, events):
+        """Tag events that have a screen position with the recorded monitor it falls on"""
+        if not self.monitors:
+            return events
+        
+        for event in events:
+            # Drags are tagged where they started
+            x, y = event.get("x", event.get("start_x")), event.get("y", event.get("start_y"))
+            if x is not None and y is not None:
+                event["monitor"] = monitor_at(self.monitors, x, y)
+        return events
+    
+    def _to_capture_region(self, events):
+        """Translate event positions into the video's coordinates when only a region was captured"""
+        if not self.monitors or not self.monitors[0].get("region_track"):
+            return events
+        return translate_events(events, self.monitors[0]["region_track"])
+    
+    def _proxy(self, metadata, proxy_file, resolution):
+        """Describe the proxy video in metadata if ffmpeg wrote it; returns the file to package"""
+        if not os.path.exists(proxy_file):
+            logger.error(f"Proxy video file not found: {proxy_file}")
+            return None
+        
+        metadata["proxy"] = {"video": "proxy.mp4", "resolution": list(resolution)}
+        return proxy_file
+    
+    def _create_package(self, package_dir, video_file, metadata, events, proxy_file=None):
+        """Write metadata, events and video into package_dir and zip it up next to it"""
+        metadata_file = os.path.join(package_dir, "metadata.json")
         with open(metadata_file, 'w') as f:
             json.dump(metadata, f, indent=2)
         
-        # Create normalized events file with aligned timestamps
-        events = self._normalize_events()
-        events_output = os.path.join(self.recording_dir, "events.json")
+        events_output = os.path.join(package_dir, "events.json")
         with open(events_output, 'w') as f:
-            json.dump(events, f, indent=2)
+            self._write_events(f, events)
         
         # Copy video file
-        video_output = os.path.join(self.recording_dir, "video.mp4")
-        shutil.copy2(self.video_file, video_output)
+        video_output = os.path.join(package_dir, "video.mp4")
+        shutil.copy2(video_file, video_output)
+        if proxy_file:
+            shutil.copy2(proxy_file, os.path.join(package_dir, "proxy.mp4"))
         
         # Create ZIP package
-        zip_path = os.path.join(self.output_dir, f"{self.recording_id}.zip")
+        zip_path = f"{package_dir}.zip"
         with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, _, files in os.walk(self.recording_dir):
+            for root, _, files in os.walk(package_dir):
                 for file in files:
                     file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, self.recording_dir)
+                    arcname = os.path.relpath(file_path, package_dir)
                     zipf.write(file_path, arcname)
         
-        logger.info(f"Created recording package: {zip_path}")
         return zip_path
     
+    def _write_events(self, f, events):
+        """Write an events.json one event per line, taking events["events"] from any iterable
+        
+        Events normalized from a journal come from a generator, so only one batch of
+        them is in memory at a time instead of the whole recording.
+        """
+        f.write("{\n")
+        for key, value in events.items():
+            if key != "events":
+                f.write(f"  {json.dumps(key)}: {json.dumps(value)},\n")
+        f.write('  "events": [')
+        separator = "\n    "
+        for event in events.get("events", []):
+            f.write(separator + json.dumps(event))
+            separator = ",\n    "
+        f.write("\n  ]\n}\n")
+    
+    def _read_events(self, events_file, convert):
+        """Events of events_file passed through convert a batch at a time"""
+        try:
+            for batch in iter_event_batches(events_file):
+                yield from convert(batch)
+        except Exception as e:
+            # The package keeps the events converted so far
+            logger.error(f"Error reading events from {events_file}: {e}")
+    
     def _calculate_duration(self):
         """Calculate recording duration from events"""
         try:
             if self.events_file and os.path.exists(self.events_file):
-                with open(self.events_file, 'r') as f:
-                    data = json.load(f)
+                # Read a batch at a time; events are only roughly in time order, so take the extremes
+                first_ns = last_ns = None
+                count = 0
+                for batch in iter_event_batches(self.events_file):
+                    times = [event["t"] for event in batch]
+                    first_ns = min(times) if first_ns is None else min(first_ns, *times)
+                    last_ns = max(times) if last_ns is None else max(last_ns, *times)
+                    count += len(batch)
                 
-                if "events" in data and len(data["events"]) > 1:
-                    first_event = data["events"][0]
-                    last_event = data["events"][-1]
-                    
+                if count > 1:
                     # Convert nanoseconds to seconds
-                    duration_ns = last_event["t"] - first_event["t"]
+                    duration_ns = last_ns - first_ns
                     return duration_ns / 1_000_000_000
             
             # Fallback: estimate based on 10 fps and expected number of frames
@@ -139,34 +377,45 @@ class TimelineMuxer:
             logger.error(f"Error calculating duration: {e}")
             return 0.0
     
-    def _normalize_events(self):
-        """Normalize event timestamps to start from 0 and convert to milliseconds"""
+    def _load_frame_timestamps(self):
+        """Load the frame timestamp sidecar, or None if there isn't a usable one"""
+        if not self.frame_timestamps_file or not os.path.exists(self.frame_timestamps_file):
+            return None
+        
         try:
-            if not self.events_file or not os.path.exists(self.events_file):
-                return {"events": []}
-            
-            with open(self.events_file, 'r') as f:
-                data = json.load(f)
-            
-            if "events" not in data or not data["events"]:
-                return {"meta": {"fps": 10, "resolution": [self.screen_width, self.screen_height]}, "events": []}
-            
-            events = data["events"]
-            
-            # Convert timestamps from nanoseconds to milliseconds
-            # But don't renormalize to zero - InputLogger already records relative to start time
-            for event in events:
-                # Convert from ns to ms (keep existing relative timestamps)
-                event["t"] = int(event["t"] / 1_000_000)
-            
-            return {
-                "meta": {
-                    "fps": 10,
-                    "resolution": [self.screen_width, self.screen_height],
-                    "start_time": time.time()
-                },
-                "events": events
-            }
+            return read_frame_timestamps(self.frame_timestamps_file)
         except Exception as e:
-            logger.error(f"Error normalizing events: {e}")
-            return {"meta": {"fps": 10, "resolution": [self.screen_width, self.screen_height]}, "events": []} 
\ No newline at end of file
+            logger.error(f"Error reading frame timestamps: {e}")
+            return None
+    
+    def _normalize_events(self, frame_timestamps=None):
+        """Normalize event timestamps to start from 0 and convert to milliseconds
+        
+        The events are a generator that reads the events file as it's consumed.
+        """
+        if not self.events_file or not os.path.exists(self.events_file):
+            return {"events": []}
+        
+        # Don't renormalize to zero - InputLogger already records relative to start time
+        def convert(batch):
+            return self._to_milliseconds(self._to_capture_region(self._tag_monitors(batch)), frame_timestamps)
+        
+        return {
+            "meta": {
+                "fps": 10,
+                "resolution": [self.screen_width, self.screen_height],
+                "start_time": time.time()
+            },
+            "events": self._read_events(self.events_file, convert)
+        }
+    
+    def _to_milliseconds(self, events, frame_timestamps=None):
+        """Convert event timestamps from nanoseconds to milliseconds in place"""
+        for event in events:
+            # Tag the frame on screen when the event happened
+            if frame_timestamps:
+                event["frame"] = frame_index_at(frame_timestamps, event["t"])
+            
+            # Convert from ns to ms (keep existing relative timestamps)
+            event["t"] = int(event["t"] / 1_000_000)
+        return events 
\ No newline at end of file
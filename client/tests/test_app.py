@@ -131,6 +131,21 @@ class TestRecorderApp:
         assert app.uploader.upload_recording.called
         assert app.uploader.upload_recording.call_args[0][0] == "recording.zip"
     
+    def test_segment_finished(self, app):
+        """Test a finished segment is packaged with its events and uploaded"""
+        app.input_logger = MagicMock()
+        app.timeline_muxer = MagicMock()
+        app.uploader = MagicMock()
+        app.input_logger.events_between.return_value = [{"t": 5, "kind": "scroll"}]
+        app.timeline_muxer.finalize_segment.return_value = "segment.zip"
+        
+        segment = {"index": 0, "start_ns": 0, "end_ns": 300_000_000_000}
+        app.on_segment_finished(segment)
+        
+        app.input_logger.events_between.assert_called_once_with(0, 300_000_000_000)
+        app.timeline_muxer.finalize_segment.assert_called_once_with(segment, [{"t": 5, "kind": "scroll"}])
+        app.uploader.upload_recording.assert_called_once_with("segment.zip")
+    
     def test_exit_app(self, app):
         """Test exiting the app"""
         # Setup mocks
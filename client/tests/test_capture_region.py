@@ -0,0 +1,70 @@
+import os
+import pytest
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.capture_region import parse_region, clamp_region, translate_events, RegionFollower
+
+DESKTOP = {"left": 0, "top": 0, "width": 1920, "height": 1080}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestCaptureRegion:
+    def test_parse_region(self):
+        """Test regions can be given as dicts or (left, top, width, height)"""
+        expected = {"left": 10, "top": 20, "width": 300, "height": 200}
+        assert parse_region((10, 20, 300, 200)) == expected
+        assert parse_region({**expected, "title": "ignored"}) == expected
+
+    def test_clamp_region(self):
+        """Test regions are moved inside the desktop and get an even size"""
+        assert clamp_region({"left": 1800, "top": -50, "width": 301, "height": 199}, DESKTOP) == \
+            {"left": 1620, "top": 0, "width": 300, "height": 198}
+        assert clamp_region({"left": 0, "top": 0, "width": 4000, "height": 2000}, DESKTOP) == DESKTOP
+
+        with pytest.raises(ValueError):
+            clamp_region({"left": 0, "top": 0, "width": 1, "height": 100}, DESKTOP)
+
+    def test_translate_events(self):
+        """Test event positions become relative to where the region was at the time"""
+        track = [[0, 100, 50], [2_000, 400, 300]]
+        events = translate_events([
+            {"t": 1_000, "kind": "mouse_down", "x": 150, "y": 60},
+            {"t": 2_000, "kind": "drag_end", "start_x": 400, "start_y": 300, "end_x": 500, "end_y": 310},
+            {"t": 3_000, "kind": "key_down", "key": "a"}
+        ], track)
+
+        assert (events[0]["x"], events[0]["y"]) == (50, 10)
+        assert (events[1]["start_x"], events[1]["start_y"], events[1]["end_x"], events[1]["end_y"]) == (0, 0, 100, 10)
+        assert events[2] == {"t": 3_000, "kind": "key_down", "key": "a"}
+
+    def test_follower(self):
+        """Test the region follows the window at most every interval, keeping its size"""
+        clock = FakeClock()
+        window = {"left": 100, "top": 100, "width": 640, "height": 480}
+        follower = RegionFollower(lambda: window, clamp_region(window, DESKTOP), DESKTOP, interval=0.5, clock=clock)
+        follower.reset()
+
+        assert follower.update(0) == (window, False)
+
+        window = {"left": 1500, "top": 200, "width": 800, "height": 600}
+        clock.now = 0.2
+        assert follower.update(200)[1] is False  # Not checked again yet
+
+        clock.now = 0.6
+        region, moved = follower.update(600)
+        assert moved is True
+        assert region == {"left": 1280, "top": 200, "width": 640, "height": 480}
+        assert follower.track == [[0, 100, 100], [600, 1280, 200]]
+
+        # A minimized window leaves the region where it was
+        window = None
+        clock.now = 1.2
+        assert follower.update(1200) == (region, False)
@@ -0,0 +1,82 @@
+import os
+import pytest
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from src.change_detector import ChangeDetector
+
+class TestChangeDetector:
+    @pytest.fixture
+    def frame(self):
+        """Create a random BGRA frame that doesn't divide evenly into tiles"""
+        rng = np.random.default_rng(0)
+        return rng.integers(0, 256, (100, 150, 4), dtype=np.uint8)
+    
+    def test_first_frame_changed(self, frame):
+        """Test the first frame is reported as fully changed"""
+        detector = ChangeDetector(tile_size=64)
+        dirty = detector.update(frame)
+        
+        assert dirty.shape == (2, 3)
+        assert dirty.all()
+        assert np.array_equal(detector.reference, frame)
+    
+    def test_unchanged_frame(self, frame):
+        """Test an identical frame reports no changes"""
+        detector = ChangeDetector(tile_size=64)
+        detector.update(frame)
+        
+        assert detector.changed(frame.copy()) is False
+    
+    def test_changed_tile(self, frame):
+        """Test a single-pixel change marks only its tile and updates the reference"""
+        detector = ChangeDetector(tile_size=64)
+        detector.update(frame)
+        
+        changed = frame.copy()
+        changed[70, 140, 2] ^= 0xFF
+        dirty = detector.update(changed)
+        
+        assert np.argwhere(dirty).tolist() == [[1, 2]]
+        assert np.array_equal(detector.reference, changed)
+        assert detector.changed(changed) is False
+    
+    def test_reset(self, frame):
+        """Test resetting makes the next frame count as changed"""
+        detector = ChangeDetector()
+        detector.update(frame)
+        detector.reset()
+        
+        assert detector.changed(frame) is True
+    
+    def test_sampled_comparison(self, frame):
+        """Test sampling only sees changes on sampled pixels"""
+        detector = ChangeDetector(tile_size=64, sample_step=4)
+        detector.update(frame)
+        
+        changed = frame.copy()
+        changed[1, 1] ^= 0xFF
+        assert detector.changed(changed) is False
+        
+        changed[4, 4] ^= 0xFF
+        assert detector.changed(changed) is True
+    
+    def test_update_region(self, frame):
+        """Test a tile-aligned region is compared and merged into the reference"""
+        detector = ChangeDetector(tile_size=64)
+        
+        with pytest.raises(ValueError):
+            detector.update_region(frame[64:, 64:], 1, 1)
+        
+        detector.update(frame)
+        
+        changed = frame.copy()
+        changed[80, 100] = 0
+        dirty = detector.update_region(np.ascontiguousarray(changed[64:, 64:]), 1, 1)
+        
+        assert np.argwhere(dirty).tolist() == [[1, 1]]
+        assert np.array_equal(detector.reference, changed)
@@ -0,0 +1,57 @@
+import os
+import pytest
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from src.cursor_track import CursorTrack, composite_cursor, decode_cursor_track, CURSOR_OUTLINE
+
+MS = 1_000_000
+
+class TestCursorTrack:
+    def test_sample_rate_limited(self):
+        """Test samples are taken at most every interval and only when the pointer moved"""
+        track = CursorTrack(interval=0.05)
+        assert track.sample(0, 10, 10) is True
+        assert track.sample(20 * MS, 50, 50) is False  # Too soon
+        assert track.sample(60 * MS, 10, 10) is False  # Didn't move
+        assert track.sample(80 * MS, 12, 9) is True
+        assert track.samples == 2
+        assert track.last == (80 * MS, 12, 9)
+
+    def test_export_delta_encoded(self):
+        """Test the export is delta-encoded in ms and decodes back to the samples"""
+        track = CursorTrack(interval=0.05)
+        for t_ms, x, y in ((0, 100, 200), (100, 110, 190), (250, 300, 190), (400, 290, 180)):
+            track.sample(t_ms * MS, x, y)
+
+        exported = track.export()
+        assert exported == {"interval_ms": 50, "t": [0, 100, 150, 150], "x": [100, 10, 190, -10], "y": [200, -10, 0, -10]}
+        assert decode_cursor_track(exported) == [[0, 100, 200], [100, 110, 190], [250, 300, 190], [400, 290, 180]]
+
+    def test_export_range(self):
+        """Test a time range starts with the position at its start and is timed from there"""
+        track = CursorTrack(interval=0.05)
+        for t_ms, x, y in ((0, 100, 200), (100, 110, 190), (250, 300, 190), (400, 290, 180)):
+            track.sample(t_ms * MS, x, y)
+
+        assert decode_cursor_track(track.export(200 * MS, 400 * MS)) == [[0, 110, 190], [50, 300, 190]]
+        assert decode_cursor_track(CursorTrack().export()) == []
+
+    def test_composite_cursor(self):
+        """Test the pointer is drawn with its hotspot at the position and clipped to the frame"""
+        frame = np.zeros((40, 40, 4), dtype=np.uint8)
+        assert composite_cursor(frame, 5, 5) is True
+        assert tuple(frame[5, 5]) == (0, 0, 0, 255)  # Hotspot is outline
+        assert tuple(frame[7, 6]) == (255, 255, 255, 255)  # Fill
+        assert not frame[:5].any() and not frame[:, :5].any()
+
+        frame = np.zeros((40, 40, 4), dtype=np.uint8)
+        assert composite_cursor(frame, 35, -5) is True
+        assert frame[:, 35:].any() and not frame[:, :35].any()
+
+        assert composite_cursor(frame, 40, 0) is False
+        assert composite_cursor(frame, -CURSOR_OUTLINE.shape[1], 0) is False
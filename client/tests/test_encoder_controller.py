@@ -0,0 +1,91 @@
+import os
+import pytest
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.encoder_controller import EncoderController, encoder_levels, scaled_resolution
+
+class FakeClock:
+    """Clock in seconds that only advances when told to"""
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def run_window(controller, clock, load, backlog=0.0, dropped=0, frames=8):
+    """Feed one second of frames spending `load` of it writing, return whether the level changed"""
+    changed = False
+    for _ in range(frames):
+        clock.now += 1.0 / frames
+        changed |= controller.record(int(load * 1_000_000_000 / frames), backlog, dropped)
+    return changed
+
+class TestEncoderController:
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def controller(self, clock):
+        return EncoderController(encoder_levels(3), window=1.0, recover_windows=2, clock=clock)
+
+    def test_levels(self):
+        """Test presets speed up first, then the resolution drops"""
+        assert encoder_levels(3) == [(0, 1.0), (1, 1.0), (2, 1.0), (2, 0.75), (2, 0.5)]
+        assert scaled_resolution((1366, 768), 0.75) == (1024, 576)
+        assert scaled_resolution((1920, 1080), 0.5) == (960, 540)
+
+    def test_steady(self, controller, clock):
+        """Test an encoder that keeps up stays at the best level"""
+        for _ in range(5):
+            assert not run_window(controller, clock, load=0.5)
+        assert controller.level == 0
+        assert controller.stats()["changes"] == 0
+
+    def test_backpressure_steps_down(self, controller, clock):
+        """Test a pipe that blocks most of the time selects a faster level"""
+        assert run_window(controller, clock, load=0.95)
+        assert controller.setting == (1, 1.0)
+
+        decision = controller.decisions[-1]
+        assert decision["trigger"] == "write_load"
+        assert decision["from"] == 0 and decision["to"] == 1
+        assert decision["write_load"] == pytest.approx(0.95)
+
+    def test_backlog_and_drops_step_down(self, controller, clock):
+        """Test waiting frames and dropped frames are triggers too"""
+        assert run_window(controller, clock, load=0.1, backlog=0.5)
+        assert controller.decisions[-1]["trigger"] == "backlog"
+
+        run_window(controller, clock, load=0.1, dropped=0)
+        assert run_window(controller, clock, load=0.1, dropped=3)
+        assert controller.decisions[-1]["trigger"] == "drops"
+        assert controller.decisions[-1]["drops"] == 3
+        assert controller.level == 2
+
+    def test_lowest_level(self, controller, clock):
+        """Test the controller stops at the cheapest level"""
+        for _ in range(10):
+            run_window(controller, clock, load=0.99)
+        assert controller.setting == (2, 0.5)
+        assert controller.stats()["changes"] == 4
+
+    def test_headroom_steps_up(self, controller, clock):
+        """Test a better level comes back only after enough calm windows"""
+        run_window(controller, clock, load=0.95)
+        assert controller.level == 1
+
+        assert not run_window(controller, clock, load=0.1)
+        assert run_window(controller, clock, load=0.1)
+        assert controller.level == 0
+        assert controller.decisions[-1]["trigger"] == "headroom"
+
+        # Moderate load neither steps down nor counts as headroom
+        run_window(controller, clock, load=0.95)
+        run_window(controller, clock, load=0.1)
+        run_window(controller, clock, load=0.5)
+        assert not run_window(controller, clock, load=0.1)
+        assert controller.level == 1
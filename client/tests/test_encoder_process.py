@@ -0,0 +1,72 @@
+import os
+import shutil
+import pytest
+from functools import partial
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from mss.screenshot import ScreenShot
+
+from src.frame_pool import FramePool
+from src.encoder_process import SharedFrameSlot, EncoderProcess
+
+class TestEncoderProcess:
+    @pytest.fixture
+    def frame(self):
+        """Create a small BGRA screenshot for testing"""
+        return ScreenShot.from_size(bytearray(b"\x01\x02\x03\xff" * (8 * 4)), 8, 4)
+
+    @pytest.fixture
+    def pool(self):
+        """Create a frame pool of shared memory slots and free them afterwards"""
+        pool = FramePool(depth=2, slot_factory=partial(SharedFrameSlot, capacity=8 * 4 * 4))
+        yield pool
+        for slot in pool.slots:
+            slot.close()
+
+    def test_shared_slot_fill(self, pool, frame):
+        """Test a frame copied into shared memory reads back through the slot and its block"""
+        slot = pool.acquire()
+        slot.fill(frame, 42)
+
+        assert isinstance(slot, SharedFrameSlot)
+        assert (slot.width, slot.height, slot.timestamp_ns) == (8, 4, 42)
+        assert np.array_equal(np.asarray(slot), np.asarray(frame))
+        assert bytes(slot.shm.buf[:4]) == b"\x01\x02\x03\xff"
+
+    def test_shared_slot_too_large(self, pool):
+        """Test a frame larger than the shared memory block is rejected"""
+        slot = pool.acquire()
+
+        with pytest.raises(ValueError):
+            slot.fill(np.zeros((8, 8, 4), dtype=np.uint8), 0)
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg not installed")
+    def test_encode_in_process(self, pool, tmp_path):
+        """Test frames in shared memory are scaled and piped to ffmpeg by the encoder process"""
+        output_file = str(tmp_path / "out.raw")
+        cmd = [
+            shutil.which("ffmpeg"), "-y", "-loglevel", "error", "-f", "rawvideo", "-pixel_format", "bgra",
+            "-video_size", "4x2", "-i", "-", "-f", "rawvideo", output_file
+        ]
+        frames = [np.full((4, 8, 4), value, dtype=np.uint8) for value in (10, 200)]
+
+        encoder_process = EncoderProcess(pool.slots)
+        try:
+            encoder = encoder_process.open(cmd, (4, 2))
+            for i, frame in enumerate(frames):
+                slot = pool.acquire()
+                slot.fill(frame, i)
+                assert encoder.write_frame(slot, i) >= 0
+                pool.release(slot)
+
+            encoder.stdin.close()
+            assert encoder.wait(timeout=10.0) == 0
+        finally:
+            encoder_process.stop()
+
+        data = open(output_file, 'rb').read()
+        assert data == bytes([10]) * 32 + bytes([200]) * 32
@@ -0,0 +1,93 @@
+import os
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import encoders
+
+# Trimmed `ffmpeg -hide_banner -encoders` output from a build with NVENC and QSV but no GPU
+ENCODER_LISTING = """Encoders:
+ V..... = Video
+ A..... = Audio
+ ------
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10 (codec h264)
+ V....D h264_nvenc           NVIDIA NVENC H.264 encoder (codec h264)
+ V..... h264_qsv             H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10 (Intel Quick Sync Video acceleration) (codec h264)
+ A....D aac                  AAC (Advanced Audio Coding)
+"""
+
+class TestEncoders:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Reset the cached probes between tests"""
+        encoders.probe_encoders.cache_clear()
+        encoders.encoder_works.cache_clear()
+        yield
+        encoders.probe_encoders.cache_clear()
+        encoders.encoder_works.cache_clear()
+    
+    @pytest.fixture
+    def mock_run(self):
+        """Stub ffmpeg: list encoders, and only let libx264 and QSV open"""
+        def run(cmd, **kwargs):
+            result = MagicMock()
+            result.stdout = ENCODER_LISTING
+            result.returncode = 0
+            if "-c:v" in cmd and cmd[cmd.index("-c:v") + 1] != "h264_qsv":
+                result.returncode = 1
+            return result
+        
+        with patch('src.encoders.subprocess.run', side_effect=run) as mock:
+            yield mock
+    
+    def test_parse_encoder_names(self):
+        """Test encoder names are parsed from the listing, skipping the legend"""
+        assert encoders.parse_encoder_names(ENCODER_LISTING) == {"libx264", "h264_nvenc", "h264_qsv", "aac"}
+    
+    def test_probe_cached(self, mock_run):
+        """Test ffmpeg is only asked for its encoders once"""
+        assert "h264_nvenc" in encoders.probe_encoders("ffmpeg")
+        assert "h264_nvenc" in encoders.probe_encoders("ffmpeg")
+        assert mock_run.call_count == 1
+    
+    def test_select_skips_unusable_hardware(self, mock_run):
+        """Test NVENC is skipped when it can't open and QSV is picked instead"""
+        assert encoders.select_encoder("ffmpeg") == "h264_qsv"
+        
+        # The trial encodes are cached too
+        calls = mock_run.call_count
+        assert encoders.select_encoder("ffmpeg") == "h264_qsv"
+        assert mock_run.call_count == calls
+    
+    def test_select_falls_back_to_cpu(self):
+        """Test libx264 is used when ffmpeg can't be probed"""
+        with patch('src.encoders.subprocess.run', side_effect=Exception("Command failed")):
+            assert encoders.select_encoder("ffmpeg") == "libx264"
+    
+    def test_select_preferred(self, mock_run):
+        """Test an explicitly requested encoder is used if ffmpeg has it"""
+        assert encoders.select_encoder("ffmpeg", "libx264") == "libx264"
+        assert encoders.select_encoder("ffmpeg", "h264_amf") == "h264_qsv"
+    
+    def test_encoder_args(self):
+        """Test profiles expand to codec, tuning and pixel format arguments"""
+        args = encoders.encoder_args("h264_qsv")
+        
+        assert args[:2] == ["-c:v", "h264_qsv"]
+        assert args[-2:] == ["-pix_fmt", "nv12"]
+        assert "-crf" in encoders.encoder_args("libx264")
+    
+    def test_encoder_args_speed(self):
+        """Test speed steps select faster presets and stop at the fastest"""
+        args = encoders.encoder_args("libx264")
+        assert args[args.index("-preset") + 1] == "medium"
+        
+        args = encoders.encoder_args("libx264", speed=2)
+        assert args[args.index("-preset") + 1] == "veryfast"
+        
+        args = encoders.encoder_args("h264_amf", speed=10)
+        assert args[args.index("-quality") + 1] == "speed"
+        assert encoders.preset_count("h264_amf") == 2
@@ -0,0 +1,68 @@
+import os
+import json
+import pytest
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.event_journal import EventJournal, iter_journal, journal_sealed, iter_event_batches
+
+class TestEventJournal:
+    def test_write_and_seal(self, tmp_path):
+        """Test events are written one per line between the meta and sealed lines"""
+        path = str(tmp_path / "events_1.jsonl")
+        journal = EventJournal(path)
+        journal.write([(100, "key_down", {"key": "a"}), (200, "scroll", {"x": 1, "y": 2, "dx": 0, "dy": -1})])
+        assert not journal_sealed(path)
+        journal.seal()
+
+        with open(path) as f:
+            lines = [json.loads(line) for line in f]
+        assert lines[0]["meta"]["type"] == "input_events"
+        assert lines[-1]["sealed"]["events"] == 2
+        assert list(iter_journal(path)) == [
+            {"t": 100, "kind": "key_down", "key": "a"},
+            {"t": 200, "kind": "scroll", "x": 1, "y": 2, "dx": 0, "dy": -1}
+        ]
+        assert journal_sealed(path)
+
+    def test_flushed_periodically(self, tmp_path):
+        """Test written events reach the file once flush_interval has passed"""
+        path = str(tmp_path / "events_1.jsonl")
+        journal = EventJournal(path, flush_interval=3600)
+        journal.write([(100, "key_down", {"key": "a"})])
+        assert list(iter_journal(path)) == []
+
+        journal.flush_interval = 0
+        journal.write([(200, "key_up", {"key": "a"})])
+        assert [event["t"] for event in iter_journal(path)] == [100, 200]
+
+        # Input went quiet after an event; the next empty drain still flushes it
+        journal.flush_interval = 3600
+        journal.write([(300, "key_down", {"key": "b"})])
+        journal.flush_interval = 0
+        journal.write([])
+        assert [event["t"] for event in iter_journal(path)] == [100, 200, 300]
+        journal.seal()
+
+    def test_truncated_journal(self, tmp_path):
+        """Test a journal cut off by a crash is read up to its last complete line"""
+        path = tmp_path / "events_1.jsonl"
+        path.write_text('{"meta":{"type":"input_events"}}\n{"t":1,"kind":"key_down","key":"a"}\n{"t":2,"ki')
+
+        assert list(iter_journal(str(path))) == [{"t": 1, "kind": "key_down", "key": "a"}]
+        assert not journal_sealed(str(path))
+
+    def test_event_batches(self, tmp_path):
+        """Test journals and old events.json files are both read in batches"""
+        journal = EventJournal(str(tmp_path / "events_1.jsonl"))
+        journal.write([(t, "key_down", {"key": "a"}) for t in range(5)])
+        journal.seal()
+
+        legacy = tmp_path / "events_1.json"
+        legacy.write_text(json.dumps({"meta": {}, "events": [{"t": t, "kind": "key_down", "key": "a"} for t in range(5)]}))
+
+        for path in (journal.path, str(legacy)):
+            batches = list(iter_event_batches(path, batch_size=2))
+            assert [[event["t"] for event in batch] for batch in batches] == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,54 @@
+import os
+import json
+import pytest
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.event_store import EventStore
+
+EVENTS = [
+    {"t": 0, "kind": "mouse_down", "button": "left", "x": 100, "y": 200},
+    {"t": 10, "kind": "key_down", "key": "a"},
+    {"t": 20, "kind": "scroll", "x": 1.5, "y": 2.5, "dx": 0, "dy": -1},
+    {"t": 30, "kind": "key_down", "key": "b"},
+    {"t": 40, "kind": "drag_end", "button": "left", "start_x": 100, "start_y": 200, "end_x": 300, "end_y": 210,
+     "duration_ns": 123_456_789},
+    {"t": 50, "kind": "custom", "pressed": True, "data": None, "huge": 2 ** 70},
+    {"t": 60, "kind": "marker"}
+]
+
+class TestEventStore:
+    def test_round_trip(self):
+        """Test events come out exactly as they went in, field order and types included"""
+        store = EventStore.from_events(EVENTS)
+        assert len(store) == len(EVENTS)
+        assert store.to_list() == EVENTS
+        assert json.dumps(store.to_list()) == json.dumps(EVENTS)
+        assert store[-1] == {"t": 60, "kind": "marker"}
+        assert store[5]["pressed"] is True
+
+        with pytest.raises(IndexError):
+            store[len(EVENTS)]
+
+    def test_interned_tables(self):
+        """Test events of one layout share a table and strings are stored once"""
+        store = EventStore.from_events(EVENTS)
+        assert store.table[1] == store.table[3]
+        assert store.table[0] != store.table[4]
+        assert store.row[3] == 1
+        assert store._strings.count("left") == 1
+
+        # Key presses take the index columns plus one interned string column
+        store = EventStore()
+        for i in range(1000):
+            store.append(i, "key_down", {"key": "a"})
+        assert store.nbytes == 1000 * (8 + 2 + 4 + 4)
+
+    def test_between(self):
+        """Test events are selected by time range in logging order, even slightly out of time order"""
+        store = EventStore.from_events([{"t": t, "kind": "scroll"} for t in (0, 100, 250, 200, 300)])
+        assert [e["t"] for e in store.between(100, 300)] == [100, 250, 200]
+        assert [e["t"] for e in store.between(250)] == [250, 300]
+        assert EventStore().between(0) == []
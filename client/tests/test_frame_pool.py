@@ -0,0 +1,86 @@
+import os
+import time
+import queue
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from mss.screenshot import ScreenShot
+
+from src.frame_pool import FramePool
+
+class TestFramePool:
+    @pytest.fixture
+    def frame(self):
+        """Create a small BGRA screenshot for testing"""
+        return ScreenShot.from_size(bytearray(b"\x01\x02\x03\xff" * (8 * 4)), 8, 4)
+    
+    def test_initialization(self):
+        """Test initialization of FramePool"""
+        pool = FramePool(depth=3)
+        
+        assert len(pool.slots) == 3
+        assert pool.empty() is True
+        assert pool.stats() == {"depth": 3, "dropped": 0, "reused": 0, "late": 0}
+        
+        with pytest.raises(ValueError):
+            FramePool(depth=0)
+    
+    def test_fill_and_get(self, frame):
+        """Test a filled slot reaches the consumer with its data"""
+        pool = FramePool(depth=2)
+        
+        slot = pool.acquire()
+        slot.fill(frame, 42)
+        pool.put(slot)
+        
+        assert pool.empty() is False
+        received = pool.get(timeout=0.1)
+        assert received is slot
+        assert received.timestamp_ns == 42
+        assert (received.width, received.height) == (8, 4)
+        assert np.array_equal(np.asarray(received), np.asarray(frame))
+    
+    def test_dropped_when_exhausted(self, frame):
+        """Test frames are counted as dropped when every slot is in use"""
+        pool = FramePool(depth=1)
+        
+        slot = pool.acquire()
+        assert pool.acquire() is None
+        assert pool.stats()["dropped"] == 1
+        
+        pool.release(slot)
+        assert pool.acquire() is slot
+    
+    def test_slot_buffers_reused(self, frame):
+        """Test slots keep their buffers across frames"""
+        pool = FramePool(depth=1)
+        
+        slot = pool.acquire()
+        slot.fill(frame, 1)
+        buffer = slot.raw
+        pool.release(slot)
+        
+        slot = pool.acquire()
+        slot.fill(frame, 2)
+        
+        assert slot.raw is buffer
+        assert pool.stats()["reused"] == 1
+    
+    def test_late_frames(self, frame):
+        """Test frames waiting longer than the threshold are counted as late"""
+        pool = FramePool(depth=2, late_after_ns=1_000)
+        
+        slot = pool.acquire()
+        slot.fill(frame, time.perf_counter_ns() - 1_000_000)
+        pool.put(slot)
+        pool.get(timeout=0.1)
+        
+        assert pool.stats()["late"] == 1
+        
+        with pytest.raises(queue.Empty):
+            pool.get(timeout=0.01)
@@ -0,0 +1,97 @@
+import os
+import multiprocessing
+import pytest
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from mss.screenshot import ScreenShot
+
+from src.frame_ring import FrameRing, FrameRingReader
+
+
+def _sum_frames(name, count, attached, results):
+    """Read count frames in another process and report their sequence numbers and pixel sums"""
+    reader = FrameRingReader(name)
+    attached.set()
+    frames = [reader.next(timeout=10.0) for _ in range(count)]
+    results.put([(seq, timestamp_ns, int(frame.sum())) for seq, timestamp_ns, frame in frames])
+    reader.close()
+
+class TestFrameRing:
+    @pytest.fixture
+    def ring(self):
+        """Create a three slot ring for 8x4 frames and free it afterwards"""
+        ring = FrameRing.for_size(3, 8, 4)
+        yield ring
+        ring.close()
+
+    def frame(self, value, width=8, height=4):
+        return np.full((height, width, 4), value, dtype=np.uint8)
+
+    def test_write_and_read(self, ring):
+        """Test frames come out in order with their sequence numbers and timestamps"""
+        reader = FrameRingReader(ring.name)
+        assert reader.next(timeout=0) is None
+        assert reader.latest() is None
+
+        screenshot = ScreenShot.from_size(bytearray(b"\x01\x02\x03\xff" * (8 * 4)), 8, 4)
+        assert ring.write(screenshot, 100) == 0
+        assert ring.write(self.frame(7, 4, 2), 200) == 1
+
+        seq, timestamp_ns, frame = reader.next(timeout=0)
+        assert (seq, timestamp_ns) == (0, 100)
+        assert np.array_equal(frame, np.asarray(screenshot))
+
+        seq, timestamp_ns, frame = reader.next(timeout=0)
+        assert (seq, timestamp_ns, frame.shape) == (1, 200, (2, 4, 4))
+        assert (frame == 7).all()
+        reader.close()
+
+    def test_overrun(self, ring):
+        """Test a reader that falls behind skips to the oldest frame still in the ring"""
+        reader = FrameRingReader(ring.name)
+        for i in range(5):
+            ring.write(self.frame(i), i)
+
+        assert reader.next(timeout=0)[0] == 2
+        assert reader.overruns == 2
+        assert reader.read(0) is None
+        assert reader.latest()[:2] == (4, 4)
+        reader.close()
+
+    def test_late_reader_starts_at_newest(self, ring):
+        """Test a reader attaching mid-recording starts with the newest frame"""
+        for i in range(2):
+            ring.write(self.frame(i), i)
+
+        reader = FrameRingReader(ring.name)
+        assert (reader.slots, reader.capacity) == (3, 8 * 4 * 4)
+        assert reader.next(timeout=0)[0] == 1
+        assert reader.overruns == 0
+        reader.close()
+
+    def test_frame_too_large(self, ring):
+        """Test a frame larger than a slot is rejected"""
+        with pytest.raises(ValueError):
+            ring.write(self.frame(0, 16, 8), 0)
+
+        with pytest.raises(ValueError):
+            FrameRing(0, 16)
+
+    def test_read_from_other_process(self, ring):
+        """Test another process reads the frames straight from shared memory"""
+        context = multiprocessing.get_context("spawn")
+        attached = context.Event()
+        results = context.Queue()
+        reader = context.Process(target=_sum_frames, args=(ring.name, 3, attached, results))
+        reader.start()
+        assert attached.wait(timeout=10.0)
+
+        for i in range(3):
+            ring.write(self.frame(i + 1), 1000 + i)
+
+        assert results.get(timeout=10.0) == [(i, 1000 + i, (i + 1) * 8 * 4 * 4) for i in range(3)]
+        reader.join(timeout=5.0)
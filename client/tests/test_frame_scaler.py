@@ -0,0 +1,66 @@
+import os
+import pytest
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from src.frame_scaler import FrameScaler
+
+class TestFrameScaler:
+    @pytest.fixture
+    def frame(self):
+        """Create a random 4x-oversized BGRA frame for testing"""
+        rng = np.random.default_rng(0)
+        return rng.integers(0, 256, (80, 128, 4), dtype=np.uint8)
+    
+    def test_invalid_mode(self):
+        """Test unknown scale modes are rejected"""
+        with pytest.raises(ValueError):
+            FrameScaler((64, 40), mode="bicubic")
+    
+    def test_nearest(self, frame):
+        """Test nearest neighbour scaling picks every other pixel"""
+        scaler = FrameScaler((64, 40))
+        output = scaler.scale(frame)
+        
+        assert output.shape == (40, 64, 4)
+        assert np.array_equal(output, frame[::2, ::2])
+    
+    @pytest.mark.parametrize("mode", ["box2x", "area"])
+    def test_averaging_modes(self, frame, mode):
+        """Test averaging modes match a 2x2 block mean"""
+        scaler = FrameScaler((64, 40), mode=mode)
+        output = scaler.scale(frame)
+        
+        expected = frame.reshape(40, 2, 64, 2, 4).astype(np.uint32).sum(axis=(1, 3)) // 4
+        assert np.array_equal(output, expected)
+    
+    @pytest.mark.parametrize("mode", ["nearest", "box2x", "area"])
+    def test_letterbox(self, mode):
+        """Test frames with a different aspect ratio are centered with black bars"""
+        frame = np.full((20, 64, 4), 200, dtype=np.uint8)
+        scaler = FrameScaler((64, 40), mode=mode)
+        output = scaler.scale(frame)
+        
+        assert output[:10].max() == 0
+        assert output[10:30].min() == 200
+        assert output[30:].max() == 0
+    
+    def test_buffers_reused(self, frame):
+        """Test the output buffer and index maps are reused across frames"""
+        scaler = FrameScaler((64, 40))
+        first = scaler.scale(frame)
+        indices = scaler._indices_x
+        second = scaler.scale(frame)
+        
+        assert first is second
+        assert scaler._indices_x is indices
+        
+        # A new source size recomputes the maps into the same output buffer
+        third = scaler.scale(frame[:40, :64])
+        assert third is first
+        assert scaler._indices_x is not indices
+        assert np.array_equal(third, frame[:40, :64])
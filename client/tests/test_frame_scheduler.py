@@ -0,0 +1,88 @@
+import os
+import pytest
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.frame_scheduler import FrameScheduler
+
+class FakeClock:
+    """Clock that only advances when slept on or told to"""
+    def __init__(self):
+        self.now = 1_000_000_000
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += int(seconds * 1_000_000_000)
+    
+    def advance_ms(self, ms):
+        self.now += ms * 1_000_000
+
+class TestFrameScheduler:
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+    
+    def test_invalid_policy(self, clock):
+        """Test unknown policies are rejected"""
+        with pytest.raises(ValueError):
+            FrameScheduler(0.1, policy="sometimes", clock=clock, sleep=clock.sleep)
+    
+    def test_no_drift(self, clock):
+        """Test work done between frames doesn't push later deadlines back"""
+        scheduler = FrameScheduler(0.1, clock=clock, sleep=clock.sleep)
+        start = clock.now
+        
+        deadlines = []
+        for _ in range(5):
+            deadlines.append(scheduler.wait())
+            clock.advance_ms(30)  # Time spent grabbing
+        
+        assert deadlines == [start + i * 100_000_000 for i in range(5)]
+        assert scheduler.stats()["dropped"] == 0
+        assert scheduler.stats()["max_lateness_ms"] == 0
+    
+    def test_drop_policy(self, clock):
+        """Test the drop policy skips deadlines that have already passed"""
+        scheduler = FrameScheduler(0.1, policy="drop", clock=clock, sleep=clock.sleep)
+        start = clock.now
+        
+        scheduler.wait()
+        clock.advance_ms(350)  # A slow grab overruns three deadlines
+        
+        assert scheduler.wait() == start + 300_000_000
+        assert scheduler.wait() == start + 400_000_000
+        
+        stats = scheduler.stats()
+        assert stats["dropped"] == 2
+        assert stats["late"] == 0
+        assert stats["max_lateness_ms"] == 50
+    
+    def test_catch_up_policy(self, clock):
+        """Test the catch_up policy fires missed frames back to back"""
+        scheduler = FrameScheduler(0.1, policy="catch_up", clock=clock, sleep=clock.sleep)
+        start = clock.now
+        
+        scheduler.wait()
+        clock.advance_ms(350)
+        
+        assert [scheduler.wait() for _ in range(4)] == [start + i * 100_000_000 for i in range(1, 5)]
+        
+        stats = scheduler.stats()
+        assert stats["dropped"] == 0
+        assert stats["late"] == 2
+        assert stats["max_lateness_ms"] == 250
+    
+    def test_catch_up_backlog_limit(self, clock):
+        """Test catch_up drops frames once it falls too far behind"""
+        scheduler = FrameScheduler(0.1, policy="catch_up", max_backlog=2, clock=clock, sleep=clock.sleep)
+        start = clock.now
+        
+        scheduler.wait()
+        clock.advance_ms(550)
+        
+        assert scheduler.wait() == start + 500_000_000
+        assert scheduler.stats()["dropped"] == 4
@@ -0,0 +1,110 @@
+import os
+import shutil
+import subprocess
+import pytest
+from unittest.mock import patch
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from src.frame_sources import open_frame_source, FrameSource, MssSource, SyntheticSource, ReplaySource, FRAME_SOURCE_ENV
+from src.screen_capture import ScreenCapture
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestFrameSources:
+    def test_synthetic_patterns(self):
+        """Test synthetic sources describe one monitor and change with time, except static"""
+        clock = FakeClock()
+        for pattern, changes in (("static", False), ("scrolling", True), ("noise", True)):
+            source = SyntheticSource(pattern, 64, 48, rate=10, clock=clock)
+            assert source.monitors == [{"left": 0, "top": 0, "width": 64, "height": 48}] * 2
+
+            clock.now = 0.0
+            with source.open() as grabber:
+                first = grabber.grab(source.monitors[1]).copy()
+                assert first.shape == (48, 64, 4) and first.flags.c_contiguous
+
+                clock.now = 0.05  # Still the first frame
+                assert np.array_equal(grabber.grab(source.monitors[1]), first)
+
+                clock.now = 0.1
+                assert np.array_equal(grabber.grab(source.monitors[1]), first) is not changes
+
+        with pytest.raises(ValueError):
+            SyntheticSource("plaid")
+
+    def test_synthetic_region(self):
+        """Test grabbing a region cuts it out of the full frame"""
+        source = SyntheticSource("noise", 64, 48, clock=FakeClock())
+        with source.open() as grabber:
+            region = grabber.grab({"left": 10, "top": 4, "width": 20, "height": 8})
+        assert region.shape == (8, 20, 4)
+        assert np.array_equal(region, source.frame(0)[4:12, 10:30])
+
+    def test_open_frame_source(self):
+        """Test sources are picked by name with an argument, by environment or passed through"""
+        source = open_frame_source("synthetic:static", width=32, height=16)
+        assert isinstance(source, SyntheticSource)
+        assert (source.pattern, source.width, source.height) == ("static", 32, 16)
+        assert open_frame_source(source) is source
+
+        with patch.dict(os.environ, {FRAME_SOURCE_ENV: "synthetic:noise"}):
+            assert open_frame_source(width=32, height=16).pattern == "noise"
+
+        with pytest.raises(ValueError):
+            open_frame_source("dxgi")
+
+    def test_mss_source(self):
+        """Test the mss source lists monitors once and grabs through a per-thread mss instance"""
+        monitors = [{"left": 0, "top": 0, "width": 1920, "height": 1080}] * 2
+        with patch('src.frame_sources.mss') as mock_mss:
+            mock_mss.mss.return_value.__enter__.return_value.monitors = monitors
+            source = open_frame_source()
+            assert isinstance(source, MssSource)
+            assert source.monitors == monitors
+            assert source.open() is mock_mss.mss.return_value
+            assert mock_mss.mss.call_count == 2
+
+    def test_source_without_grab(self):
+        """Test a source that doesn't implement grab() fails when created, not mid-recording"""
+        class Incomplete(FrameSource):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete([{"left": 0, "top": 0, "width": 64, "height": 48}] * 2)
+
+    def test_screen_capture_uses_source(self):
+        """Test the capture pipeline takes its size from the frame source"""
+        source = SyntheticSource("static", 320, 240)
+        sc = ScreenCapture(frame_source=source)
+        assert sc.frame_source is source
+        assert sc.capture_size == sc.resolution == (320, 240)
+
+    @pytest.mark.skipif(not shutil.which("ffmpeg"), reason="needs ffmpeg")
+    def test_replay_source(self, tmp_path):
+        """Test a video file is replayed frame by frame at the given rate"""
+        path = str(tmp_path / "screen.mkv")
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=size=64x48:rate=10:duration=1",
+            "-c:v", "ffv1", path
+        ], check=True)
+
+        clock = FakeClock()
+        source = ReplaySource(path, rate=10, clock=clock)
+        assert source.monitors[1] == {"left": 0, "top": 0, "width": 64, "height": 48}
+
+        with source.open() as grabber:
+            first = grabber.grab(source.monitors[1]).copy()
+            clock.now = 0.3
+            later = grabber.grab({"left": 0, "top": 0, "width": 32, "height": 48})
+            assert later.shape == (48, 32, 4)
+            assert not np.array_equal(later, first[:, :32])
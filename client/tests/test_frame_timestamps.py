@@ -0,0 +1,58 @@
+import os
+import pytest
+import tempfile
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.frame_timestamps import FrameTimestampWriter, read_frame_timestamps, frame_index_at
+
+class TestFrameTimestamps:
+    @pytest.fixture
+    def path(self):
+        """Create a temporary sidecar path"""
+        fd, path = tempfile.mkstemp(suffix='.frames')
+        os.close(fd)
+        yield path
+        os.remove(path)
+    
+    def test_round_trip(self, path):
+        """Test timestamps written by the writer are read back in order"""
+        writer = FrameTimestampWriter(path)
+        for timestamp_ns in (0, 100_000_000, 2**40):
+            writer.append(timestamp_ns)
+        writer.close()
+        
+        assert writer.count == 3
+        assert os.path.getsize(path) == 8 + 3 * 8
+        assert list(read_frame_timestamps(path)) == [0, 100_000_000, 2**40]
+    
+    def test_truncated_record(self, path):
+        """Test a partially written final record is ignored"""
+        writer = FrameTimestampWriter(path)
+        writer.append(5)
+        writer.append(6)
+        writer.close()
+        
+        with open(path, 'r+b') as f:
+            f.truncate(8 + 8 + 3)
+        
+        assert list(read_frame_timestamps(path)) == [5]
+    
+    def test_invalid_file(self, path):
+        """Test files without the sidecar header are rejected"""
+        with open(path, 'wb') as f:
+            f.write(b'{"events": []}')
+        
+        with pytest.raises(ValueError):
+            read_frame_timestamps(path)
+    
+    def test_frame_index_at(self):
+        """Test events map to the last frame captured at or before them"""
+        timestamps = [100, 200, 300]
+        
+        assert frame_index_at(timestamps, 50) == 0
+        assert frame_index_at(timestamps, 100) == 0
+        assert frame_index_at(timestamps, 299) == 1
+        assert frame_index_at(timestamps, 10_000) == 2
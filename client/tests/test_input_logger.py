@@ -33,7 +33,7 @@ class TestInputLogger:
     def test_initialization(self, input_logger):
         """Test initialization of InputLogger"""
         assert input_logger.running is False
-        assert isinstance(input_logger.events, list)
+        assert len(input_logger.events) == 0
         assert input_logger.mouse_listener is None
         assert input_logger.keyboard_listener is None
         assert input_logger.output_file is None
@@ -158,4 +158,85 @@ class TestInputLogger:
         
         with patch.object(input_logger, '_add_event') as mock_add_event:
             input_logger.on_mouse_scroll(300, 400, 0, 1)  # Scroll down
-            mock_add_event.assert_called_with("scroll", x=300, y=400, dx=0, dy=1) 
\ No newline at end of file
+            mock_add_event.assert_called_with("scroll", x=300, y=400, dx=0, dy=1) 
+    
+    def test_events_between(self, input_logger):
+        """Test events can be taken out by time range while logging continues"""
+        input_logger.events = [{"t": t, "kind": "scroll"} for t in (0, 100, 200, 300)]
+        
+        assert [e["t"] for e in input_logger.events_between(100, 300)] == [100, 200]
+        assert [e["t"] for e in input_logger.events_between(200)] == [200, 300]
+        
+        # Copies, so packaging a segment can't change the logged events
+        input_logger.events_between(0, 100)[0]["t"] = 5
+        assert input_logger.events[0]["t"] == 0
+    
+    def test_significant_events(self, input_logger):
+        """Test clicks, drag ends and the first key of a burst are reported"""
+        reported = []
+        input_logger.on_significant_event = lambda t_ns, kind: reported.append((t_ns, kind))
+        input_logger.running = True
+        
+        times = iter([0, 100_000_000, 200_000_000, 1_500_000_000, 1_600_000_000, 1_700_000_000])
+        with patch('src.input_logger.get_timestamp_ns', side_effect=lambda: next(times)):
+            input_logger._add_event("key_down", key="a")
+            input_logger._add_event("key_down", key="b")
+            input_logger._add_event("scroll", x=0, y=0, dx=0, dy=1)
+            input_logger._add_event("key_down", key="c")
+            input_logger._add_event("mouse_down", button="left", x=0, y=0)
+            input_logger._add_event("drag_end", button="left", start_x=0, start_y=0, end_x=9, end_y=9, duration_ns=1)
+        input_logger.running = False
+        
+        assert reported == [
+            (0, "key_down"),
+            (1_500_000_000, "key_down"),
+            (1_600_000_000, "mouse_down"),
+            (1_700_000_000, "drag_end")
+        ]
+    
+    def test_add_event_never_blocks(self, input_logger):
+        """Test listener callbacks hand events over without waiting for the lock"""
+        input_logger.running = True
+        times = iter([300, 100, 200])
+        with input_logger.lock, \
+             patch('src.input_logger.get_timestamp_ns', side_effect=lambda: next(times)):
+            # Someone holds the lock, e.g. a segment being packaged
+            input_logger._add_event("key_down", key="a")
+            input_logger._add_event("mouse_down", button="left", x=1, y=2)
+            input_logger._add_event("key_up", key="a")
+        input_logger.running = False
+        
+        # Drained into the store in time order across both listeners
+        assert [(e["t"], e["kind"]) for e in input_logger.events] == [(100, "mouse_down"), (200, "key_up"), (300, "key_down")]
+    
+    def test_stop_writes_drained_events(self, input_logger, tmp_path):
+        """Test stop() drains the buffers into the journal and seals it"""
+        input_logger.output_dir = str(tmp_path)
+        input_logger.start()
+        input_logger._add_event("scroll", x=1, y=2, dx=0, dy=-1)
+        input_logger.mouse_listener = MagicMock()
+        input_logger.keyboard_listener = MagicMock()
+        output_file = input_logger.stop()
+        
+        with open(output_file) as f:
+            lines = [json.loads(line) for line in f]
+        assert lines[0]["meta"]["type"] == "input_events"
+        assert [(e["kind"], e["dy"]) for e in lines[1:-1]] == [("scroll", -1)]
+        assert lines[-1]["sealed"]["events"] == 1
+        assert input_logger._drainer is None
+    
+    def test_events_journaled_while_recording(self, input_logger, tmp_path):
+        """Test drained events reach the journal file before logging stops"""
+        input_logger.output_dir = str(tmp_path)
+        input_logger.start()
+        input_logger.journal.flush_interval = 0
+        input_logger._add_event("key_down", key="a")
+        input_logger._drain()
+        
+        with open(input_logger.output_file) as f:
+            lines = [json.loads(line) for line in f]
+        assert [e["kind"] for e in lines[1:]] == ["key_down"]
+        
+        input_logger.mouse_listener = MagicMock()
+        input_logger.keyboard_listener = MagicMock()
+        input_logger.stop()
@@ -0,0 +1,61 @@
+import io
+import os
+import shutil
+import subprocess
+import pytest
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.mkv_writer import MatroskaFrameWriter, frame_header, stream_header
+
+class TestMatroskaFrameWriter:
+    def test_stream_header(self):
+        """Test the stream starts with an EBML header and an open-ended segment"""
+        header = stream_header(64, 48)
+        
+        assert header.startswith(b"\x1a\x45\xdf\xa3")
+        assert b"matroska" in header
+        assert b"V_UNCOMPRESSED" in header
+        assert b"\x18\x53\x80\x67\x01\xff\xff\xff\xff\xff\xff\xff" in header
+    
+    def test_frame_header(self):
+        """Test each frame gets a cluster sized to hold its timestamp and block"""
+        header = frame_header(16, 2_500_000)
+        
+        assert header[:4] == b"\x1f\x43\xb6\x75"
+        cluster_size = int.from_bytes(header[4:12], "big") & ~(1 << 56)
+        assert cluster_size == len(header) - 12 + 16
+        
+        # Cluster timestamp in microseconds, then a keyframe SimpleBlock on track 1
+        assert header[12:13] == b"\xe7"
+        assert int.from_bytes(header[21:23], "big") == 2500
+        assert header[-4:] == b"\x81\x00\x00\x80"
+    
+    def test_write(self):
+        """Test frames are written after their headers without being copied"""
+        stream = io.BytesIO()
+        writer = MatroskaFrameWriter(stream, 2, 2)
+        start = stream.tell()
+        
+        writer.write(memoryview(bytearray(16)), 1_000_000)
+        
+        assert stream.tell() - start == len(frame_header(16, 1_000_000)) + 16
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg not installed")
+    def test_ffmpeg_reads_timestamps(self):
+        """Test ffmpeg decodes the frames at the timestamps they were written with"""
+        process = subprocess.Popen(
+            [shutil.which("ffmpeg"), "-f", "matroska", "-i", "-", "-vf", "showinfo", "-f", "null", "-"],
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        writer = MatroskaFrameWriter(process.stdin, 16, 16)
+        for i, timestamp_ms in enumerate((0, 1000, 1100, 2600)):
+            writer.write(bytes([i * 50]) * (16 * 16 * 4), timestamp_ms * 1_000_000)
+        process.stdin.close()
+        log = process.stderr.read().decode()
+        process.wait()
+        
+        assert [line.split("pts_time:")[1].split()[0] for line in log.splitlines() if "pts_time:" in line] == \
+            ["0", "1", "1.1", "2.6"]
@@ -0,0 +1,37 @@
+import os
+import pytest
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.monitors import select_monitors, monitor_at
+
+MONITORS = [
+    {"monitor": 0, "left": -1920, "top": 0, "width": 4480, "height": 1440},
+    {"monitor": 1, "left": 0, "top": 0, "width": 2560, "height": 1440},
+    {"monitor": 2, "left": -1920, "top": 360, "width": 1920, "height": 1080}
+]
+
+class TestMonitors:
+    def test_select_monitors(self):
+        """Test selections resolve to mss monitor indices"""
+        assert select_monitors(3) == [1]
+        assert select_monitors(3, "all") == [1, 2, 3]
+        assert select_monitors(3, 0) == [0]
+        assert select_monitors(3, [2, 1, 2]) == [2, 1]
+    
+    def test_select_missing_monitor(self):
+        """Test monitors that aren't connected are rejected"""
+        with pytest.raises(ValueError):
+            select_monitors(2, [1, 3])
+    
+    def test_monitor_at(self):
+        """Test points are tagged with the physical monitor they fall on"""
+        assert monitor_at(MONITORS, 100, 100) == 1
+        assert monitor_at(MONITORS, -5, 400) == 2
+        assert monitor_at(MONITORS, 2559, 1439) == 1
+        
+        # Only the virtual desktop covers the gap above the left monitor
+        assert monitor_at(MONITORS, -100, 10) == 0
+        assert monitor_at(MONITORS[1:], -100, 10) is None
@@ -0,0 +1,59 @@
+import os
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.multi_capture import MultiScreenCapture
+
+MONITORS = [
+    {"left": 0, "top": 0, "width": 3840, "height": 1080},
+    {"left": 0, "top": 0, "width": 1920, "height": 1080},
+    {"left": 1920, "top": 0, "width": 1920, "height": 1080}
+]
+
+class TestMultiScreenCapture:
+    @pytest.fixture
+    def multi_capture(self):
+        """Create a MultiScreenCapture on two fake monitors"""
+        with patch('frame_sources.mss') as mock_mss:
+            mock_mss.mss.return_value.__enter__.return_value.monitors = MONITORS
+            
+            capture = MultiScreenCapture("all")
+            yield capture
+    
+    def test_pipelines(self, multi_capture):
+        """Test every selected monitor gets its own pipeline at its own size"""
+        assert multi_capture.monitors == [1, 2]
+        assert [capture.monitor for capture in multi_capture.captures] == [1, 2]
+        assert multi_capture.captures[1].region == {"left": 1920, "top": 0, "width": 1920, "height": 1080}
+        assert multi_capture.resolution == (1920, 1080)
+    
+    def test_start_shares_clock(self, multi_capture):
+        """Test the pipelines start on one clock with separate output files"""
+        with patch('src.multi_capture.set_start_time') as mock_set_start, \
+             patch('screen_capture.set_start_time') as mock_pipeline_set_start, \
+             patch('screen_capture.threading.Thread'):
+            multi_capture.start()
+        
+        assert mock_set_start.call_count == 1
+        assert not mock_pipeline_set_start.called
+        assert multi_capture.running
+        
+        outputs = multi_capture.monitor_outputs()
+        assert [output["monitor"] for output in outputs] == [1, 2]
+        assert outputs[0]["video"] == multi_capture.output_file
+        assert outputs[1]["video"].endswith("_monitor2.mp4")
+        assert outputs[1]["left"] == 1920
+        
+        multi_capture.stop()
+        assert not multi_capture.running
+    
+    def test_on_segment(self, multi_capture):
+        """Test finished segments of every monitor go to the same callback"""
+        callback = MagicMock()
+        multi_capture.on_segment = callback
+        
+        assert all(capture.on_segment is callback for capture in multi_capture.captures)
@@ -0,0 +1,88 @@
+import os
+import pytest
+from unittest.mock import MagicMock
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from mss.screenshot import ScreenShot
+
+from src.change_detector import ChangeDetector
+from src.partial_grabber import PartialGrabber, tile_rectangles
+
+class TestPartialGrabber:
+    @pytest.fixture
+    def screen(self):
+        """Create a fake 200x130 screen"""
+        return np.zeros((130, 200, 4), dtype=np.uint8)
+    
+    @pytest.fixture
+    def sct(self, screen):
+        """Create a mock mss instance that grabs regions of the fake screen"""
+        def grab(region):
+            top, left = region["top"], region["left"]
+            pixels = screen[top:top+region["height"], left:left+region["width"]]
+            return ScreenShot(bytearray(pixels.tobytes()), region)
+        
+        sct = MagicMock()
+        sct.grab.side_effect = grab
+        return sct
+    
+    @pytest.fixture
+    def region(self):
+        return {"left": 0, "top": 0, "width": 200, "height": 130}
+    
+    def test_tile_rectangles(self):
+        """Test tile runs are merged into rectangles"""
+        mask = np.array([
+            [1, 1, 0, 1],
+            [1, 1, 0, 0],
+            [0, 1, 1, 0],
+        ], dtype=bool)
+        
+        assert tile_rectangles(mask) == [(0, 0, 2, 2), (0, 3, 1, 1), (2, 1, 1, 2)]
+    
+    def test_regrabs_only_recent_changes(self, screen, sct, region):
+        """Test changed tiles keep being re-grabbed without full grabs"""
+        grabber = PartialGrabber(ChangeDetector(tile_size=32), full_grab_every=100)
+        
+        # First frame is a full grab and nothing is warm afterwards
+        assert grabber.grab(sct, region).all()
+        assert not grabber.grab(sct, region).any()
+        assert sct.grab.call_count == 1
+        
+        # Changes are only noticed at the next full grab
+        grabber._since_full = grabber.full_grab_every
+        screen[40:42, 70:72] = 255
+        dirty = grabber.grab(sct, region)
+        assert np.argwhere(dirty).tolist() == [[1, 2]]
+        assert np.array_equal(grabber.frame, screen)
+        
+        # Further changes next to the warm tile are picked up from a small grab
+        sct.grab.reset_mock()
+        screen[40:42, 100:102] = 255
+        dirty = grabber.grab(sct, region)
+        
+        assert np.argwhere(dirty).tolist() == [[1, 3]]
+        assert np.array_equal(grabber.frame, screen)
+        assert sct.grab.call_count == 1
+        grabbed = sct.grab.call_args[0][0]
+        assert grabbed == {"left": 32, "top": 0, "width": 96, "height": 96}
+    
+    def test_clips_edge_tiles(self, screen, sct, region):
+        """Test grabs at the screen edge are clipped to the screen"""
+        grabber = PartialGrabber(ChangeDetector(tile_size=64), full_grab_every=100)
+        grabber.grab(sct, region)
+        
+        grabber._since_full = grabber.full_grab_every
+        screen[129, 199] = 255
+        grabber.grab(sct, region)
+        
+        sct.grab.reset_mock()
+        screen[128, 198] = 7
+        assert grabber.grab(sct, region).any()
+        grabbed = sct.grab.call_args[0][0]
+        assert grabbed == {"left": 128, "top": 64, "width": 72, "height": 66}
+        assert np.array_equal(grabber.frame, screen)
@@ -0,0 +1,108 @@
+import os
+import json
+import shutil
+import subprocess
+import pytest
+from unittest.mock import MagicMock
+
+# Add parent directory to path
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.recovery import write_marker, find_interrupted_recordings, interrupted_videos, recover_recordings
+
+class TestRecovery:
+    def test_find_interrupted_recordings(self, tmp_path):
+        """Test only in-progress markers of recordings are picked up"""
+        write_marker(str(tmp_path / "recording_2.inprogress"), {"video": "b"})
+        write_marker(str(tmp_path / "recording_1.inprogress"), {"video": "a"})
+        (tmp_path / "recording_3.mp4").write_bytes(b"")
+
+        markers = find_interrupted_recordings(str(tmp_path))
+
+        assert [os.path.basename(m) for m in markers] == ["recording_1.inprogress", "recording_2.inprogress"]
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_interrupted_videos(self, tmp_path):
+        """Test segment parts are used when there is no single video, minus the ones handed over"""
+        video = str(tmp_path / "recording_1.mp4")
+        parts = [str(tmp_path / f"recording_1.part{i:03d}.mp4") for i in range(3)]
+        for part in parts:
+            open(part, 'wb').close()
+
+        assert interrupted_videos({"video": video, "handed_over": parts[:1]}) == parts[1:]
+
+        open(video, 'wb').close()
+        assert interrupted_videos({"video": video}) == [video]
+
+    def test_unplayable_recording(self, tmp_path):
+        """Test a video without playable data is skipped and its marker removed"""
+        video = tmp_path / "recording_1.mp4"
+        video.write_bytes(b"\x00\x00\x00\x1cftypisom")
+        write_marker(str(tmp_path / "recording_1.inprogress"), {"video": str(video)})
+        muxer = MagicMock()
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr("src.recovery.subprocess.run", MagicMock(return_value=MagicMock(returncode=1, stderr="moov atom not found")))
+            assert recover_recordings(str(tmp_path), "ffmpeg", muxer) == []
+
+        assert not muxer.finalize_recovered.called
+        assert not (tmp_path / "recording_1.inprogress").exists()
+        assert video.exists()  # Left on disk for manual rescue
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg not installed")
+    def test_recover_killed_recording(self, tmp_path):
+        """Test a fragmented MP4 whose writer was killed is remuxed and packaged"""
+        ffmpeg_path = shutil.which("ffmpeg")
+        video = tmp_path / "recording_1.mp4"
+        subprocess.run(
+            [
+                ffmpeg_path, "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=size=128x96:rate=10",
+                "-t", "3", "-c:v", "libx264", "-pix_fmt", "yuv420p", "-force_key_frames", "expr:gte(t,n_forced*1)",
+                "-movflags", "+frag_keyframe+empty_moov+default_base_moof", str(video)
+            ],
+            check=True
+        )
+
+        # Cut the file mid-fragment like a killed ffmpeg would leave it
+        data = video.read_bytes()
+        video.write_bytes(data[:len(data) * 2 // 3])
+
+        info = {"video": str(video), "resolution": [128, 96], "fps": 10}
+        write_marker(str(tmp_path / "recording_1.inprogress"), info)
+        muxer = MagicMock()
+        muxer.finalize_recovered.return_value = "recording_1_recovered.zip"
+
+        assert recover_recordings(str(tmp_path), ffmpeg_path, muxer) == ["recording_1_recovered.zip"]
+
+        recovered, marker_info, _, _, frame_count = muxer.finalize_recovered.call_args[0]
+        assert recovered == str(tmp_path / "recording_1.recovered.mp4")
+        assert marker_info == info
+        assert 0 < frame_count < 30
+        assert os.path.getsize(recovered) > 0
+        assert not (tmp_path / "recording_1.inprogress").exists()
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg not installed")
+    def test_recording_without_fragments(self, tmp_path):
+        """Test a recording killed before its first fragment is skipped rather than packaged empty"""
+        ffmpeg_path = shutil.which("ffmpeg")
+        video = tmp_path / "recording_1.mp4"
+        subprocess.run(
+            [
+                ffmpeg_path, "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=size=128x96:rate=10",
+                "-t", "3", "-c:v", "libx264", "-pix_fmt", "yuv420p",
+                "-movflags", "+frag_keyframe+empty_moov+default_base_moof", str(video)
+            ],
+            check=True
+        )
+
+        # Only the empty moov made it to disk
+        data = video.read_bytes()
+        video.write_bytes(data[:data.index(b"moof") - 4])
+
+        write_marker(str(tmp_path / "recording_1.inprogress"), {"video": str(video), "resolution": [128, 96], "fps": 10})
+        muxer = MagicMock()
+
+        assert recover_recordings(str(tmp_path), ffmpeg_path, muxer) == []
+        assert not muxer.finalize_recovered.called
+        assert not (tmp_path / "recording_1.recovered.mp4").exists()
@@ -1,5 +1,6 @@
 import os
 import time
+import json
 import pytest
 from unittest.mock import patch, MagicMock, mock_open
 import threading
@@ -15,7 +16,7 @@ class TestScreenCapture:
     @pytest.fixture
     def screen_capture(self):
         """Create a ScreenCapture instance for testing"""
-        with patch('src.screen_capture.mss') as mock_mss:
+        with patch('frame_sources.mss') as mock_mss:
             # Setup the mock
             mock_sct = MagicMock()
             mock_mss.return_value.__enter__.return_value = mock_sct
@@ -71,9 +72,9 @@ class TestScreenCapture:
         assert output_file == screen_capture.output_file
     
     @patch('src.screen_capture.subprocess.Popen')
-    @patch('src.screen_capture.ScreenCapture._has_nvidia', return_value=False)
-    @patch('src.screen_capture.ScreenCapture._has_intel_qsv', return_value=False)
-    def test_encoder_worker(self, mock_qsv, mock_nvidia, mock_popen, screen_capture):
+    @patch('encoders.probe_encoders', return_value=frozenset({"libx264", "h264_nvenc", "h264_qsv"}))
+    @patch('encoders.encoder_works', return_value=False)
+    def test_encoder_worker(self, mock_works, mock_probe, mock_popen, screen_capture):
         """Test the encoder worker"""
         # Setup mocks
         mock_process = MagicMock()
@@ -98,10 +99,223 @@ class TestScreenCapture:
         
         # Verify the process was created
         assert mock_popen.called
-        # Check if libx264 was used (since both NVIDIA and Intel QSV are mocked as False)
+        # Check if libx264 was used (since both NVIDIA and Intel QSV fail to open)
         cmd_args = mock_popen.call_args[0][0]
         assert 'libx264' in cmd_args
     
+    @patch('src.screen_capture.subprocess.Popen')
+    @patch('encoders.probe_encoders', return_value=frozenset({"libx264"}))
+    def test_encoder_worker_segments(self, mock_probe, mock_popen, screen_capture, tmp_path):
+        """Test segmented recording rolls over to new files and hands over finished ones"""
+        import numpy as np
+        from src.frame_pool import FramePool
+        from src.screen_capture import get_start_time
+        
+        def popen(cmd, **kwargs):
+            open(cmd[-1], 'wb').close()  # ffmpeg creates the output file
+            return MagicMock()
+        mock_popen.side_effect = popen
+        
+        screen_capture.segment_duration = 1
+        screen_capture.output_file = str(tmp_path / "recording_1.mp4")
+        screen_capture.timestamps_file = str(tmp_path / "recording_1.frames")
+        finished = []
+        screen_capture.on_segment = finished.append
+        
+        # Frames captured 0.4 s apart
+        screen_capture.frame_pool = FramePool(depth=6)
+        frame = np.zeros((800, 1280, 4), dtype=np.uint8)
+        for i in range(6):
+            slot = screen_capture.frame_pool.acquire()
+            slot.fill(frame, get_start_time() + i * 400_000_000)
+            screen_capture.frame_pool.put(slot)
+        
+        screen_capture._encoder_worker()
+        
+        assert mock_popen.call_count == 2
+        assert [segment["index"] for segment in sorted(finished, key=lambda s: s["index"])] == [0, 1]
+        first, second = sorted(finished, key=lambda s: s["index"])
+        assert first["file"].endswith("recording_1.part000.mp4")
+        assert (first["start_ns"], first["end_ns"]) == (0, 1_200_000_000)
+        assert list(first["frame_timestamps"]) == [0, 400_000_000, 800_000_000]
+        assert (second["start_ns"], second["end_ns"]) == (1_200_000_000, None)
+        assert len(second["frame_timestamps"]) == 3
+    
+    @patch('src.screen_capture.subprocess.Popen')
+    @patch('encoders.probe_encoders', return_value=frozenset({"libx264"}))
+    def test_encoder_worker_level_change(self, mock_probe, mock_popen, screen_capture, tmp_path):
+        """Test a level change starts the next segment at the next queued frame, not at the current time"""
+        import numpy as np
+        from src.frame_pool import FramePool
+        from src.screen_capture import get_start_time
+        
+        def popen(cmd, **kwargs):
+            open(cmd[-1], 'wb').close()
+            return MagicMock()
+        mock_popen.side_effect = popen
+        
+        screen_capture.adaptive = True
+        screen_capture.segment_duration = 60
+        screen_capture.output_file = str(tmp_path / "recording_1.mp4")
+        screen_capture.timestamps_file = str(tmp_path / "recording_1.frames")
+        finished = []
+        screen_capture.on_segment = finished.append
+        
+        # A backlog of frames captured 0.1 s apart, the level changes after the second one
+        screen_capture.frame_pool = FramePool(depth=4)
+        frame = np.zeros((800, 1280, 4), dtype=np.uint8)
+        for i in range(4):
+            slot = screen_capture.frame_pool.acquire()
+            slot.fill(frame, get_start_time() + i * 100_000_000)
+            screen_capture.frame_pool.put(slot)
+        
+        with patch('src.screen_capture.EncoderController') as mock_controller:
+            mock_controller.return_value.setting = (0, 1.0)
+            mock_controller.return_value.record.side_effect = [False, True, False, False]
+            screen_capture._encoder_worker()
+        
+        first, second = sorted(finished, key=lambda s: s["index"])
+        assert (first["start_ns"], first["end_ns"]) == (0, 200_000_000)
+        assert list(first["frame_timestamps"]) == [0, 100_000_000]
+        assert second["start_ns"] == 200_000_000
+        assert list(second["frame_timestamps"]) == [200_000_000, 300_000_000]
+    
+    def test_recording_marker(self, screen_capture):
+        """Test a recording is marked in progress until it stops cleanly"""
+        with patch('src.screen_capture.threading.Thread'):
+            screen_capture.start()
+        
+        with open(screen_capture.marker_file) as f:
+            marker = json.load(f)
+        assert marker["video"] == screen_capture.output_file
+        assert marker["frame_timestamps"] == screen_capture.timestamps_file
+        assert marker["resolution"] == [1280, 800]
+        
+        screen_capture.stop()
+        assert not os.path.exists(screen_capture.marker_file)
+    
+    def test_monitor_output_file(self, screen_capture):
+        """Test pipelines for monitors other than the primary one get their own file names"""
+        screen_capture.monitor = 2
+        with patch('src.screen_capture.threading.Thread'):
+            screen_capture.start()
+        
+        assert screen_capture.output_file.endswith("_monitor2.mp4")
+        assert screen_capture.monitor_outputs()[0]["monitor"] == 2
+        assert screen_capture.monitor_outputs()[0]["video"] == screen_capture.output_file
+    
+    def test_capture_region(self):
+        """Test capturing part of the desktop sizes the pipeline to the region"""
+        desktop = {"left": 0, "top": 0, "width": 1920, "height": 1080}
+        with patch('frame_sources.mss') as mock_mss:
+            mock_mss.mss.return_value.__enter__.return_value.monitors = [desktop, desktop]
+            sc = ScreenCapture(capture_region=(100, 50, 641, 480))
+        
+        assert sc.region == {"left": 100, "top": 50, "width": 640, "height": 480}
+        assert sc.capture_size == sc.resolution == (640, 480)
+        assert sc.monitor_outputs()[0]["region_track"] == [[0, 100, 50]]
+    
+    def test_follow_window(self):
+        """Test following a window starts at its rectangle and tracks its moves"""
+        desktop = {"left": 0, "top": 0, "width": 1920, "height": 1080}
+        window = {"left": 200, "top": 100, "width": 800, "height": 600}
+        with patch('frame_sources.mss') as mock_mss:
+            mock_mss.mss.return_value.__enter__.return_value.monitors = [desktop, desktop]
+            sc = ScreenCapture(follow_window=lambda: window)
+            
+            with pytest.raises(ValueError):
+                ScreenCapture(follow_window=lambda: None)
+        
+        assert sc.capture_size == (800, 600)
+        sc.follower.reset()
+        window = {"left": 300, "top": 150, "width": 800, "height": 600}
+        sc.follower.update(5_000)
+        assert sc.monitor_outputs()[0]["region_track"] == [[0, 200, 100], [5_000, 300, 150]]
+    
+    def test_ffmpeg_command_proxy(self, screen_capture):
+        """Test the proxy video is a second output of the same ffmpeg with dense keyframes"""
+        from src.screen_capture import proxy_resolution
+        screen_capture.output_file = "out.mp4"
+        screen_capture.encoder_name = "libx264"
+        screen_capture.proxy_resolution = proxy_resolution(screen_capture.resolution, 240)
+        
+        cmd = screen_capture._build_ffmpeg_command("ffmpeg")
+        
+        assert screen_capture.proxy_resolution == (384, 240)
+        assert cmd[-1] == "out.proxy.mp4"
+        proxy_options = cmd[cmd.index("out.mp4") + 1:]
+        assert proxy_options[proxy_options.index("-vf") + 1].startswith("scale=384:240:")
+        assert proxy_options[proxy_options.index("-g") + 1] == "5"
+        assert proxy_options[proxy_options.index("-r") + 1] == "10"
+    
+    def test_event_keyframes(self, screen_capture):
+        """Test frames after keyframe requests get odd microsecond timestamps, spaced apart"""
+        screen_capture.event_keyframes = True
+        screen_capture.keyframe_spacing_ns = 500_000_000
+        
+        screen_capture.request_keyframe(150_000_000)
+        screen_capture.request_keyframe(180_000_000)  # Covered by the pending request
+        assert screen_capture._keyframe_timestamp(100_003_000) == 100_002_000
+        assert screen_capture._keyframe_timestamp(200_000_500) == 200_001_000
+        
+        # Too close to the last keyframe, so it waits for a later frame
+        screen_capture.request_keyframe(300_000_000)
+        assert screen_capture._keyframe_timestamp(300_000_000) == 300_000_000
+        assert screen_capture._keyframe_timestamp(710_000_000) == 710_001_000
+        assert screen_capture._keyframe_timestamp(800_000_000) == 800_000_000
+        assert screen_capture.forced_keyframes == 2
+    
+    def test_cursor(self):
+        """Test the pointer is tracked in region coordinates and drawn into the encoded frame"""
+        import numpy as np
+        from src.frame_sources import SyntheticSource
+        from src.frame_pool import FrameSlot
+        source = SyntheticSource("static", 640, 480)
+        source.cursor_position = lambda: (150, 80)
+        sc = ScreenCapture(frame_source=source, capture_region=(100, 50, 320, 240), cursor_track=True, draw_cursor=True)
+        sc.cursor_track.reset()
+        
+        with patch('src.screen_capture.get_start_time', return_value=1_000):
+            cursor = sc._sample_cursor(61_000, sc.region)
+        assert cursor == (50, 30)
+        assert sc.cursor_track.last == (60_000, 50, 30)
+        assert sc.monitor_outputs()[0]["cursor_track"] is sc.cursor_track
+        
+        slot = FrameSlot(0)
+        slot.fill(np.zeros((240, 320, 4), dtype=np.uint8), 0)
+        sc._composite_cursor(slot, cursor)
+        assert sc._drawn_cursor == (50, 30)
+        assert tuple(np.asarray(slot)[30, 50]) == (0, 0, 0, 255)
+    
+    def test_ffmpeg_command_event_keyframes(self, screen_capture):
+        """Test ffmpeg turns marked timestamps into keyframes, alongside fragment keyframes"""
+        screen_capture.output_file = "out.mp4"
+        screen_capture.encoder_name = "libx264"
+        screen_capture.event_keyframes = True
+        screen_capture.vfr = True
+        
+        cmd = screen_capture._build_ffmpeg_command("ffmpeg")
+        assert cmd[cmd.index("-enc_time_base") + 1] == "1:1000000"
+        assert cmd[cmd.index("-force_key_frames") + 1] == "expr:eq(mod(round(t*1000000),2),1)"
+        
+        screen_capture.fragmented = True
+        cmd = screen_capture._build_ffmpeg_command("ffmpeg")
+        assert cmd[cmd.index("-force_key_frames") + 1] == \
+            "expr:max(if(isnan(prev_forced_t),1,gte(t,prev_forced_t+2)),eq(mod(round(t*1000000),2),1))"
+    
+    def test_ffmpeg_command_fragmented(self, screen_capture):
+        """Test fragmented output forces regular keyframes and flushes fragments"""
+        screen_capture.output_file = "out.mp4"
+        assert "-movflags" not in screen_capture._build_ffmpeg_command("ffmpeg")
+        
+        screen_capture.fragmented = True
+        cmd = screen_capture._build_ffmpeg_command("ffmpeg")
+        
+        assert "frag_keyframe" in cmd[cmd.index("-movflags") + 1]
+        assert "empty_moov" in cmd[cmd.index("-movflags") + 1]
+        assert cmd[cmd.index("-force_key_frames") + 1] == "expr:gte(t,n_forced*2)"
+        assert cmd[-1] == "out.mp4"
+    
     @patch('src.screen_capture.subprocess.run')
     def test_hardware_detection(self, mock_run, screen_capture):
         """Test hardware acceleration detection"""
@@ -119,4 +333,90 @@ class TestScreenCapture:
         # Mock failure
         mock_run.side_effect = Exception("Command failed")
         assert screen_capture._has_nvidia() is False
-        assert screen_capture._has_intel_qsv() is False 
\ No newline at end of file
+        assert screen_capture._has_intel_qsv() is False
+    
+    def test_frame_to_buffer_zero_copy(self, screen_capture):
+        """Test frames at the output resolution are piped without copying"""
+        from mss.screenshot import ScreenShot
+        
+        raw = bytearray(range(256)) * (1280 * 800 * 4 // 256)
+        frame = ScreenShot.from_size(raw, 1280, 800)
+        
+        buffer = screen_capture._frame_to_buffer(frame)
+        
+        assert isinstance(buffer, memoryview)
+        assert buffer.obj is raw
+        assert buffer.nbytes == 1280 * 800 * 4
+    
+    def test_frame_to_buffer_resize_reuses_buffer(self, screen_capture):
+        """Test resized frames are letterboxed into a reused output buffer"""
+        from mss.screenshot import ScreenShot
+        
+        # 640x200 scales to 1280x400, centered vertically in 1280x800
+        frame = ScreenShot.from_size(bytearray(b"\xff" * (640 * 200 * 4)), 640, 200)
+        
+        first = screen_capture._frame_to_buffer(frame)
+        second = screen_capture._frame_to_buffer(frame)
+        
+        assert first.nbytes == 1280 * 800 * 4
+        assert first.obj is second.obj
+        
+        output = screen_capture.scaler.output
+        assert output[0:200].max() == 0
+        assert output[200:600].min() == 255
+        assert output[600:800].max() == 0
+    
+    def test_ffmpeg_command_scaling(self, screen_capture):
+        """Test ffmpeg scales native-size frames when ffmpeg_scaling is enabled"""
+        from mss.screenshot import ScreenShot
+        
+        screen_capture.output_file = "out.mp4"
+        screen_capture.capture_size = (2560, 1600)
+        
+        cmd = screen_capture._build_ffmpeg_command("ffmpeg")
+        assert cmd[cmd.index("-video_size") + 1] == "1280x800"
+        assert "-vf" not in cmd
+        
+        screen_capture.ffmpeg_scaling = True
+        cmd = screen_capture._build_ffmpeg_command("ffmpeg")
+        assert cmd[cmd.index("-video_size") + 1] == "2560x1600"
+        assert cmd[cmd.index("-vf") + 1].startswith("scale=1280:800:")
+        assert cmd[-1] == "out.mp4"
+        
+        # Native frames are piped untouched
+        raw = bytearray(2560 * 1600 * 4)
+        buffer = screen_capture._frame_to_buffer(ScreenShot.from_size(raw, 2560, 1600))
+        assert buffer.obj is raw
+    
+    def test_ffmpeg_command_constant_rate(self, screen_capture):
+        """Test raw frames are read and written at the capture frame rate"""
+        screen_capture.output_file = "out.mp4"
+        
+        cmd = screen_capture._build_ffmpeg_command("ffmpeg")
+        assert cmd[cmd.index("-f") + 1] == "rawvideo"
+        assert cmd[cmd.index("-framerate") + 1] == "10"
+        assert cmd[cmd.index("-r") + 1] == "10"
+        assert "-use_wallclock_as_timestamps" not in cmd
+        assert "-fps_mode" not in cmd
+        assert cmd[-1] == "out.mp4"
+    
+    def test_skip_unchanged_implies_vfr(self):
+        """Test skipping unchanged frames pipes timestamped frames so the video has no padding frames"""
+        with patch('frame_sources.mss'):
+            assert ScreenCapture(skip_unchanged=True).vfr is True
+            assert ScreenCapture(partial_grab=True).vfr is True
+            assert ScreenCapture().vfr is False
+    
+    def test_ffmpeg_command_vfr(self, screen_capture):
+        """Test VFR mode reads timestamped Matroska input and keeps its timing"""
+        screen_capture.output_file = "out.mp4"
+        screen_capture.vfr = True
+        screen_capture.skip_unchanged = True
+        
+        cmd = screen_capture._build_ffmpeg_command("ffmpeg")
+        
+        assert cmd[cmd.index("-f") + 1] == "matroska"
+        assert cmd[cmd.index("-fps_mode") + 1] == "vfr"
+        assert "-use_wallclock_as_timestamps" not in cmd
+        assert "-r" not in cmd
+        assert cmd[-1] == "out.mp4"
@@ -127,6 +127,19 @@ class TestTimelineMuxer:
                 # Duration should be 2 seconds (3s - 1s)
                 assert duration == 2.0
     
+    def test_calculate_duration_journal(self, timeline_muxer, tmp_path):
+        """Test duration spans the earliest to the latest journaled event, whatever their order"""
+        journal = tmp_path / "events_1.jsonl"
+        journal.write_text(
+            '{"meta":{"type":"input_events"}}\n'
+            '{"t":2000000000,"kind":"key_down","key":"a"}\n'
+            '{"t":4000000000,"kind":"key_up","key":"a"}\n'
+            '{"t":1000000000,"kind":"mouse_down","button":"left","x":1,"y":2}\n'
+        )
+        timeline_muxer.events_file = str(journal)
+        
+        assert timeline_muxer._calculate_duration() == 3.0
+    
     def test_normalize_events(self, timeline_muxer):
         """Test event normalization"""
         # Mock events file with timestamps
@@ -142,6 +155,7 @@ class TestTimelineMuxer:
         with patch('os.path.exists', return_value=True):
             with patch('builtins.open', mock_open(read_data=json.dumps(events_json))):
                 normalized = timeline_muxer._normalize_events()
+                normalized["events"] = list(normalized["events"])
                 
                 # Verify normalization
                 assert "meta" in normalized
@@ -152,4 +166,204 @@ class TestTimelineMuxer:
                 assert normalized["events"][0]["t"] == 0
                 
                 # Second event should be at t=2000 (2 seconds in milliseconds)
-                assert normalized["events"][1]["t"] == 2000 
\ No newline at end of file
+                assert normalized["events"][1]["t"] == 2000 
+    
+    def test_normalize_events_with_frame_timestamps(self, timeline_muxer):
+        """Test events are tagged with the frame on screen when frame timestamps exist"""
+        events_json = {
+            "events": [
+                {"t": 50_000_000, "kind": "mouse_down"},
+                {"t": 250_000_000, "kind": "mouse_up"}
+            ]
+        }
+        
+        timeline_muxer.events_file = "events.json"
+        
+        with patch('os.path.exists', return_value=True):
+            with patch('builtins.open', mock_open(read_data=json.dumps(events_json))):
+                normalized = timeline_muxer._normalize_events([0, 100_000_000, 200_000_000, 300_000_000])
+                normalized["events"] = list(normalized["events"])
+        
+        assert [event["frame"] for event in normalized["events"]] == [0, 2]
+        assert [event["t"] for event in normalized["events"]] == [50, 250]
+    
+    def test_finalize_segment(self, timeline_muxer, tmp_path):
+        """Test a finished segment is packaged on its own, timed from the segment start"""
+        from src.frame_timestamps import read_frame_timestamps
+        
+        video = tmp_path / "recording_1.part001.mp4"
+        video.write_bytes(b"mp4")
+        timeline_muxer.output_dir = str(tmp_path)
+        timeline_muxer.recording_id = "recording_1"
+        (tmp_path / "recording_1_part001").mkdir()  # The fixture stubs out os.makedirs
+        
+        segment = {
+            "index": 1,
+            "file": str(video),
+            "start_ns": 10_000_000_000,
+            "end_ns": 20_000_000_000,
+            "resolution": (960, 540),
+            "frame_timestamps": [10_000_000_000, 10_100_000_000, 10_200_000_000]
+        }
+        events = [{"t": 10_150_000_000, "kind": "mouse_down"}]
+        
+        zip_path = timeline_muxer.finalize_segment(segment, events)
+        
+        assert zip_path == str(tmp_path / "recording_1_part001.zip")
+        with zipfile.ZipFile(zip_path) as zipf:
+            assert sorted(zipf.namelist()) == ["events.json", "frame_times.bin", "metadata.json", "video.mp4"]
+            metadata = json.loads(zipf.read("metadata.json"))
+            packaged_events = json.loads(zipf.read("events.json"))["events"]
+        
+        assert metadata["segment"] == {"recording_id": "recording_1", "index": 1, "start_ms": 10_000, "end_ms": 20_000}
+        assert metadata["duration"] == 10.0
+        assert metadata["resolution"] == [960, 540]
+        assert packaged_events == [{"t": 150, "kind": "mouse_down", "frame": 1}]
+        assert list(read_frame_timestamps(str(tmp_path / "recording_1_part001" / "frame_times.bin"))) == [0, 100_000_000, 200_000_000]
+    
+    def test_finalize_segment_proxy(self, timeline_muxer, tmp_path):
+        """Test a segment's proxy video is packaged next to the full resolution one"""
+        video = tmp_path / "recording_1.part000.mp4"
+        video.write_bytes(b"mp4")
+        (tmp_path / "recording_1.part000.proxy.mp4").write_bytes(b"proxy")
+        timeline_muxer.output_dir = str(tmp_path)
+        timeline_muxer.recording_id = "recording_1"
+        (tmp_path / "recording_1_part000").mkdir()  # The fixture stubs out os.makedirs
+        
+        segment = {
+            "index": 0,
+            "file": str(video),
+            "start_ns": 0,
+            "end_ns": None,
+            "resolution": (1920, 1080),
+            "proxy": str(tmp_path / "recording_1.part000.proxy.mp4"),
+            "proxy_resolution": (426, 240),
+            "frame_timestamps": [0, 100_000_000]
+        }
+        
+        zip_path = timeline_muxer.finalize_segment(segment, [])
+        
+        with zipfile.ZipFile(zip_path) as zipf:
+            assert zipf.read("proxy.mp4") == b"proxy"
+            metadata = json.loads(zipf.read("metadata.json"))
+        assert metadata["proxy"] == {"video": "proxy.mp4", "resolution": [426, 240]}
+    
+    def test_finalize_recovered(self, timeline_muxer, tmp_path):
+        """Test a recovered video is packaged with the marker's details and no events"""
+        video = tmp_path / "recording_1.recovered.mp4"
+        video.write_bytes(b"mp4")
+        timeline_muxer.output_dir = str(tmp_path)
+        (tmp_path / "recording_1_recovered").mkdir()  # The fixture stubs out os.makedirs
+        
+        info = {"video": "recording_1.mp4", "resolution": [800, 600], "fps": 10, "started": 1000.0}
+        zip_path = timeline_muxer.finalize_recovered(str(video), info)
+        
+        assert zip_path == str(tmp_path / "recording_1_recovered.zip")
+        with zipfile.ZipFile(zip_path) as zipf:
+            metadata = json.loads(zipf.read("metadata.json"))
+            assert json.loads(zipf.read("events.json"))["events"] == []
+            assert zipf.read("video.mp4") == b"mp4"
+        
+        assert metadata["recovered"] is True
+        assert metadata["resolution"] == [800, 600]
+        assert metadata["timestamp"] == 1000.0
+    
+    def test_finalize_recovered_frame_count(self, timeline_muxer, tmp_path):
+        """Test frame timestamps are cut to the frames that reached the recovered video"""
+        from src.frame_timestamps import FrameTimestampWriter, read_frame_timestamps
+        video = tmp_path / "recording_1.recovered.mp4"
+        video.write_bytes(b"mp4")
+        timeline_muxer.output_dir = str(tmp_path)
+        (tmp_path / "recording_1_recovered").mkdir()
+        
+        writer = FrameTimestampWriter(str(tmp_path / "recording_1.frames"))
+        for t_ns in (0, 100_000_000, 200_000_000, 300_000_000):
+            writer.append(t_ns)
+        writer.close()
+        journal = tmp_path / "events_1.jsonl"
+        journal.write_text('{"meta":{"type":"input_events"}}\n{"t":350000000,"kind":"key_down","key":"a"}\n')
+        
+        info = {"video": "recording_1.mp4", "resolution": [800, 600], "fps": 10, "started": 1000.0}
+        zip_path = timeline_muxer.finalize_recovered(str(video), info, str(tmp_path / "recording_1.frames"), str(journal), frame_count=2)
+        
+        with zipfile.ZipFile(zip_path) as zipf:
+            metadata = json.loads(zipf.read("metadata.json"))
+            events = json.loads(zipf.read("events.json"))["events"]
+        assert metadata["frame_count"] == 2
+        assert metadata["duration"] == 0.1
+        assert list(read_frame_timestamps(str(tmp_path / "recording_1_recovered" / "frame_times.bin"))) == [0, 100_000_000]
+        assert events[0]["frame"] == 1
+    
+    def test_finalize_recovered_events(self, timeline_muxer, tmp_path):
+        """Test a recovered package gets the events journaled before the crash"""
+        video = tmp_path / "recording_1.recovered.mp4"
+        video.write_bytes(b"mp4")
+        timeline_muxer.output_dir = str(tmp_path)
+        (tmp_path / "recording_1_recovered").mkdir()
+        
+        journal = tmp_path / "events_1.jsonl"
+        journal.write_text(
+            '{"meta":{"timestamp":1000.0,"type":"input_events"}}\n'
+            '{"t":2000000,"kind":"key_down","key":"a"}\n'
+            '{"t":3000000,"kind":"key_up","ke'  # Cut off by the crash
+        )
+        
+        info = {"video": "recording_1.mp4", "resolution": [800, 600], "fps": 10, "started": 1000.0}
+        zip_path = timeline_muxer.finalize_recovered(str(video), info, events_file=str(journal))
+        
+        with zipfile.ZipFile(zip_path) as zipf:
+            events = json.loads(zipf.read("events.json"))["events"]
+        assert events == [{"t": 2, "kind": "key_down", "key": "a"}]
+    
+    def test_multiple_monitors(self, timeline_muxer, tmp_path):
+        """Test further monitor videos are packaged and events tagged with their monitor"""
+        second_video = tmp_path / "recording_1_monitor2.mp4"
+        second_video.write_bytes(b"mp4")
+        timeline_muxer.set_monitors([
+            {"monitor": 1, "left": 0, "top": 0, "width": 1920, "height": 1080, "resolution": [1920, 1080], "video": "recording_1.mp4", "frame_timestamps": None},
+            {"monitor": 2, "left": 1920, "top": 0, "width": 1280, "height": 1024, "resolution": [1280, 1024], "video": str(second_video), "frame_timestamps": None}
+        ])
+        
+        described = timeline_muxer._package_monitors(str(tmp_path))
+        
+        assert [entry["video"] for entry in described] == ["video.mp4", "video_monitor2.mp4"]
+        assert described[1]["left"] == 1920
+        assert (tmp_path / "video_monitor2.mp4").read_bytes() == b"mp4"
+        
+        events = timeline_muxer._tag_monitors([
+            {"t": 0, "kind": "mouse_down", "x": 2000, "y": 10},
+            {"t": 1, "kind": "drag_end", "start_x": 5, "start_y": 5, "end_x": 2000, "end_y": 5},
+            {"t": 2, "kind": "key_down", "key": "a"},
+            {"t": 3, "kind": "scroll", "x": 100, "y": 1500}
+        ])
+        assert [event.get("monitor", "-") for event in events] == [2, 1, "-", None]
+    
+    def test_capture_region_events(self, timeline_muxer, tmp_path):
+        """Test event positions are translated into the captured region and its track is packaged"""
+        timeline_muxer.set_monitors([
+            {"monitor": 1, "left": 100, "top": 50, "width": 640, "height": 480, "resolution": [640, 480],
+             "video": "recording_1.mp4", "frame_timestamps": None, "region_track": [[0, 100, 50], [2_000_000_000, 300, 50]]}
+        ])
+        
+        events = timeline_muxer._to_capture_region([
+            {"t": 1_000_000_000, "kind": "mouse_down", "x": 110, "y": 60},
+            {"t": 3_000_000_000, "kind": "mouse_up", "x": 310, "y": 60}
+        ])
+        assert [(event["x"], event["y"]) for event in events] == [(10, 10), (10, 10)]
+        
+        described = timeline_muxer._package_monitors(str(tmp_path))
+        assert described[0]["region_track"] == [[0, 100, 50], [2000, 300, 50]]
+    
+    def test_cursor_track(self, timeline_muxer, tmp_path):
+        """Test the pointer track is packaged delta-encoded with its monitor"""
+        from src.cursor_track import CursorTrack
+        track = CursorTrack(interval=0.05)
+        track.sample(0, 10, 20)
+        track.sample(500_000_000, 40, 10)
+        timeline_muxer.set_monitors([
+            {"monitor": 1, "left": 0, "top": 0, "width": 640, "height": 480, "resolution": [640, 480],
+             "video": "recording_1.mp4", "frame_timestamps": None, "cursor_track": track}
+        ])
+        
+        described = timeline_muxer._package_monitors(str(tmp_path))
+        assert described[0]["cursor_track"] == {"interval_ms": 50, "t": [0, 500], "x": [10, 30], "y": [20, -10]}